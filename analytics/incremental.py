@@ -0,0 +1,246 @@
+from collections import OrderedDict, deque
+import math
+
+import numpy as np
+
+from config import settings
+
+# Running indicators consume one closed candle at a time in O(1). ``peek``
+# returns the value the next candle would produce without committing it,
+# which is how the still-open last candle is served.
+
+
+class RunningSMA:
+    def __init__(self, period):
+        self.period = period
+        self._window = deque()
+        self._sum = 0.0
+        self._count = 0
+
+    def update(self, x):
+        self._window.append(x)
+        self._sum += x
+        if len(self._window) > self.period:
+            self._sum -= self._window.popleft()
+        self._count += 1
+        if self._count % 1024 == 0:
+            # Re-anchor the running sum so float drift can't accumulate
+            self._sum = math.fsum(self._window)
+        return self.value
+
+    def peek(self, x):
+        if len(self._window) + 1 < self.period:
+            return math.nan
+        dropped = self._window[0] if len(self._window) == self.period else 0.0
+        return (self._sum + x - dropped) / self.period
+
+    @property
+    def value(self):
+        return self._sum / self.period if len(self._window) == self.period else math.nan
+
+
+class DecayedSum:
+    """Running ``s = decay * s + x`` over the whole series."""
+
+    def __init__(self, decay):
+        self.decay = decay
+        self.value = 0.0
+
+    def update(self, x):
+        self.value = self.peek(x)
+        return self.value
+
+    def peek(self, x):
+        return self.decay * self.value + x
+
+
+class RunningEMA:
+    """Decayed sum of closes; ``_ema_window`` turns it into an EMA seeded at any window start."""
+
+    def __init__(self, period):
+        self._sum = DecayedSum(1.0 - 2.0 / (period + 1))
+
+    def update(self, x):
+        return self._sum.update(x)
+
+    def peek(self, x):
+        return self._sum.peek(x)
+
+
+class WilderRSI:
+    """Decayed sums of gains and losses; ``_rsi_window`` turns them into Wilder averages."""
+
+    def __init__(self, period):
+        decay = 1.0 - 1.0 / period
+        self._gains = DecayedSum(decay)
+        self._losses = DecayedSum(decay)
+        self._prev = None
+
+    def _delta(self, x):
+        delta = 0.0 if self._prev is None else x - self._prev
+        return max(delta, 0.0), max(-delta, 0.0)
+
+    def update(self, x):
+        gain, loss = self._delta(x)
+        self._prev = x
+        return self._gains.update(gain), self._losses.update(loss)
+
+    def peek(self, x):
+        gain, loss = self._delta(x)
+        return self._gains.peek(gain), self._losses.peek(loss)
+
+
+# Sums over candles before the window cancel out of the differences below, so
+# the output equals a batch recompute seeded at the window's first candle, and
+# the state serves every window of the series.
+
+def _sma_window(period, closes, states):
+    states[:period - 1] = np.nan
+    return states
+
+
+def _ema_window(period, closes, sums):
+    alpha = 2.0 / (period + 1)
+    scale = (1.0 - alpha) ** np.arange(len(closes))
+    return scale * (closes[0] - alpha * sums[0]) + alpha * sums
+
+
+def _wilder_window(period, values, sums):
+    # Wilder average seeded with the mean of the window's first ``period`` values
+    scale = (1.0 - 1.0 / period) ** np.arange(len(sums) - period)
+    avg = scale * values[:period].mean() + (sums[period:] - scale * sums[period]) / period
+    # Cancellation leaves tiny residues where the batch average is exactly zero
+    seen = np.cumsum(values > 0)[period - 1:] > 0
+    return np.where(seen, np.maximum(avg, 0.0), 0.0)
+
+
+def _rsi_window(period, closes, sums):
+    out = np.full(len(closes), np.nan)
+    if len(closes) <= period:
+        return out
+    delta = np.diff(closes)
+    avg_gain = _wilder_window(period, np.clip(delta, 0, None), sums[:, 0])
+    avg_loss = _wilder_window(period, np.clip(-delta, 0, None), sums[:, 1])
+    with np.errstate(divide='ignore', invalid='ignore'):
+        out[period:] = np.where(avg_loss == 0, 100.0, 100.0 - 100.0 / (1.0 + avg_gain / avg_loss))
+    return out
+
+
+INCREMENTAL_INDICATORS = {'sma': RunningSMA, 'ema': RunningEMA, 'rsi': WilderRSI}
+
+# Turn the committed state of a window's candles into the window's values
+_WINDOW = {'sma': _sma_window, 'ema': _ema_window, 'rsi': _rsi_window}
+
+
+class SeriesState:
+    """Running indicator plus the state it reached at recent closed candles."""
+
+    def __init__(self, indicator, period, history):
+        self.indicator = indicator
+        self.period = period
+        self.timestamps = deque(maxlen=history)
+        self.values = deque(maxlen=history)
+        self.last_close = None
+        self.running = INCREMENTAL_INDICATORS[indicator](period)
+
+    def commit(self, timestamps, closes):
+        for ts, close in zip(timestamps, closes):
+            self.values.append(self.running.update(close))
+            self.timestamps.append(ts)
+            self.last_close = close
+
+    def rebuild(self, timestamps, closes):
+        self.running = INCREMENTAL_INDICATORS[self.indicator](self.period)
+        history = max(self.timestamps.maxlen, len(timestamps))
+        self.timestamps = deque(maxlen=history)
+        self.values = deque(maxlen=history)
+        self.last_close = None
+        self.commit(timestamps, closes)
+
+    def new_candles_from(self, timestamps, closes):
+        """Return the index of the first uncommitted candle, or None if history changed."""
+        if not self.timestamps or len(timestamps) > self.timestamps.maxlen:
+            return None
+        last = self.timestamps[-1]
+        if not len(timestamps) or timestamps[0] < self.timestamps[0] or timestamps[0] > last:
+            return None
+        idx = int(np.searchsorted(timestamps, last))
+        if idx >= len(timestamps):
+            return None
+        if timestamps[idx] != last or closes[idx] != self.last_close:
+            return None
+        return idx + 1
+
+
+class IndicatorStateCache:
+    """Incremental indicator state per (exchange, symbol, interval, indicator, period).
+
+    Each request hands over the current candles. Candles after the last
+    committed one are applied in O(1) each; the still-open last candle is only
+    peeked. A full recompute happens only when the history no longer lines up
+    with what was committed (a gap, a revised candle or an older window).
+    Output equals a batch recompute over the requested window, so state is
+    reused across sliding windows: SMA keeps its values and sets warm-up
+    positions to NaN; EMA and RSI keep decayed running sums and read the
+    window's values off them in one vectorized pass. The number of tracked
+    series is capped with LRU eviction.
+    """
+
+    def __init__(self, max_series=None, history=None):
+        self.max_series = settings.INDICATOR_STATE_MAX_SERIES if max_series is None else max_series
+        self.history = settings.INDICATOR_STATE_HISTORY if history is None else history
+        self._states = OrderedDict()
+        self.incremental_updates = 0
+        self.rebuilds = 0
+
+    def values(self, key, indicator, period, timestamps, closes):
+        """Return indicator values aligned with ``timestamps``.
+
+        Args:
+            key: (exchange, symbol, interval) tuple identifying the series.
+            indicator: One of ``INCREMENTAL_INDICATORS``.
+            period: Indicator period.
+            timestamps: Sorted candle timestamps; the last candle may be open.
+            closes: Close prices aligned with ``timestamps``.
+
+        Returns:
+            Float array of the same length as ``timestamps`` (NaN in warm-up).
+        """
+        if indicator not in INCREMENTAL_INDICATORS:
+            raise ValueError(f"Indicator '{indicator}' not supported.")
+        n = len(timestamps)
+        if not n:
+            return np.empty(0)
+        state_key = (*key, indicator, period)
+        state = self._states.get(state_key)
+        if state is None:
+            state = self._states[state_key] = SeriesState(indicator, period, self.history)
+            while len(self._states) > self.max_series:
+                self._states.popitem(last=False)
+        else:
+            self._states.move_to_end(state_key)
+        closed_ts, closed = timestamps[:-1], closes[:-1]
+        start = state.new_candles_from(closed_ts, closed) if n > 1 else None
+        if start is None:
+            state.rebuild(closed_ts, closed)
+            self.rebuilds += 1
+        else:
+            state.commit(closed_ts[start:], closed[start:])
+            self.incremental_updates += 1
+        states = list(state.values)[-(n - 1):] if n > 1 else []
+        states.append(state.running.peek(closes[-1]))
+        return _WINDOW[indicator](period, np.asarray(closes, dtype=float), np.array(states, dtype=float))
+
+    def clear(self):
+        self._states.clear()
+
+    def stats(self):
+        """Return the number of tracked series and update/rebuild counters."""
+        return {
+            "series": len(self._states),
+            "incremental_updates": self.incremental_updates,
+            "rebuilds": self.rebuilds,
+        }
+
+
+indicator_states = IndicatorStateCache()
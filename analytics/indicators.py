@@ -1,8 +1,160 @@
 
-import pandas as pd
+import numpy as np
+
+# Indicator outputs keep the input length; warm-up positions are NaN.
+
+
+def _close(data):
+    # Accept plain arrays as well as column mappings such as a DataFrame
+    if isinstance(data, np.ndarray):
+        return np.ascontiguousarray(data, dtype=float)
+    try:
+        return np.ascontiguousarray(data['close'], dtype=float)
+    except (TypeError, KeyError, IndexError, ValueError):
+        return np.ascontiguousarray(data, dtype=float)
+
+
+def _wilder(values, period, seed):
+    # Wilder smoothing seeded with the simple mean of the first ``period`` values
+    out = np.full(len(values), np.nan)
+    if len(values) < seed + period:
+        return out
+    avg = values[seed:seed + period].mean()
+    out[seed + period - 1] = avg
+    for i, v in enumerate(values[seed + period:].tolist(), seed + period):
+        avg += (v - avg) / period
+        out[i] = avg
+    return out
+
 
 def sma(data, period=14):
-    return data['close'].rolling(period).mean()
+    close = _close(data)
+    out = np.full(len(close), np.nan)
+    if period <= 0 or len(close) < period:
+        return out
+    csum = np.cumsum(np.insert(close, 0, 0.0))
+    out[period - 1:] = (csum[period:] - csum[:-period]) / period
+    return out
+
 
 def ema(data, period=14):
-    return data['close'].ewm(span=period, adjust=False).mean()
+    close = _close(data)
+    out = np.empty(len(close))
+    if not len(close):
+        return out
+    alpha = 2.0 / (period + 1)
+    value = close[0]
+    for i, x in enumerate(close.tolist()):
+        value += alpha * (x - value)
+        out[i] = value
+    return out
+
+
+def rsi(data, period=14):
+    close = _close(data)
+    out = np.full(len(close), np.nan)
+    if len(close) <= period:
+        return out
+    delta = np.diff(close)
+    avg_gain = _wilder(np.clip(delta, 0, None), period, 0)
+    avg_loss = _wilder(np.clip(-delta, 0, None), period, 0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        rs = avg_gain / avg_loss
+        out[1:] = np.where(avg_loss == 0, 100.0, 100.0 - 100.0 / (1.0 + rs))
+    return out
+
+
+def macd(data, fast=12, slow=26, signal=9):
+    close = _close(data)
+    line = ema(close, fast) - ema(close, slow)
+    signal_line = ema(line, signal)
+    return {'macd': line, 'signal': signal_line, 'hist': line - signal_line}
+
+
+def bollinger_bands(data, period=20, std=2.0):
+    close = _close(data)
+    middle = sma(close, period)
+    mean_sq = sma(close * close, period)
+    dev = np.sqrt(np.maximum(mean_sq - middle * middle, 0.0))
+    return {'middle': middle, 'upper': middle + std * dev, 'lower': middle - std * dev}
+
+
+def atr(high, low, close, period=14):
+    high, low, close = (np.ascontiguousarray(a, dtype=float) for a in (high, low, close))
+    if not len(close):
+        return np.empty(0)
+    prev_close = np.concatenate(([close[0]], close[:-1]))
+    tr = np.maximum(high - low, np.maximum(np.abs(high - prev_close), np.abs(low - prev_close)))
+    tr[0] = high[0] - low[0]
+    return _wilder(tr, period, 0)
+
+
+def vwap(high, low, close, volume, period=None):
+    high, low, close, volume = (np.ascontiguousarray(a, dtype=float) for a in (high, low, close, volume))
+    pv = np.cumsum((high + low + close) / 3.0 * volume)
+    vol = np.cumsum(volume)
+    if period:
+        out = np.full(len(close), np.nan)
+        if len(close) >= period:
+            pv = pv - np.concatenate(([0.0] * period, pv[:-period]))
+            vol = vol - np.concatenate(([0.0] * period, vol[:-period]))
+            with np.errstate(divide='ignore', invalid='ignore'):
+                out[period - 1:] = (pv / vol)[period - 1:]
+        return out
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return pv / vol
+
+
+INDICATORS = ('sma', 'ema', 'rsi', 'macd', 'bbands', 'atr', 'vwap')
+
+
+def indicator_key(spec):
+    """Return a stable output key such as ``sma_14`` or ``macd_12_26_9``."""
+    name = spec['name']
+    if name == 'macd':
+        return f"macd_{spec.get('fast') or 12}_{spec.get('slow') or 26}_{spec.get('signal') or 9}"
+    if name == 'bbands':
+        return f"bbands_{spec.get('period') or 20}_{spec.get('std') or 2.0:g}"
+    if name == 'vwap' and not spec.get('period'):
+        return 'vwap'
+    return f"{name}_{spec.get('period') or 14}"
+
+
+def compute_indicators(arrays, specs):
+    """Compute several indicators over one set of OHLCV arrays.
+
+    Args:
+        arrays: Dict of close/high/low/volume arrays.
+        specs: List of dicts with ``name`` plus optional ``period``, ``fast``,
+            ``slow``, ``signal`` and ``std`` parameters.
+
+    Returns:
+        Dict mapping ``indicator_key(spec)`` to a dict of named output arrays.
+    """
+    results = {}
+    for spec in specs:
+        key = indicator_key(spec)
+        if key in results:
+            continue
+        name, period = spec['name'], spec.get('period') or 14
+        if name == 'sma':
+            results[key] = {'sma': sma(arrays['close'], period)}
+        elif name == 'ema':
+            results[key] = {'ema': ema(arrays['close'], period)}
+        elif name == 'rsi':
+            results[key] = {'rsi': rsi(arrays['close'], period)}
+        elif name == 'macd':
+            results[key] = macd(
+                arrays['close'], spec.get('fast') or 12, spec.get('slow') or 26, spec.get('signal') or 9
+            )
+        elif name == 'bbands':
+            results[key] = bollinger_bands(arrays['close'], spec.get('period') or 20, spec.get('std') or 2.0)
+        elif name == 'atr':
+            results[key] = {'atr': atr(arrays['high'], arrays['low'], arrays['close'], period)}
+        elif name == 'vwap':
+            results[key] = {
+                'vwap': vwap(arrays['high'], arrays['low'], arrays['close'], arrays['volume'], spec.get('period'))
+            }
+        else:
+            raise ValueError(f"Indicator '{name}' not supported.")
+    return results
@@ -0,0 +1,232 @@
+from collections import OrderedDict
+
+import numpy as np
+
+from config import settings
+
+# Book sides are (n, 2) float arrays of [price, amount] rows. Bids are sorted
+# by descending price and asks by ascending price, so row 0 is the top.
+
+_EMPTY = np.empty((0, 2))
+
+
+def to_levels(levels):
+    """Convert ccxt ``[[price, amount, ...], ...]`` levels into a (n, 2) array."""
+    if levels is None or not len(levels):
+        return _EMPTY.copy()
+    arr = np.asarray(levels, dtype=float)
+    return np.ascontiguousarray(arr[:, :2])
+
+
+def _sort(levels, descending):
+    order = np.argsort(-levels[:, 0] if descending else levels[:, 0], kind='stable')
+    return levels[order]
+
+
+def _amounts_at(levels, prices):
+    # Amount resting at each of ``prices`` (0 where the level is absent)
+    asc = levels[np.argsort(levels[:, 0], kind='stable')]
+    idx = np.searchsorted(asc[:, 0], prices)
+    idx_clipped = np.minimum(idx, max(len(asc) - 1, 0))
+    found = (idx < len(asc)) & (asc[idx_clipped, 0] == prices) if len(asc) else np.zeros(len(prices), bool)
+    out = np.zeros(len(prices))
+    out[found] = asc[idx_clipped[found], 1]
+    return out
+
+
+def diff_levels(old, new):
+    """Return the levels that changed between two snapshots of one side.
+
+    Returns:
+        (k, 2) array of [price, new_amount]; an amount of 0 means the level
+        was removed.
+    """
+    prices = np.union1d(old[:, 0], new[:, 0])
+    old_amounts, new_amounts = _amounts_at(old, prices), _amounts_at(new, prices)
+    changed = old_amounts != new_amounts
+    return np.column_stack((prices[changed], new_amounts[changed]))
+
+
+def apply_delta(levels, delta, descending):
+    """Apply a ``diff_levels`` delta to one sorted side and keep it sorted."""
+    if not len(delta):
+        return levels
+    kept = levels[~np.isin(levels[:, 0], delta[:, 0])]
+    added = delta[delta[:, 1] > 0]
+    return _sort(np.concatenate((kept, added)), descending)
+
+
+def bucket_levels(levels, tick, descending):
+    """Aggregate levels into price buckets of ``tick``.
+
+    Bids are floored and asks are ceiled to the tick, so a bucket never looks
+    better than the prices it contains.
+    """
+    if not len(levels) or not tick:
+        return levels
+    # Small epsilon keeps prices already on the grid from moving a bucket
+    scaled = levels[:, 0] / tick
+    keys = np.floor(scaled + 1e-9) if descending else np.ceil(scaled - 1e-9)
+    starts = np.flatnonzero(np.concatenate(([True], keys[1:] != keys[:-1])))
+    return np.column_stack((keys[starts] * tick, np.add.reduceat(levels[:, 1], starts)))
+
+
+def _fill(levels, size):
+    # Walk one side for a market order of ``size`` base units
+    cum_amount = np.cumsum(levels[:, 1])
+    cum_cost = np.cumsum(levels[:, 0] * levels[:, 1])
+    idx = int(np.searchsorted(cum_amount, size))
+    if idx >= len(levels):
+        filled, cost, worst = cum_amount[-1], cum_cost[-1], levels[-1, 0]
+    else:
+        prev_amount = cum_amount[idx - 1] if idx else 0.0
+        prev_cost = cum_cost[idx - 1] if idx else 0.0
+        filled, worst = size, levels[idx, 0]
+        cost = prev_cost + (size - prev_amount) * worst
+    return float(filled), float(cost), float(worst)
+
+
+def book_metrics(bids, asks, size=None):
+    """Compute top-of-book, depth and slippage metrics in one pass.
+
+    Args:
+        bids: Sorted bid levels.
+        asks: Sorted ask levels.
+        size: Optional order size in base units to estimate a market buy
+            (walking the asks) and sell (walking the bids).
+
+    Returns:
+        Dict with best bid/ask, mid, spread, spread in bps, imbalance,
+        cumulative depth per side and, with ``size``, buy/sell fill estimates
+        (filled amount, VWAP, worst price and slippage vs mid in bps).
+    """
+    if not len(bids) or not len(asks):
+        raise ValueError("Order book side is empty")
+    best_bid, best_ask = float(bids[0, 0]), float(asks[0, 0])
+    mid = (best_bid + best_ask) / 2
+    bid_volume, ask_volume = float(bids[:, 1].sum()), float(asks[:, 1].sum())
+    result = {
+        "best_bid": best_bid,
+        "best_ask": best_ask,
+        "mid": mid,
+        "spread": best_ask - best_bid,
+        "spread_bps": (best_ask - best_bid) / mid * 1e4,
+        "imbalance": (bid_volume - ask_volume) / (bid_volume + ask_volume),
+        "bid_depth": np.column_stack((bids[:, 0], np.cumsum(bids[:, 1]))),
+        "ask_depth": np.column_stack((asks[:, 0], np.cumsum(asks[:, 1]))),
+    }
+    if size:
+        for side, levels, sign in (("buy", asks, 1), ("sell", bids, -1)):
+            filled, cost, worst = _fill(levels, size)
+            vwap = cost / filled
+            result[side] = {
+                "filled": filled,
+                "vwap": vwap,
+                "worst_price": worst,
+                "slippage_bps": sign * (vwap - mid) / mid * 1e4,
+            }
+    return result
+
+
+def consolidate(books, depth):
+    """Merge the top of several venues' books into one consolidated book.
+
+    Args:
+        books: Mapping of venue name to (bids, asks) level arrays.
+        depth: Number of consolidated levels to keep per side.
+
+    Returns:
+        Dict with ``bids`` and ``asks`` lists of (venue, price, amount),
+        best first.
+    """
+    venues = list(books)
+    result = {}
+    for side, pos, descending in (("bids", 0, True), ("asks", 1, False)):
+        levels = [books[v][pos][:depth] for v in venues]
+        if not any(len(lv) for lv in levels):
+            result[side] = []
+            continue
+        stacked = np.concatenate(levels)
+        owner = np.repeat(np.arange(len(venues)), [len(lv) for lv in levels])
+        order = np.argsort(-stacked[:, 0] if descending else stacked[:, 0], kind='stable')[:depth]
+        result[side] = [
+            (venues[v], price, amount)
+            for v, (price, amount) in zip(owner[order].tolist(), stacked[order].tolist())
+        ]
+    return result
+
+
+class LocalOrderBook:
+    """Sorted bid/ask arrays for one symbol, updated by snapshot diffs."""
+
+    def __init__(self):
+        self.bids = _EMPTY.copy()
+        self.asks = _EMPTY.copy()
+        self.timestamp = 0
+        self.version = 0
+
+    def apply_snapshot(self, bids, asks, timestamp=0):
+        """Diff a full snapshot against the book and apply only the changes.
+
+        Returns:
+            Number of price levels that changed.
+        """
+        bids = _sort(to_levels(bids), descending=True)
+        asks = _sort(to_levels(asks), descending=False)
+        bid_delta, ask_delta = diff_levels(self.bids, bids), diff_levels(self.asks, asks)
+        self.bids = apply_delta(self.bids, bid_delta, descending=True)
+        self.asks = apply_delta(self.asks, ask_delta, descending=False)
+        self.timestamp = timestamp
+        changed = len(bid_delta) + len(ask_delta)
+        if changed:
+            self.version += 1
+        return changed
+
+    def levels(self, tick=None, depth=None):
+        """Return (bids, asks), optionally bucketed by ``tick`` and cut to ``depth``."""
+        bids = bucket_levels(self.bids, tick, descending=True)
+        asks = bucket_levels(self.asks, tick, descending=False)
+        if depth:
+            bids, asks = bids[:depth], asks[:depth]
+        return bids, asks
+
+
+class OrderBookRegistry:
+    """Local order books per (exchange, symbol), capped with LRU eviction."""
+
+    def __init__(self, max_books=None):
+        self.max_books = settings.ORDER_BOOK_MAX_BOOKS if max_books is None else max_books
+        self._books = OrderedDict()
+        self.snapshots = 0
+        self.changed_levels = 0
+
+    def apply(self, exchange, symbol, bids, asks, timestamp=0):
+        """Feed a snapshot into the book for ``(exchange, symbol)`` and return the book."""
+        key = (exchange, symbol)
+        book = self._books.get(key)
+        if book is None:
+            book = self._books[key] = LocalOrderBook()
+            while len(self._books) > self.max_books:
+                self._books.popitem(last=False)
+        else:
+            self._books.move_to_end(key)
+        self.changed_levels += book.apply_snapshot(bids, asks, timestamp)
+        self.snapshots += 1
+        return book
+
+    def get(self, exchange, symbol):
+        return self._books.get((exchange, symbol))
+
+    def clear(self):
+        self._books.clear()
+
+    def stats(self):
+        """Return the number of books and snapshot/level-change counters."""
+        return {
+            "books": len(self._books),
+            "snapshots": self.snapshots,
+            "changed_levels": self.changed_levels,
+        }
+
+
+order_books = OrderBookRegistry()
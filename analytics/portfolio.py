@@ -1,7 +1,80 @@
 
+import numpy as np
+
+# Portfolios are rows of a (portfolios, assets) holdings matrix; prices and
+# close series are aligned with the same asset columns.
+
+
 def calculate_portfolio_value(prices, holdings):
-    value=0
-    for coin, amount in holdings.items():
-        if coin in prices:
-            value += prices[coin]*amount
-    return value
+    assets = [coin for coin in holdings if coin in prices]
+    if not assets:
+        return 0
+    amounts = np.fromiter((holdings[c] for c in assets), dtype=float, count=len(assets))
+    return float(amounts @ np.fromiter((prices[c] for c in assets), dtype=float, count=len(assets)))
+
+
+def holdings_matrix(portfolios):
+    """Build a holdings matrix from a list of ``{asset: amount}`` dicts.
+
+    Returns:
+        Tuple of (assets, matrix) where ``matrix[i, j]`` is the amount of
+        ``assets[j]`` held in portfolio ``i``.
+    """
+    assets = list(dict.fromkeys(asset for holdings in portfolios for asset in holdings))
+    column = {asset: j for j, asset in enumerate(assets)}
+    matrix = np.zeros((len(portfolios), len(assets)))
+    for i, holdings in enumerate(portfolios):
+        for asset, amount in holdings.items():
+            matrix[i, column[asset]] = amount
+    return assets, matrix
+
+
+def value_portfolios(matrix, prices):
+    """Value every portfolio in one matrix product.
+
+    Assets without a price (NaN) contribute nothing to the value.
+
+    Returns:
+        Array with one value per portfolio.
+    """
+    return matrix @ np.nan_to_num(prices, nan=0.0)
+
+
+def value_series(matrix, closes):
+    """Portfolio values over time from aligned (time, assets) closes.
+
+    Returns:
+        (time, portfolios) array of values.
+    """
+    return closes @ matrix.T
+
+
+def simple_returns(series):
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return series[1:] / series[:-1] - 1.0
+
+
+def volatility(series, periods_per_year=None):
+    """Standard deviation of period returns, annualized if ``periods_per_year`` is given."""
+    returns = simple_returns(series)
+    if len(returns) < 2:
+        return np.full(series.shape[1:], np.nan)
+    vol = np.nanstd(returns, axis=0, ddof=1)
+    return vol * np.sqrt(periods_per_year) if periods_per_year else vol
+
+
+def max_drawdown(series):
+    """Largest peak-to-trough fall per column, as a positive fraction."""
+    peaks = np.maximum.accumulate(series, axis=0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        drawdowns = 1.0 - series / peaks
+    return np.nanmax(drawdowns, axis=0) if len(series) else np.full(series.shape[1:], np.nan)
+
+
+def correlation(closes):
+    """Correlation matrix of asset returns from aligned (time, assets) closes."""
+    returns = simple_returns(closes)
+    if len(returns) < 2:
+        return np.full((closes.shape[1], closes.shape[1]), np.nan)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.atleast_2d(np.corrcoef(returns, rowvar=False))
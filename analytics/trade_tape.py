@@ -0,0 +1,178 @@
+from collections import OrderedDict
+
+import numpy as np
+
+from config import settings
+
+# One row per trade; timestamps in ms, side is 1 for buy, -1 for sell, 0 if unknown
+TRADE_DTYPE = np.dtype([
+    ('timestamp', '<i8'),
+    ('price', '<f8'),
+    ('amount', '<f8'),
+    ('side', 'i1'),
+    ('id', 'U36'),
+])
+
+_SIDES = {'buy': 1, 'sell': -1}
+_SIDE_NAMES = {1: 'buy', -1: 'sell', 0: ''}
+
+
+def to_trade_array(trades):
+    """Convert ccxt trade dicts into a ``TRADE_DTYPE`` array sorted by time."""
+    arr = np.empty(len(trades), dtype=TRADE_DTYPE)
+    for i, t in enumerate(trades):
+        arr[i] = (
+            t.get('timestamp') or 0,
+            t['price'],
+            t['amount'],
+            _SIDES.get(t.get('side'), 0),
+            str(t.get('id') or ''),
+        )
+    return arr[np.argsort(arr['timestamp'], kind='stable')]
+
+
+def trade_items(trades):
+    """Render trade rows as the API's trade item dicts (timestamps in seconds)."""
+    return [
+        {
+            "price": price,
+            "amount": amount,
+            "side": _SIDE_NAMES[side],
+            "timestamp": ts // 1000,
+            "trade_id": trade_id,
+        }
+        for ts, price, amount, side, trade_id in trades.tolist()
+    ]
+
+
+class TradeTape:
+    """Fixed-size ring buffer of the most recent trades for one symbol.
+
+    New trades are merged with deduplication: anything older than the last
+    stored trade is dropped, and trades sharing the last timestamp are
+    matched by id (or price/amount when the exchange sends no ids). Older
+    trades from a deeper backfill are merged in by rebuilding the buffer.
+    """
+
+    def __init__(self, capacity=None):
+        self.capacity = settings.TRADE_TAPE_CAPACITY if capacity is None else capacity
+        self._buf = np.empty(self.capacity, dtype=TRADE_DTYPE)
+        self._start = 0
+        self._count = 0
+        # Deepest snapshot fetched without ``since``; deeper limits trigger a backfill
+        self.backfilled = 0
+
+    def __len__(self):
+        return self._count
+
+    @property
+    def last_timestamp(self):
+        return int(self._buf[(self._start + self._count - 1) % self.capacity]['timestamp']) if self._count else None
+
+    def latest(self, n=None):
+        """Return up to ``n`` most recent trades, oldest first."""
+        n = self._count if n is None else min(n, self._count)
+        idx = (self._start + self._count - n + np.arange(n)) % self.capacity
+        return self._buf[idx]
+
+    def _append(self, rows):
+        rows = rows[-self.capacity:]
+        end = (self._start + self._count) % self.capacity
+        first = min(len(rows), self.capacity - end)
+        self._buf[end:end + first] = rows[:first]
+        self._buf[:len(rows) - first] = rows[first:]
+        overflow = self._count + len(rows) - self.capacity
+        if overflow > 0:
+            self._start = (self._start + overflow) % self.capacity
+        self._count = min(self._count + len(rows), self.capacity)
+
+    def merge(self, trades):
+        """Merge a sorted ``TRADE_DTYPE`` array and return how many trades were new."""
+        if not len(trades):
+            return 0
+        last = self.last_timestamp
+        if last is None or trades['timestamp'][0] >= last:
+            if last is not None:
+                tail = self.latest()
+                seen = {(t_id or (price, amount)) for ts, price, amount, _, t_id in
+                        tail[tail['timestamp'] == last].tolist()}
+                fresh = np.fromiter(
+                    (ts > last or (t_id or (price, amount)) not in seen
+                     for ts, price, amount, _, t_id in trades.tolist()),
+                    dtype=bool, count=len(trades),
+                )
+                trades = trades[fresh]
+            self._append(trades)
+            return len(trades)
+        before = self._count
+        combined = np.unique(np.concatenate((self.latest(), trades)))
+        combined = combined[np.argsort(combined['timestamp'], kind='stable')]
+        self._start, self._count = 0, 0
+        self._append(combined)
+        return max(self._count - before, 0)
+
+    def aggregates(self, window, now=None, large_size=None):
+        """Rolling aggregates over trades in the last ``window`` seconds.
+
+        Args:
+            window: Window length in seconds, ending at ``now``.
+            now: Window end in ms; defaults to the last trade's timestamp.
+            large_size: Amount at or above which a trade counts as large;
+                defaults to ``TRADE_LARGE_MULTIPLE`` times the window's
+                median trade amount.
+
+        Returns:
+            Dict with count, volume, buy/sell volume, VWAP and large trades.
+        """
+        trades = self.latest()
+        now = self.last_timestamp if now is None else now
+        if now is not None:
+            trades = trades[trades['timestamp'] >= now - window * 1000]
+        if not len(trades):
+            return {
+                "window": window, "count": 0, "volume": 0.0, "buy_volume": 0.0,
+                "sell_volume": 0.0, "vwap": None, "large_trades": [],
+            }
+        amount, side = trades['amount'], trades['side']
+        volume = float(amount.sum())
+        if large_size is None:
+            large_size = settings.TRADE_LARGE_MULTIPLE * float(np.median(amount))
+        return {
+            "window": window,
+            "count": len(trades),
+            "volume": volume,
+            "buy_volume": float(amount[side == 1].sum()),
+            "sell_volume": float(amount[side == -1].sum()),
+            "vwap": float((trades['price'] * amount).sum() / volume) if volume else None,
+            "large_trades": trade_items(trades[amount >= large_size]),
+        }
+
+
+class TradeTapeRegistry:
+    """Trade tapes per (exchange, symbol), capped with LRU eviction."""
+
+    def __init__(self, max_tapes=None, capacity=None):
+        self.max_tapes = settings.TRADE_TAPE_MAX_SYMBOLS if max_tapes is None else max_tapes
+        self.capacity = capacity
+        self._tapes = OrderedDict()
+
+    def get(self, exchange, symbol):
+        """Return the tape for ``(exchange, symbol)``, creating an empty one if needed."""
+        key = (exchange, symbol)
+        tape = self._tapes.get(key)
+        if tape is None:
+            tape = self._tapes[key] = TradeTape(self.capacity)
+            while len(self._tapes) > self.max_tapes:
+                self._tapes.popitem(last=False)
+        else:
+            self._tapes.move_to_end(key)
+        return tape
+
+    def clear(self):
+        self._tapes.clear()
+
+    def stats(self):
+        return {"tapes": len(self._tapes), "trades": sum(len(t) for t in self._tapes.values())}
+
+
+trade_tapes = TradeTapeRegistry()
@@ -0,0 +1,102 @@
+import asyncio
+from collections import Counter
+import random
+import time
+import zlib
+
+import ccxt
+
+
+class FakeExchange:
+    """In-process stand-in for a ccxt async exchange.
+
+    Implements the subset of the ccxt API the server uses. Every call waits
+    ``latency`` seconds (plus up to ``jitter``), fails with
+    ``ccxt.NetworkError`` with probability ``error_rate`` and returns
+    ``payload`` rows (order book levels per side, trades or candles) unless
+    the caller asks for fewer. Upstream calls are counted per method.
+    """
+
+    def __init__(self, exchange_id="binance", latency=0.005, jitter=0.0, error_rate=0.0,
+                 payload=100, symbols=1000, seed=None):
+        self.id = exchange_id
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.payload = payload
+        self.symbols = ["BTC/USDT", "ETH/USDT"] + [f"C{i}/USDT" for i in range(symbols)]
+        self.has = {"fetchTickers": True, "fetchOHLCV": True, "fetchTrades": True, "fetchOrderBook": True}
+        self.calls = Counter()
+        self._random = random.Random(seed)
+        self._trade_id = 0
+
+    async def _upstream(self, method):
+        self.calls[method] += 1
+        delay = self.latency + self._random.uniform(0, self.jitter)
+        if delay > 0:
+            await asyncio.sleep(delay)
+        if self.error_rate and self._random.random() < self.error_rate:
+            raise ccxt.NetworkError(f"{self.id} {method}: injected failure")
+
+    def _price(self, symbol):
+        return 100.0 + zlib.crc32(symbol.encode()) % 1000 + self._random.random()
+
+    def _ticker(self, symbol, now):
+        price = self._price(symbol)
+        return {"symbol": symbol, "last": price, "bid": price - 0.5, "ask": price + 0.5, "timestamp": now}
+
+    async def load_markets(self, reload=False):
+        await self._upstream("load_markets")
+        return {symbol: {"symbol": symbol} for symbol in self.symbols}
+
+    async def fetch_ticker(self, symbol):
+        await self._upstream("fetch_ticker")
+        return self._ticker(symbol, int(time.time() * 1000))
+
+    async def fetch_tickers(self, symbols=None):
+        await self._upstream("fetch_tickers")
+        now = int(time.time() * 1000)
+        return {symbol: self._ticker(symbol, now) for symbol in symbols or self.symbols}
+
+    async def fetch_order_book(self, symbol, limit=None):
+        await self._upstream("fetch_order_book")
+        depth = min(limit or self.payload, self.payload)
+        mid = self._price(symbol)
+        return {
+            "bids": [[mid - 0.5 - i * 0.1, 1.0 + i % 5] for i in range(depth)],
+            "asks": [[mid + 0.5 + i * 0.1, 1.0 + i % 7] for i in range(depth)],
+            "timestamp": int(time.time() * 1000),
+        }
+
+    async def fetch_trades(self, symbol, since=None, limit=None):
+        await self._upstream("fetch_trades")
+        now = int(time.time() * 1000)
+        cap = min(limit or self.payload, self.payload)
+        start = max(since, now - cap * 10) if since else now - cap * 10
+        count = min(cap, max((now - start) // 10, 1))
+        trades = []
+        for i in range(count):
+            self._trade_id += 1
+            trades.append({
+                "id": str(self._trade_id),
+                "timestamp": start + i * 10,
+                "price": self._price(symbol),
+                "amount": 0.1 + (self._trade_id % 13) * 0.05,
+                "side": "buy" if self._trade_id % 2 else "sell",
+            })
+        return trades
+
+    async def fetch_ohlcv(self, symbol, timeframe="1m", since=None, limit=None):
+        await self._upstream("fetch_ohlcv")
+        step = ccxt.Exchange.parse_timeframe(timeframe) * 1000
+        now = int(time.time() * 1000) // step * step
+        count = min(limit or self.payload, self.payload)
+        start = since // step * step if since is not None else now - (count - 1) * step
+        rows = []
+        for ts in range(start, min(now, start + (count - 1) * step) + 1, step):
+            price = self._price(symbol)
+            rows.append([ts, price, price + 1.0, price - 1.0, price + 0.25, 10.0])
+        return rows
+
+    async def close(self):
+        return None
@@ -0,0 +1,300 @@
+"""Load and latency benchmarks against ``server.app`` with in-process fake exchanges.
+
+Examples:
+    python -m benchmarks.run --concurrency 1 10 50 --requests 200 --output bench_results.json
+    python -m benchmarks.run --baseline bench_baseline.json --output bench_results.json
+"""
+import argparse
+import asyncio
+from contextlib import contextmanager
+import json
+import logging
+import platform
+import sys
+import time
+
+import httpx
+import numpy as np
+
+import server
+from analytics.incremental import indicator_states
+from analytics.order_book import order_books
+from analytics.trade_tape import trade_tapes
+from benchmarks.fake_exchange import FakeExchange
+from config import settings
+from services import exchange_client
+from services.cache_service import cache
+from services.exchange_client import ExchangeClient
+from services.markets_service import markets_registry
+from services.rate_limit_service import RateLimiter
+from services.upstream_policy import UpstreamPolicy
+
+VENUES = ("binance", "kraken", "okx")
+EXCHANGE = VENUES[0]
+SCENARIOS = ("hit", "miss", "herd")
+
+
+def _base(symbol):
+    return symbol.split("/")[0]
+
+
+# name -> (HTTP method, path, body builder taking the symbol to request)
+ENDPOINTS = {
+    "ticker": ("POST", "/api/v1/real_time/ticker", lambda s: {"exchange": EXCHANGE, "symbol": s}),
+    "tickers": ("POST", "/api/v1/real_time/tickers",
+                lambda s: {"pairs": [{"exchange": ex, "symbol": s} for ex in VENUES]}),
+    "order_book": ("POST", "/api/v1/real_time/order_book",
+                   lambda s: {"exchange": EXCHANGE, "symbol": s, "limit": 20}),
+    "order_book_metrics": ("POST", "/api/v1/real_time/order_book/metrics",
+                           lambda s: {"exchange": EXCHANGE, "symbol": s, "size": 5.0}),
+    "best_price": ("POST", "/api/v1/real_time/best_price",
+                   lambda s: {"symbol": s, "exchanges": list(VENUES), "deadline": 1.0}),
+    "trades": ("POST", "/api/v1/real_time/trades", lambda s: {"exchange": EXCHANGE, "symbol": s, "limit": 50}),
+    "trade_stats": ("POST", "/api/v1/real_time/trades/stats", lambda s: {"exchange": EXCHANGE, "symbol": s}),
+    "ohlcv": ("POST", "/api/v1/historical/ohlcv", lambda s: {
+        "exchange": EXCHANGE, "symbol": s, "interval": "1m",
+        "start_timestamp": None, "end_timestamp": None, "limit": 100,
+    }),
+    "ohlcv_stream": ("POST", "/api/v1/historical/ohlcv/stream", lambda s: {
+        "exchange": EXCHANGE, "symbol": s, "interval": "1m", "start_timestamp": int(time.time()) // 60 * 60 - 6000,
+    }),
+    "sma": ("POST", "/api/v1/historical/sma",
+            lambda s: {"exchange": EXCHANGE, "symbol": s, "interval": "1m", "period": 14}),
+    "ema": ("POST", "/api/v1/historical/ema",
+            lambda s: {"exchange": EXCHANGE, "symbol": s, "interval": "1m", "period": 14}),
+    "rsi": ("POST", "/api/v1/historical/rsi",
+            lambda s: {"exchange": EXCHANGE, "symbol": s, "interval": "1m", "period": 14}),
+    "indicators": ("POST", "/api/v1/historical/indicators", lambda s: {
+        "exchange": EXCHANGE, "symbol": s, "interval": "1m",
+        "indicators": [{"name": "sma", "period": 20}, {"name": "macd"}, {"name": "bbands"}],
+    }),
+    "exchanges": ("GET", "/api/v1/utils/exchanges", None),
+    "symbols": ("GET", f"/api/v1/utils/symbols/{EXCHANGE}", None),
+    "validate": ("POST", "/api/v1/utils/validate", lambda s: {"exchange": EXCHANGE, "symbol": s}),
+    "status": ("GET", "/api/v1/utils/status", None),
+    "portfolio_value": ("POST", "/api/v1/utils/portfolio_value",
+                        lambda s: {"holdings": {"BTC": 1.0, _base(s): 2.0}, "exchange": EXCHANGE}),
+    "portfolio_batch": ("POST", "/api/v1/utils/portfolio/value", lambda s: {
+        "exchange": EXCHANGE, "portfolios": [{"BTC": i, _base(s): 2.0, "ETH": 1.0} for i in range(100)],
+    }),
+    "portfolio_risk": ("POST", "/api/v1/utils/portfolio/risk", lambda s: {
+        "exchange": EXCHANGE, "portfolios": [{"BTC": 1.0, _base(s): 2.0}], "interval": "1h", "limit": 50,
+    }),
+}
+
+
+def reset_state():
+    """Drop every cache and in-memory series so the next request goes upstream."""
+    cache.clear()
+    markets_registry.invalidate()
+    order_books.clear()
+    trade_tapes.clear()
+    indicator_states.clear()
+
+
+@contextmanager
+def fake_exchanges(**options):
+    """Serve every venue in ``VENUES`` from a ``FakeExchange`` while active.
+
+    Rate limiting is lifted, neither candles nor markets are persisted and
+    the upstream policy starts fresh; everything is restored on exit.
+    """
+    fakes = {ex: FakeExchange(ex, **options) for ex in VENUES}
+
+    async def get_instance(exchange):
+        if exchange not in fakes:
+            raise Exception(f"Exchange '{exchange}' not available in benchmarks")
+        return fakes[exchange]
+
+    saved = (
+        ExchangeClient.__dict__["get_exchange_instance"], server.rate_limiter,
+        settings.CANDLE_STORE_ENABLED, exchange_client.upstream, markets_registry.snapshot_path,
+    )
+    ExchangeClient.get_exchange_instance = staticmethod(get_instance)
+    server.rate_limiter = RateLimiter(rate=1e9, burst=10 ** 9, idle_ttl=300)
+    settings.CANDLE_STORE_ENABLED = False
+    exchange_client.upstream = UpstreamPolicy()
+    markets_registry.snapshot_path = ""
+    reset_state()
+    try:
+        yield fakes
+    finally:
+        (ExchangeClient.get_exchange_instance, server.rate_limiter,
+         settings.CANDLE_STORE_ENABLED, exchange_client.upstream, markets_registry.snapshot_path) = saved
+        reset_state()
+
+
+def summarize(latencies, elapsed, errors, upstream_calls):
+    lat = np.asarray(latencies) * 1000
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "throughput": len(latencies) / elapsed if elapsed else 0.0,
+        "p50_ms": float(np.percentile(lat, 50)) if len(lat) else None,
+        "p95_ms": float(np.percentile(lat, 95)) if len(lat) else None,
+        "p99_ms": float(np.percentile(lat, 99)) if len(lat) else None,
+        "upstream_calls": upstream_calls,
+    }
+
+
+async def _timed(client, endpoint, symbol):
+    method, path, body = ENDPOINTS[endpoint]
+    start = time.perf_counter()
+    response = await client.request(method, path, json=body(symbol) if body else None)
+    await response.aread()
+    return time.perf_counter() - start, response.status_code >= 400
+
+
+async def _drive(client, endpoint, symbols, concurrency):
+    # ``concurrency`` workers pull the next symbol until all are requested
+    latencies, errors = [], 0
+    queue = iter(symbols)
+
+    async def worker():
+        nonlocal errors
+        for symbol in queue:
+            latency, failed = await _timed(client, endpoint, symbol)
+            latencies.append(latency)
+            errors += failed
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return latencies, errors, time.perf_counter() - start
+
+
+async def run_scenario(client, fakes, scenario, endpoint, concurrency, requests):
+    """Run one scenario for one endpoint at one concurrency level.
+
+    * hit: the same symbol every time, after one warm-up request;
+    * miss: a different symbol per request on a cold cache;
+    * herd: rounds of ``concurrency`` identical requests fired at once on
+      a cold cache, measuring how well concurrent misses are collapsed.
+    """
+    reset_state()
+    if scenario == "hit":
+        await _timed(client, endpoint, "BTC/USDT")
+        before = sum(sum(f.calls.values()) for f in fakes.values())
+        latencies, errors, elapsed = await _drive(client, endpoint, ["BTC/USDT"] * requests, concurrency)
+    elif scenario == "miss":
+        before = sum(sum(f.calls.values()) for f in fakes.values())
+        symbols = [f"C{i}/USDT" for i in range(requests)]
+        latencies, errors, elapsed = await _drive(client, endpoint, symbols, concurrency)
+    else:
+        before = sum(sum(f.calls.values()) for f in fakes.values())
+        latencies, errors, elapsed = [], 0, 0.0
+        for round_ in range(max(requests // concurrency, 1)):
+            reset_state()
+            lat, err, el = await _drive(client, endpoint, [f"C{round_}/USDT"] * concurrency, concurrency)
+            latencies += lat
+            errors += err
+            elapsed += el
+    upstream_calls = sum(sum(f.calls.values()) for f in fakes.values()) - before
+    return {
+        "scenario": scenario, "endpoint": endpoint, "concurrency": concurrency,
+        **summarize(latencies, elapsed, errors, upstream_calls),
+    }
+
+
+async def run(scenarios=SCENARIOS, endpoints=None, concurrency=(1, 10, 50), requests=200, **fake_options):
+    """Run the benchmark matrix and return a JSON-serializable result dict."""
+    endpoints = list(endpoints or ENDPOINTS)
+    fake_options.setdefault("symbols", max(requests, 1000))
+    results = []
+    with fake_exchanges(**fake_options) as fakes:
+        transport = httpx.ASGITransport(app=server.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=60) as client:
+            for scenario in scenarios:
+                for endpoint in endpoints:
+                    for level in concurrency:
+                        results.append(await run_scenario(client, fakes, scenario, endpoint, level, requests))
+    return {
+        "meta": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "timestamp": int(time.time()),
+            "requests": requests,
+            "concurrency": list(concurrency),
+            "fake_exchange": fake_options,
+        },
+        "results": results,
+    }
+
+
+def compare(results, baseline, latency_tolerance=0.5, throughput_tolerance=0.33, min_delta_ms=1.0):
+    """Check results against a baseline run.
+
+    A case regresses when its p95 exceeds the baseline p95 by more than
+    ``latency_tolerance`` (as a fraction) and by at least ``min_delta_ms``,
+    when its throughput drops by more than ``throughput_tolerance``, or when
+    it has errors the baseline did not.
+
+    Returns:
+        List of human-readable regression descriptions; empty on pass.
+    """
+    key = lambda r: (r["scenario"], r["endpoint"], r["concurrency"])  # noqa: E731
+    base = {key(r): r for r in baseline["results"]}
+    failures = []
+    for r in results["results"]:
+        b = base.get(key(r))
+        if b is None:
+            continue
+        name = "{}/{}/c={}".format(*key(r))
+        if (r["p95_ms"] is not None and b["p95_ms"] is not None
+                and r["p95_ms"] > b["p95_ms"] * (1 + latency_tolerance)
+                and r["p95_ms"] - b["p95_ms"] >= min_delta_ms):
+            failures.append(f"{name}: p95 {r['p95_ms']:.2f} ms vs baseline {b['p95_ms']:.2f} ms")
+        if r["throughput"] < b["throughput"] * (1 - throughput_tolerance):
+            failures.append(f"{name}: throughput {r['throughput']:.0f}/s vs baseline {b['throughput']:.0f}/s")
+        if r["errors"] > b["errors"]:
+            failures.append(f"{name}: {r['errors']} errors vs baseline {b['errors']}")
+    return failures
+
+
+def _print_table(results):
+    print(f"{'scenario':<6} {'endpoint':<20} {'conc':>4} {'req/s':>9} {'p50 ms':>8} "
+          f"{'p95 ms':>8} {'p99 ms':>8} {'err':>4} {'upstream':>8}")
+    for r in results["results"]:
+        print(f"{r['scenario']:<6} {r['endpoint']:<20} {r['concurrency']:>4} {r['throughput']:>9.0f} "
+              f"{r['p50_ms']:>8.2f} {r['p95_ms']:>8.2f} {r['p99_ms']:>8.2f} {r['errors']:>4} {r['upstream_calls']:>8}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS, default=list(SCENARIOS))
+    parser.add_argument("--endpoints", nargs="+", choices=list(ENDPOINTS), default=None)
+    parser.add_argument("--concurrency", nargs="+", type=int, default=[1, 10, 50])
+    parser.add_argument("--requests", type=int, default=200, help="requests per case")
+    parser.add_argument("--latency", type=float, default=0.005, help="fake upstream latency in seconds")
+    parser.add_argument("--jitter", type=float, default=0.0, help="extra random upstream latency in seconds")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of upstream calls that fail")
+    parser.add_argument("--payload", type=int, default=100, help="levels/trades/candles per upstream response")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", default="bench_results.json")
+    parser.add_argument("--baseline", help="earlier results JSON to compare against")
+    parser.add_argument("--latency-tolerance", type=float, default=0.5)
+    parser.add_argument("--throughput-tolerance", type=float, default=0.33)
+    parser.add_argument("--log", action="store_true", help="keep per-request server logging on")
+    args = parser.parse_args(argv)
+
+    if not args.log:
+        logging.disable(logging.WARNING)
+    results = asyncio.run(run(
+        args.scenarios, args.endpoints, args.concurrency, args.requests,
+        latency=args.latency, jitter=args.jitter, error_rate=args.error_rate,
+        payload=args.payload, seed=args.seed,
+    ))
+    with open(args.output, "w") as f:
+        json.dump(results, f, indent=2)
+    _print_table(results)
+    if args.baseline:
+        with open(args.baseline) as f:
+            failures = compare(results, json.load(f), args.latency_tolerance, args.throughput_tolerance)
+        for failure in failures:
+            print(f"REGRESSION {failure}")
+        print("FAIL" if failures else "PASS")
+        return 1 if failures else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
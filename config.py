@@ -16,9 +16,66 @@ except Exception:
 class Settings(BaseSettings):
     HOST: str = "0.0.0.0"
     PORT: int = 8000
-    CACHE_TTL: int = 20  # seconds
+    CACHE_TTL: int = 20  # seconds, ticker/orderbook/trades namespaces
+    CACHE_OHLCV_TTL: int = 60  # seconds
+    CACHE_SYMBOLS_TTL: int = 300  # seconds
+    CACHE_MAX_ENTRIES: int = 10000
+    CACHE_MAX_BYTES: int = 64 * 1024 * 1024  # approximate memory cap
+    CACHE_SWEEP_INTERVAL: float = 30.0  # seconds between expired-entry sweeps
+    CACHE_REFRESH_WINDOW: float = 0.2  # refresh hot keys in the last 20% of their TTL
+    CACHE_REFRESH_MIN_HITS: int = 3  # reads per TTL before a key counts as hot
+    CACHE_MAX_STALE: float = 5.0  # seconds a hot key may be served past expiry while refreshing
+    SHARED_CACHE_BACKEND: str = ""  # second cache tier shared by workers: "", "mmap" (one host) or "redis"
+    SHARED_CACHE_NAMESPACES: str = "ticker,orderbook,ohlcv,symbols"  # key namespaces written to the shared tier
+    SHARED_CACHE_PATH: str = "data/shared_cache.bin"  # mmap backend file
+    SHARED_CACHE_SLOTS: int = 1024  # mmap backend slots
+    SHARED_CACHE_SLOT_SIZE: int = 65536  # bytes per mmap slot; larger values are not shared
+    SHARED_CACHE_URL: str = "redis://localhost:6379/0"  # redis backend server
+    SHARED_CACHE_LEASE_TTL: float = 2.0  # seconds one worker may hold a key's fetch lease
+    SHARED_CACHE_POLL_INTERVAL: float = 0.02  # seconds between shared-tier polls while another worker fetches
     LOG_LEVEL: str = "INFO"
+    METRICS_LOOP_LAG_INTERVAL: float = 0.5  # seconds between event-loop lag probes
     MCP_SERVER_STATUS: str = "OK"
-    RATE_LIMIT_INTERVAL: float = 1.0  # seconds between requests
+    RATE_LIMIT_RATE: float = 10.0  # tokens refilled per second per client/route
+    RATE_LIMIT_BURST: int = 20  # bucket capacity per client/route
+    RATE_LIMIT_IDLE_TTL: float = 300.0  # seconds before an idle bucket is evicted
+    MARKETS_TTL: int = 300  # seconds before exchange markets are refreshed
+    MARKETS_SNAPSHOT_PATH: str = "data/markets_snapshot.json"  # markets restored at boot; "" disables
+    EXCHANGE_WARMUP: str = ""  # comma-separated exchanges to load at startup
+    EXCHANGE_SYNC_EXCHANGES: str = ""  # comma-separated exchanges run via sync ccxt on a thread pool
+    EXCHANGE_THREAD_POOL_SIZE: int = 8
+    EXCHANGE_POOL_LIMIT: int = 100  # max open upstream connections
+    EXCHANGE_POOL_LIMIT_PER_HOST: int = 20
+    EXCHANGE_POOL_KEEPALIVE: float = 30.0  # seconds an idle connection is kept open
+    UPSTREAM_MAX_ATTEMPTS: int = 3  # tries per upstream call, including the first
+    UPSTREAM_BACKOFF_BASE: float = 0.2  # seconds; full-jitter backoff doubles per retry
+    UPSTREAM_BACKOFF_MAX: float = 2.0  # cap on a single backoff delay
+    UPSTREAM_HEDGE_ENABLED: bool = True  # duplicate calls slower than the rolling p95
+    UPSTREAM_HEDGE_MIN_SAMPLES: int = 20  # latency samples before hedging kicks in
+    UPSTREAM_HEDGE_MIN_DELAY: float = 0.05  # never hedge earlier than this many seconds
+    UPSTREAM_LATENCY_WINDOW: int = 200  # latency samples kept per exchange and method
+    UPSTREAM_BREAKER_THRESHOLD: int = 5  # consecutive transient failures before a circuit opens
+    UPSTREAM_BREAKER_COOLDOWN: float = 30.0  # seconds before an open circuit lets a probe through
+    STREAM_POLL_INTERVAL: float = 1.0  # seconds between upstream polls per streamed pair
+    STREAM_QUEUE_SIZE: int = 100  # pending updates per websocket client before dropping oldest
+    CANDLE_STORE_ENABLED: bool = True  # serve fixed OHLCV ranges from the local candle store
+    CANDLE_STORE_DIR: str = "data/candles"
+    MARKET_DATA_MODE: str = "live"  # live, record (save upstream responses) or replay (serve recordings)
+    MARKET_DATA_DIR: str = "data/recordings"
+    REPLAY_SPEED: float = 1.0  # replay clock multiplier; 0 serves recorded snapshots as fast as possible
+    REPLAY_START: int = 0  # replay start (ms since epoch); 0 starts where the recording started
+    OHLCV_PAGE_LIMIT: int = 1000  # candles requested per upstream fetch_ohlcv call
+    OHLCV_PAGE_CONCURRENCY: int = 4  # OHLCV pages fetched ahead concurrently
+    INDICATOR_STATE_MAX_SERIES: int = 10000  # incremental indicator series kept in memory
+    INDICATOR_STATE_HISTORY: int = 1000  # committed values kept per series
+    BATCH_TICKER_CONCURRENCY: int = 10  # parallel fetch_ticker calls per exchange in batch requests
+    ORDER_BOOK_MAX_BOOKS: int = 1000  # local order books kept in memory
+    AGGREGATE_DEADLINE: float = 1.0  # seconds to wait for venues in cross-exchange quotes
+    AGGREGATE_DEPTH: int = 5  # order book levels requested per venue
+    TRADE_TAPE_CAPACITY: int = 5000  # most recent trades kept per symbol
+    TRADE_TAPE_MAX_SYMBOLS: int = 100  # trade tapes kept in memory
+    TRADE_PAGE_LIMIT: int = 1000  # trades requested per incremental fetch_trades call
+    TRADE_MAX_PAGES: int = 5  # pages fetched per sync before waiting for the next one
+    TRADE_LARGE_MULTIPLE: float = 10.0  # default large trade: this multiple of the median amount
 
 settings = Settings()
@@ -1,20 +1,43 @@
 from pydantic import BaseModel, Field
-from typing import Optional
+from typing import Dict, List, Literal, Optional
 
 class TickerRequest(BaseModel):
     exchange: str = Field(..., description="Exchange name (e.g., binance)")
     symbol: str = Field(..., description="Symbol in exchange format (e.g., BTC/USDT)")
 
+class BatchTickerRequest(BaseModel):
+    pairs: List[TickerRequest] = Field(..., description="Exchange/symbol pairs to quote")
+
 class OrderBookRequest(BaseModel):
     exchange: str
     symbol: str
     limit: Optional[int] = 20
 
+class OrderBookMetricsRequest(BaseModel):
+    exchange: str
+    symbol: str
+    limit: Optional[int] = 100
+    size: Optional[float] = Field(None, gt=0, description="Order size in base units for slippage estimates")
+    tick_size: Optional[float] = Field(None, gt=0, description="Bucket price levels to this tick")
+    depth: Optional[int] = Field(None, gt=0, description="Number of (bucketed) levels per side to use")
+
+class BestPriceRequest(BaseModel):
+    symbol: str
+    exchanges: List[str] = Field(..., min_length=1, description="Exchanges to quote concurrently")
+    deadline: Optional[float] = Field(None, gt=0, description="Seconds to wait before answering")
+    depth: Optional[int] = Field(None, gt=0, description="Order book levels per venue")
+
 class TradeHistoryRequest(BaseModel):
     exchange: str
     symbol: str
     limit: Optional[int] = 20
 
+class TradeStatsRequest(BaseModel):
+    exchange: str
+    symbol: str
+    windows: List[int] = Field([60, 300, 3600], description="Rolling windows in seconds")
+    large_size: Optional[float] = Field(None, gt=0, description="Amount at or above which a trade is large")
+
 class OHLCVRequest(BaseModel):
     exchange: str
     symbol: str
@@ -23,6 +46,23 @@ class OHLCVRequest(BaseModel):
     end_timestamp: Optional[int]
     limit: Optional[int] = 100
 
+class OHLCVStreamRequest(BaseModel):
+    exchange: str
+    symbol: str
+    interval: str
+    start_timestamp: int
+    end_timestamp: Optional[int] = None
+    format: Literal["ndjson", "json"] = "ndjson"
+
+class PortfolioBatchRequest(BaseModel):
+    exchange: str
+    quote: str = "USDT"
+    portfolios: List[Dict[str, float]] = Field(..., description="Holdings per portfolio, keyed by asset")
+
+class PortfolioRiskRequest(PortfolioBatchRequest):
+    interval: str = "1d"
+    limit: Optional[int] = 100
+
 class ValidationRequest(BaseModel):
     exchange: str
     symbol: str
\ No newline at end of file
@@ -7,6 +7,33 @@ class TickerResponse(BaseModel):
     price: float
     timestamp: int
 
+class BatchTickerError(BaseModel):
+    exchange: str
+    symbol: str
+    detail: str
+
+class BatchTickerResponse(BaseModel):
+    tickers: List[TickerResponse]
+    errors: List[BatchTickerError]
+
+class PortfolioBatchResponse(BaseModel):
+    exchange: str
+    quote: str
+    values: List[float]
+    prices: Dict[str, float]
+    errors: List[BatchTickerError]
+
+class PortfolioRiskResponse(BaseModel):
+    exchange: str
+    quote: str
+    interval: str
+    assets: List[str]
+    timestamps: List[int]
+    values: List[List[Optional[float]]]
+    volatility: List[Optional[float]]
+    max_drawdown: List[Optional[float]]
+    correlation: List[List[Optional[float]]]
+
 class OrderBookResponse(BaseModel):
     exchange: str
     symbol: str
@@ -14,6 +41,53 @@ class OrderBookResponse(BaseModel):
     asks: List[List[float]]
     timestamp: int
 
+class OrderBookFill(BaseModel):
+    filled: float
+    vwap: float
+    worst_price: float
+    slippage_bps: float
+
+class OrderBookMetricsResponse(BaseModel):
+    exchange: str
+    symbol: str
+    timestamp: int
+    best_bid: float
+    best_ask: float
+    mid: float
+    spread: float
+    spread_bps: float
+    imbalance: float
+    bid_depth: List[List[float]]
+    ask_depth: List[List[float]]
+    buy: Optional[OrderBookFill] = None
+    sell: Optional[OrderBookFill] = None
+
+class VenueQuote(BaseModel):
+    exchange: str
+    bid: Optional[float]
+    bid_amount: Optional[float]
+    ask: Optional[float]
+    ask_amount: Optional[float]
+    timestamp: int
+
+class VenueLevel(BaseModel):
+    exchange: str
+    price: float
+    amount: float
+
+class BestPriceResponse(BaseModel):
+    symbol: str
+    venues: List[VenueQuote]
+    best_bid: Optional[VenueLevel]
+    best_ask: Optional[VenueLevel]
+    spread: Optional[float]
+    spread_bps: Optional[float]
+    crossed: bool
+    bids: List[VenueLevel]
+    asks: List[VenueLevel]
+    late: List[str]
+    errors: List[BatchTickerError]
+
 class TradeItem(BaseModel):
     price: float
     amount: float
@@ -26,6 +100,20 @@ class TradeHistoryResponse(BaseModel):
     symbol: str
     trades: List[TradeItem]
 
+class TradeWindowStats(BaseModel):
+    window: int
+    count: int
+    volume: float
+    buy_volume: float
+    sell_volume: float
+    vwap: Optional[float]
+    large_trades: List[TradeItem]
+
+class TradeStatsResponse(BaseModel):
+    exchange: str
+    symbol: str
+    windows: List[TradeWindowStats]
+
 class OHLCVItem(BaseModel):
     timestamp: int
     open: float
@@ -52,4 +140,9 @@ class ValidationResponse(BaseModel):
     detail: str
 
 class ServerStatusResponse(BaseModel):
-    status: str
\ No newline at end of file
+    status: str
+
+class StartupReportResponse(BaseModel):
+    ready_seconds: Optional[float] = None  # None until the app has finished booting
+    phases: Dict[str, float]  # seconds per boot phase
+    background: Dict[str, float]  # seconds per post-boot background step
@@ -1,8 +1,129 @@
+import asyncio
+import logging
 
-# placeholder websocket structure
-async def stream_prices(callback):
-    # pseudo-stream
-    import asyncio, random
-    while True:
-        await asyncio.sleep(1)
-        await callback({"BTC":random.random()*100000})
+from config import settings
+
+logger = logging.getLogger("websocket_handler")
+
+
+async def _fetch_price(exchange: str, symbol: str):
+    from services.exchange_client import ExchangeClient
+
+    # Bypass the ticker cache: its TTL is much longer than the poll interval
+    ticker = await ExchangeClient._fetch_ticker_price(exchange, symbol)
+    return ticker["price"]
+
+
+class Subscriber:
+    """Bounded outbox for one streaming client.
+
+    When the queue is full the oldest update is dropped, so a slow consumer
+    only loses its own stale prices and never blocks the pollers.
+    """
+
+    def __init__(self, maxsize=None):
+        self.queue = asyncio.Queue(maxsize=settings.STREAM_QUEUE_SIZE if maxsize is None else maxsize)
+        self.pairs = set()
+        self.dropped = 0
+
+    def push(self, update):
+        if self.queue.full():
+            self.queue.get_nowait()
+            self.dropped += 1
+        self.queue.put_nowait(update)
+
+    async def next_batch(self):
+        """Wait for at least one update and return all pending ones merged.
+
+        Returns:
+            Dict mapping "exchange:symbol" to the latest price.
+        """
+        key, price = await self.queue.get()
+        prices = {key: price}
+        while not self.queue.empty():
+            key, price = self.queue.get_nowait()
+            prices[key] = price
+        return prices
+
+
+class PriceHub:
+    """Fan out prices from one shared poller per exchange/symbol pair.
+
+    Pollers start when a pair gets its first subscriber and are cancelled
+    when its last subscriber leaves, so upstream load depends on the number
+    of distinct pairs, not on the number of connected sockets. The last
+    price of each pair is kept so a client joining a polled pair gets it
+    right away instead of waiting for the price to change.
+    """
+
+    def __init__(self, fetch=None, interval=None):
+        self._fetch = fetch or _fetch_price
+        self.interval = settings.STREAM_POLL_INTERVAL if interval is None else interval
+        self._subscribers = {}
+        self._pollers = {}
+        self._last = {}
+
+    def subscribe(self, subscriber: Subscriber, pairs):
+        """Subscribe to (exchange, symbol) pairs, starting pollers as needed."""
+        for pair in pairs:
+            subscriber.pairs.add(pair)
+            self._subscribers.setdefault(pair, set()).add(subscriber)
+            if pair not in self._pollers:
+                self._pollers[pair] = asyncio.ensure_future(self._poll(pair))
+            elif pair in self._last:
+                subscriber.push((f"{pair[0]}:{pair[1]}", self._last[pair]))
+
+    def unsubscribe(self, subscriber: Subscriber, pairs=None):
+        """Drop some or all of a subscriber's pairs, stopping idle pollers."""
+        for pair in list(subscriber.pairs if pairs is None else pairs):
+            subscriber.pairs.discard(pair)
+            subs = self._subscribers.get(pair)
+            if subs is None:
+                continue
+            subs.discard(subscriber)
+            if not subs:
+                del self._subscribers[pair]
+                self._last.pop(pair, None)
+                poller = self._pollers.pop(pair, None)
+                if poller is not None:
+                    poller.cancel()
+
+    def publish(self, pair, price):
+        """Push a price update to every subscriber of ``pair``."""
+        self._last[pair] = price
+        update = (f"{pair[0]}:{pair[1]}", price)
+        for subscriber in self._subscribers.get(pair, ()):
+            subscriber.push(update)
+
+    def stats(self):
+        """Return the number of active pairs and subscriptions."""
+        return {
+            "pairs": len(self._pollers),
+            "subscriptions": sum(len(s) for s in self._subscribers.values()),
+        }
+
+    async def close(self):
+        """Cancel every poller and forget all subscriptions."""
+        pollers = list(self._pollers.values())
+        self._pollers.clear()
+        self._subscribers.clear()
+        self._last.clear()
+        for poller in pollers:
+            poller.cancel()
+        await asyncio.gather(*pollers, return_exceptions=True)
+
+    async def _poll(self, pair):
+        exchange, symbol = pair
+        while True:
+            try:
+                price = await self._fetch(exchange, symbol)
+                if pair not in self._last or price != self._last[pair]:
+                    self.publish(pair, price)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Stream poll for {exchange}:{symbol} failed: {e}")
+            await asyncio.sleep(self.interval)
+
+
+price_hub = PriceHub()
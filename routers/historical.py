@@ -1,9 +1,19 @@
-from fastapi import APIRouter, HTTPException
-from models.request_models import OHLCVRequest
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import Response, StreamingResponse
+from models.request_models import OHLCVRequest, OHLCVStreamRequest
 from models.response_models import OHLCVResponse
 from services.exchange_client import ExchangeClient
-from analytics.indicators import sma, ema
+from services.format_service import JSON, negotiate, encode_columns, encode_model, ohlcv_columns
+from services.http_cache import conditional_response, query_model, track_expiry
+from analytics.indicators import compute_indicators
+from analytics.incremental import indicator_states
 from pydantic import BaseModel
+from typing import Literal, Optional
+import json
+import logging
+import numpy as np
+
+logger = logging.getLogger("historical")
 
 class IndicatorRequest(BaseModel):
     exchange: str
@@ -19,12 +29,61 @@ class IndicatorResponse(BaseModel):
     period: int
     values: list[float]
 
+class IndicatorSpec(BaseModel):
+    name: Literal["sma", "ema", "rsi", "macd", "bbands", "atr", "vwap"]
+    period: Optional[int] = None
+    fast: Optional[int] = None
+    slow: Optional[int] = None
+    signal: Optional[int] = None
+    std: Optional[float] = None
+
+class MultiIndicatorRequest(BaseModel):
+    exchange: str
+    symbol: str
+    interval: str
+    indicators: list[IndicatorSpec]
+    limit: int = 100
+    start_timestamp: Optional[int] = None
+    end_timestamp: Optional[int] = None
+
+class MultiIndicatorResponse(BaseModel):
+    exchange: str
+    symbol: str
+    interval: str
+    timestamps: list[int]
+    indicators: dict[str, dict[str, list[Optional[float]]]]
+
 router = APIRouter()
 
-@router.post("/ohlcv", response_model=OHLCVResponse)
-async def get_ohlcv(request: OHLCVRequest):
+def _media_type(http_request: Request, fmt: Optional[str]):
     try:
-        data = await ExchangeClient.get_ohlcv(
+        return negotiate(http_request.headers.get("accept"), fmt)
+    except ValueError as e:
+        raise HTTPException(status_code=406, detail=str(e))
+
+def _finite(values):
+    return values[~np.isnan(values)].tolist()
+
+def _incremental(request: IndicatorRequest, indicator: str, candles):
+    arrays = ohlcv_columns(candles)
+    return indicator_states.values(
+        (request.exchange, request.symbol, request.interval),
+        indicator,
+        request.period,
+        arrays['timestamp'],
+        arrays['close'],
+    )
+
+def _nullable(values):
+    return [None if v != v else v for v in values.tolist()]
+
+_encode_ohlcv = encode_model(OHLCVResponse)
+_encode_indicator = encode_model(IndicatorResponse)
+_encode_indicators = encode_model(MultiIndicatorResponse)
+
+async def _ohlcv_body(request: OHLCVRequest, media_type: str) -> bytes:
+    if media_type != JSON:
+        candles = await ExchangeClient.get_ohlcv_candles(
             request.exchange,
             request.symbol,
             request.interval,
@@ -32,52 +91,254 @@ async def get_ohlcv(request: OHLCVRequest):
             request.end_timestamp,
             request.limit,
         )
-        return OHLCVResponse(**data)
+        meta = {"exchange": request.exchange, "symbol": request.symbol, "interval": request.interval}
+        return encode_columns(meta, ohlcv_columns(candles), media_type)
+    return await ExchangeClient.get_ohlcv(
+        request.exchange,
+        request.symbol,
+        request.interval,
+        request.start_timestamp,
+        request.end_timestamp,
+        request.limit,
+        encode=_encode_ohlcv,
+    )
+
+@router.post("/ohlcv", response_model=OHLCVResponse)
+async def get_ohlcv(
+    request: OHLCVRequest,
+    http_request: Request,
+    fmt: Optional[str] = Query(None, alias="format"),
+):
+    """Return candles as row JSON, or columnar JSON/MessagePack/Arrow on request."""
+    media_type = _media_type(http_request, fmt)
+    try:
+        return Response(content=await _ohlcv_body(request, media_type), media_type=media_type)
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
-@router.post("/sma", response_model=IndicatorResponse)
-async def get_sma(request: IndicatorRequest):
+@router.get("/ohlcv", response_model=OHLCVResponse, dependencies=[Depends(track_expiry)])
+async def read_ohlcv(
+    http_request: Request,
+    exchange: str,
+    symbol: str,
+    interval: str,
+    start_timestamp: Optional[int] = None,
+    end_timestamp: Optional[int] = None,
+    limit: int = 100,
+    fmt: Optional[str] = Query(None, alias="format"),
+):
+    """HTTP-cacheable variant of ``POST /ohlcv`` with ETag and Cache-Control."""
+    media_type = _media_type(http_request, fmt)
+    request = query_model(
+        OHLCVRequest,
+        exchange=exchange,
+        symbol=symbol,
+        interval=interval,
+        start_timestamp=start_timestamp,
+        end_timestamp=end_timestamp,
+        limit=limit,
+    )
+    try:
+        body = await _ohlcv_body(request, media_type)
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return conditional_response(http_request, body, "ohlcv", media_type, vary="Accept")
+
+def _candle_json(item):
+    # Missing ccxt prices are NaN in candle arrays; JSON has no NaN, so send null
+    return json.dumps({key: None if v != v else v for key, v in item.items()}, allow_nan=False)
+
+async def _ndjson_lines(pages):
     try:
-        # Fetch OHLCV data first
-        ohlcv_data = await ExchangeClient.get_ohlcv(
+        async for items in pages:
+            if items:
+                yield "".join(_candle_json(item) + "\n" for item in items)
+    except Exception as e:
+        logger.error(f"OHLCV stream failed: {e}")
+        yield json.dumps({"error": str(e)}) + "\n"
+
+async def _json_chunks(request: OHLCVStreamRequest, pages):
+    header = {"exchange": request.exchange, "symbol": request.symbol, "interval": request.interval}
+    yield json.dumps(header)[:-1] + ', "ohlcv": ['
+    first = True
+    try:
+        async for items in pages:
+            if items:
+                yield ("" if first else ",") + ",".join(_candle_json(item) for item in items)
+                first = False
+    except Exception as e:
+        # The status line is already sent; a truncated document signals the failure
+        logger.error(f"OHLCV stream failed: {e}")
+        return
+    yield "]}"
+
+@router.post("/ohlcv/stream")
+async def stream_ohlcv(request: OHLCVStreamRequest):
+    """Stream a long OHLCV range page by page as NDJSON or a chunked JSON document."""
+    try:
+        pages = await ExchangeClient.stream_ohlcv(
             request.exchange,
             request.symbol,
             request.interval,
-            limit=request.limit,
-        )
-        import pandas as pd
-        df = pd.DataFrame(ohlcv_data['ohlcv'])
-        sma_values = sma(df, request.period).dropna().tolist()
-        return IndicatorResponse(
-            exchange=request.exchange,
-            symbol=request.symbol,
-            interval=request.interval,
-            period=request.period,
-            values=sma_values
+            request.start_timestamp,
+            request.end_timestamp,
         )
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
+    if request.format == "json":
+        return StreamingResponse(_json_chunks(request, pages), media_type="application/json")
+    return StreamingResponse(_ndjson_lines(pages), media_type="application/x-ndjson")
+
+async def _indicator_data(request: IndicatorRequest, indicator: str):
+    candles = await ExchangeClient.get_ohlcv_candles(
+        request.exchange,
+        request.symbol,
+        request.interval,
+        limit=request.limit,
+    )
+    return {
+        "exchange": request.exchange,
+        "symbol": request.symbol,
+        "interval": request.interval,
+        "period": request.period,
+        "values": _finite(_incremental(request, indicator, candles)),
+    }
+
+async def _read_indicator(http_request: Request, indicator: str, **params):
+    request = query_model(IndicatorRequest, **params)
+    try:
+        data = await _indicator_data(request, indicator)
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return conditional_response(http_request, _encode_indicator(data), "ohlcv")
+
+@router.post("/sma", response_model=IndicatorResponse)
+async def get_sma(request: IndicatorRequest):
+    try:
+        return IndicatorResponse(**await _indicator_data(request, 'sma'))
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.get("/sma", response_model=IndicatorResponse, dependencies=[Depends(track_expiry)])
+async def read_sma(
+    http_request: Request, exchange: str, symbol: str, interval: str, period: int = 14, limit: int = 100
+):
+    """HTTP-cacheable variant of ``POST /sma``."""
+    return await _read_indicator(
+        http_request, 'sma', exchange=exchange, symbol=symbol, interval=interval, period=period, limit=limit
+    )
 
 @router.post("/ema", response_model=IndicatorResponse)
 async def get_ema(request: IndicatorRequest):
     try:
-        # Fetch OHLCV data first
-        ohlcv_data = await ExchangeClient.get_ohlcv(
-            request.exchange,
-            request.symbol,
-            request.interval,
-            limit=request.limit,
-        )
-        import pandas as pd
-        df = pd.DataFrame(ohlcv_data['ohlcv'])
-        ema_values = ema(df, request.period).dropna().tolist()
-        return IndicatorResponse(
-            exchange=request.exchange,
-            symbol=request.symbol,
-            interval=request.interval,
-            period=request.period,
-            values=ema_values
-        )
+        return IndicatorResponse(**await _indicator_data(request, 'ema'))
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.get("/ema", response_model=IndicatorResponse, dependencies=[Depends(track_expiry)])
+async def read_ema(
+    http_request: Request, exchange: str, symbol: str, interval: str, period: int = 14, limit: int = 100
+):
+    """HTTP-cacheable variant of ``POST /ema``."""
+    return await _read_indicator(
+        http_request, 'ema', exchange=exchange, symbol=symbol, interval=interval, period=period, limit=limit
+    )
+
+@router.post("/rsi", response_model=IndicatorResponse)
+async def get_rsi(request: IndicatorRequest):
+    try:
+        return IndicatorResponse(**await _indicator_data(request, 'rsi'))
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.get("/rsi", response_model=IndicatorResponse, dependencies=[Depends(track_expiry)])
+async def read_rsi(
+    http_request: Request, exchange: str, symbol: str, interval: str, period: int = 14, limit: int = 100
+):
+    """HTTP-cacheable variant of ``POST /rsi``."""
+    return await _read_indicator(
+        http_request, 'rsi', exchange=exchange, symbol=symbol, interval=interval, period=period, limit=limit
+    )
+
+async def _indicators_body(request: MultiIndicatorRequest, media_type: str) -> bytes:
+    candles = await ExchangeClient.get_ohlcv_candles(
+        request.exchange,
+        request.symbol,
+        request.interval,
+        request.start_timestamp,
+        request.end_timestamp,
+        request.limit,
+    )
+    arrays = ohlcv_columns(candles)
+    results = compute_indicators(
+        arrays, [spec.model_dump(exclude_none=True) for spec in request.indicators]
+    )
+    if media_type != JSON:
+        meta = {"exchange": request.exchange, "symbol": request.symbol, "interval": request.interval}
+        columns = {"timestamp": arrays['timestamp']}
+        for key, outputs in results.items():
+            for name, values in outputs.items():
+                columns[f"{key}.{name}"] = values
+        return encode_columns(meta, columns, media_type)
+    return _encode_indicators({
+        "exchange": request.exchange,
+        "symbol": request.symbol,
+        "interval": request.interval,
+        "timestamps": arrays['timestamp'].tolist(),
+        "indicators": {
+            key: {name: _nullable(values) for name, values in outputs.items()}
+            for key, outputs in results.items()
+        },
+    })
+
+@router.post("/indicators", response_model=MultiIndicatorResponse)
+async def get_indicators(
+    request: MultiIndicatorRequest,
+    http_request: Request,
+    fmt: Optional[str] = Query(None, alias="format"),
+):
+    """Compute any set of indicators from a single OHLCV fetch."""
+    media_type = _media_type(http_request, fmt)
+    try:
+        return Response(content=await _indicators_body(request, media_type), media_type=media_type)
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+def _indicator_spec(text: str):
+    # "macd:fast=8,slow=21" -> {"name": "macd", "fast": "8", "slow": "21"}
+    name, _, params = text.partition(":")
+    spec = {"name": name}
+    for item in filter(None, params.split(",")):
+        key, _, value = item.partition("=")
+        spec[key] = value
+    return spec
+
+@router.get("/indicators", response_model=MultiIndicatorResponse, dependencies=[Depends(track_expiry)])
+async def read_indicators(
+    http_request: Request,
+    exchange: str,
+    symbol: str,
+    interval: str,
+    indicators: list[str] = Query(..., description="Repeated specs such as sma:period=20 or macd:fast=8,slow=21"),
+    limit: int = 100,
+    start_timestamp: Optional[int] = None,
+    end_timestamp: Optional[int] = None,
+    fmt: Optional[str] = Query(None, alias="format"),
+):
+    """HTTP-cacheable variant of ``POST /indicators``."""
+    media_type = _media_type(http_request, fmt)
+    request = query_model(
+        MultiIndicatorRequest,
+        exchange=exchange,
+        symbol=symbol,
+        interval=interval,
+        indicators=[_indicator_spec(spec) for spec in indicators],
+        limit=limit,
+        start_timestamp=start_timestamp,
+        end_timestamp=end_timestamp,
+    )
+    try:
+        body = await _indicators_body(request, media_type)
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
+    return conditional_response(http_request, body, "ohlcv", media_type, vary="Accept")
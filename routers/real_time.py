@@ -1,50 +1,260 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import Response
 from models.request_models import (
-    TickerRequest, OrderBookRequest, TradeHistoryRequest
+    TickerRequest, BatchTickerRequest, OrderBookRequest, OrderBookMetricsRequest, TradeHistoryRequest,
+    TradeStatsRequest, BestPriceRequest
 )
 from models.response_models import (
-    TickerResponse, OrderBookResponse, TradeHistoryResponse
+    TickerResponse, BatchTickerResponse, OrderBookResponse, OrderBookMetricsResponse, TradeHistoryResponse,
+    TradeStatsResponse, BestPriceResponse
 )
 from services.exchange_client import ExchangeClient
-from realtime.websocket_handler import stream_prices
+from services.format_service import JSON, encode_model
+from services.http_cache import conditional_response, query_model, track_expiry
+from services.validation_service import validate_exchange, validate_symbol
+from realtime.websocket_handler import Subscriber, price_hub
 from pydantic import BaseModel
-from fastapi import WebSocket
+from fastapi import WebSocket, WebSocketDisconnect
+from typing import Literal, Optional
+import asyncio
 
 class StreamResponse(BaseModel):
     prices: dict[str, float]
 
+class StreamSubscription(BaseModel):
+    action: Literal["subscribe", "unsubscribe"]
+    pairs: list[TickerRequest]
+
 router = APIRouter()
 
+# Cached responses are served as pre-serialized bytes; the models still define the schema
+_encode_ticker = encode_model(TickerResponse)
+_encode_order_book = encode_model(OrderBookResponse)
+_encode_trades = encode_model(TradeHistoryResponse)
+_encode_batch = encode_model(BatchTickerResponse)
+_encode_metrics = encode_model(OrderBookMetricsResponse)
+_encode_best_price = encode_model(BestPriceResponse)
+_encode_trade_stats = encode_model(TradeStatsResponse)
+
+def _pair(text: str):
+    exchange, _, symbol = text.partition(":")
+    return {"exchange": exchange, "symbol": symbol}
+
 @router.post("/ticker", response_model=TickerResponse)
 async def get_ticker_price(request: TickerRequest):
     try:
-        data = await ExchangeClient.get_ticker_price(request.exchange, request.symbol)
-        return TickerResponse(**data)
+        body = await ExchangeClient.get_ticker_price(request.exchange, request.symbol, encode=_encode_ticker)
+        return Response(content=body, media_type=JSON)
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.get("/ticker", response_model=TickerResponse, dependencies=[Depends(track_expiry)])
+async def read_ticker_price(http_request: Request, exchange: str, symbol: str):
+    """HTTP-cacheable variant of ``POST /ticker`` with ETag and Cache-Control."""
+    try:
+        body = await ExchangeClient.get_ticker_price(exchange, symbol, encode=_encode_ticker)
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
+    return conditional_response(http_request, body, "ticker")
+
+@router.post("/tickers", response_model=BatchTickerResponse)
+async def get_ticker_prices(request: BatchTickerRequest):
+    try:
+        tickers, errors = await ExchangeClient.get_tickers(
+            [(pair.exchange, pair.symbol) for pair in request.pairs]
+        )
+        return BatchTickerResponse(tickers=tickers, errors=errors)
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.get("/tickers", response_model=BatchTickerResponse, dependencies=[Depends(track_expiry)])
+async def read_ticker_prices(
+    http_request: Request,
+    pairs: list[str] = Query(..., description="Repeated exchange:symbol pairs, e.g. binance:BTC/USDT"),
+):
+    """HTTP-cacheable variant of ``POST /tickers``."""
+    request = query_model(BatchTickerRequest, pairs=[_pair(pair) for pair in pairs])
+    try:
+        tickers, errors = await ExchangeClient.get_tickers(
+            [(pair.exchange, pair.symbol) for pair in request.pairs]
+        )
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return conditional_response(http_request, _encode_batch({"tickers": tickers, "errors": errors}), "ticker")
 
 @router.post("/order_book", response_model=OrderBookResponse)
 async def get_order_book(request: OrderBookRequest):
     try:
-        data = await ExchangeClient.get_order_book(request.exchange, request.symbol, request.limit)
-        return OrderBookResponse(**data)
+        body = await ExchangeClient.get_order_book(
+            request.exchange, request.symbol, request.limit, encode=_encode_order_book
+        )
+        return Response(content=body, media_type=JSON)
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.get("/order_book", response_model=OrderBookResponse, dependencies=[Depends(track_expiry)])
+async def read_order_book(http_request: Request, exchange: str, symbol: str, limit: int = 20):
+    """HTTP-cacheable variant of ``POST /order_book``."""
+    try:
+        body = await ExchangeClient.get_order_book(exchange, symbol, limit, encode=_encode_order_book)
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return conditional_response(http_request, body, "orderbook")
+
+@router.post("/order_book/metrics", response_model=OrderBookMetricsResponse)
+async def get_order_book_metrics(request: OrderBookMetricsRequest):
+    try:
+        data = await ExchangeClient.get_order_book_metrics(
+            request.exchange, request.symbol, request.limit, request.size, request.tick_size, request.depth
+        )
+        return OrderBookMetricsResponse(**data)
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.get("/order_book/metrics", response_model=OrderBookMetricsResponse, dependencies=[Depends(track_expiry)])
+async def read_order_book_metrics(
+    http_request: Request,
+    exchange: str,
+    symbol: str,
+    limit: int = 100,
+    size: Optional[float] = None,
+    tick_size: Optional[float] = None,
+    depth: Optional[int] = None,
+):
+    """HTTP-cacheable variant of ``POST /order_book/metrics``."""
+    request = query_model(
+        OrderBookMetricsRequest, exchange=exchange, symbol=symbol, limit=limit, size=size, tick_size=tick_size,
+        depth=depth,
+    )
+    try:
+        data = await ExchangeClient.get_order_book_metrics(
+            request.exchange, request.symbol, request.limit, request.size, request.tick_size, request.depth
+        )
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
+    return conditional_response(http_request, _encode_metrics(data), "orderbook")
+
+@router.post("/best_price", response_model=BestPriceResponse)
+async def get_best_price(request: BestPriceRequest):
+    try:
+        data = await ExchangeClient.get_best_price(
+            request.symbol, request.exchanges, request.deadline, request.depth
+        )
+        return BestPriceResponse(**data)
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.get("/best_price", response_model=BestPriceResponse, dependencies=[Depends(track_expiry)])
+async def read_best_price(
+    http_request: Request,
+    symbol: str,
+    exchanges: list[str] = Query(..., description="Repeated exchange ids"),
+    deadline: Optional[float] = None,
+    depth: Optional[int] = None,
+):
+    """HTTP-cacheable variant of ``POST /best_price``."""
+    request = query_model(BestPriceRequest, symbol=symbol, exchanges=exchanges, deadline=deadline, depth=depth)
+    try:
+        data = await ExchangeClient.get_best_price(
+            request.symbol, request.exchanges, request.deadline, request.depth
+        )
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return conditional_response(http_request, _encode_best_price(data), "orderbook")
 
 @router.post("/trades", response_model=TradeHistoryResponse)
 async def get_trade_history(request: TradeHistoryRequest):
     try:
-        data = await ExchangeClient.get_trade_history(request.exchange, request.symbol, request.limit)
-        return TradeHistoryResponse(**data)
+        body = await ExchangeClient.get_trade_history(
+            request.exchange, request.symbol, request.limit, encode=_encode_trades
+        )
+        return Response(content=body, media_type=JSON)
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.get("/trades", response_model=TradeHistoryResponse, dependencies=[Depends(track_expiry)])
+async def read_trade_history(http_request: Request, exchange: str, symbol: str, limit: int = 20):
+    """HTTP-cacheable variant of ``POST /trades``."""
+    try:
+        body = await ExchangeClient.get_trade_history(exchange, symbol, limit, encode=_encode_trades)
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return conditional_response(http_request, body, "tradehistory")
+
+@router.post("/trades/stats", response_model=TradeStatsResponse)
+async def get_trade_stats(request: TradeStatsRequest):
+    try:
+        data = await ExchangeClient.get_trade_stats(
+            request.exchange, request.symbol, request.windows, request.large_size
+        )
+        return TradeStatsResponse(**data)
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.get("/trades/stats", response_model=TradeStatsResponse, dependencies=[Depends(track_expiry)])
+async def read_trade_stats(
+    http_request: Request,
+    exchange: str,
+    symbol: str,
+    windows: Optional[list[int]] = Query(None, description="Repeated window lengths in seconds"),
+    large_size: Optional[float] = None,
+):
+    """HTTP-cacheable variant of ``POST /trades/stats``."""
+    params = {"windows": windows} if windows else {}
+    request = query_model(TradeStatsRequest, exchange=exchange, symbol=symbol, large_size=large_size, **params)
+    try:
+        data = await ExchangeClient.get_trade_stats(
+            request.exchange, request.symbol, request.windows, request.large_size
+        )
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
+    return conditional_response(http_request, _encode_trade_stats(data), "tradehistory")
 
 @router.websocket("/stream_prices")
 async def websocket_stream_prices(websocket: WebSocket):
+    """Stream prices for the pairs a client subscribes to.
+
+    Clients send ``{"action": "subscribe" | "unsubscribe", "pairs": [...]}``
+    messages and receive ``{"prices": {"exchange:symbol": price}}`` updates.
+    """
     await websocket.accept()
+    subscriber = Subscriber()
+    send_lock = asyncio.Lock()
+
+    async def send(message):
+        async with send_lock:
+            await websocket.send_json(message)
+
+    async def read_subscriptions():
+        while True:
+            message = await websocket.receive_json()
+            try:
+                request = StreamSubscription(**message)
+                pairs = [(p.exchange, p.symbol) for p in request.pairs]
+                if request.action == "subscribe":
+                    for exchange, symbol in pairs:
+                        validate_exchange(exchange)
+                        await validate_symbol(exchange, symbol)
+                    price_hub.subscribe(subscriber, pairs)
+                else:
+                    price_hub.unsubscribe(subscriber, pairs)
+            except Exception as e:
+                await send({"error": str(e)})
+
+    async def write_prices():
+        while True:
+            prices = await subscriber.next_batch()
+            await send(StreamResponse(prices=prices).model_dump())
+
+    tasks = [asyncio.ensure_future(read_subscriptions()), asyncio.ensure_future(write_prices())]
     try:
-        async def callback(prices):
-            await websocket.send_json(StreamResponse(prices=prices).dict())
-        await stream_prices(callback)
-    except Exception as e:
+        done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+        for task in done:
+            if not isinstance(task.exception(), WebSocketDisconnect):
+                task.result()
+    except Exception:
         await websocket.close(code=1000)
+    finally:
+        for task in tasks:
+            task.cancel()
+        price_hub.unsubscribe(subscriber)
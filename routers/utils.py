@@ -1,20 +1,28 @@
 from fastapi import APIRouter, HTTPException
-from models.request_models import ValidationRequest
+from models.request_models import ValidationRequest, PortfolioBatchRequest, PortfolioRiskRequest
 from models.response_models import (
     ExchangeListResponse,
+    PortfolioBatchResponse,
+    PortfolioRiskResponse,
     SymbolListResponse,
     ValidationResponse,
     ServerStatusResponse,
+    StartupReportResponse,
 )
 from config import settings
 from services.exchange_client import ExchangeClient
 from services.validation_service import validate_exchange, validate_symbol
+from services.portfolio_service import value_many, portfolio_risk
+from services.startup import startup
 from analytics.portfolio import calculate_portfolio_value
 from pydantic import BaseModel
+from typing import Optional
 
 class PortfolioRequest(BaseModel):
-    prices: dict[str, float]
+    prices: Optional[dict[str, float]] = None  # resolved from live tickers on ``exchange`` when omitted
     holdings: dict[str, float]
+    exchange: Optional[str] = None
+    quote: str = "USDT"
 
 class PortfolioResponse(BaseModel):
     value: float
@@ -47,10 +55,38 @@ async def validate_exchange_symbol_pair(request: ValidationRequest):
 async def server_status():
     return ServerStatusResponse(status=settings.MCP_SERVER_STATUS)
 
+@router.get("/startup", response_model=StartupReportResponse)
+async def startup_report():
+    return StartupReportResponse(**startup.as_dict())
+
 @router.post("/portfolio_value", response_model=PortfolioResponse)
 async def get_portfolio_value(request: PortfolioRequest):
     try:
+        if request.prices is None:
+            if not request.exchange:
+                raise Exception("Either prices or exchange is required")
+            result = await value_many([request.holdings], request.exchange, request.quote)
+            return PortfolioResponse(value=result["values"][0])
         value = calculate_portfolio_value(request.prices, request.holdings)
         return PortfolioResponse(value=value)
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
+
+@router.post("/portfolio/value", response_model=PortfolioBatchResponse)
+async def get_portfolio_values(request: PortfolioBatchRequest):
+    try:
+        validate_exchange(request.exchange)
+        data = await value_many(request.portfolios, request.exchange, request.quote)
+        return PortfolioBatchResponse(**data)
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.post("/portfolio/risk", response_model=PortfolioRiskResponse)
+async def get_portfolio_risk(request: PortfolioRiskRequest):
+    try:
+        data = await portfolio_risk(
+            request.portfolios, request.exchange, request.quote, request.interval, request.limit
+        )
+        return PortfolioRiskResponse(**data)
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
@@ -1,10 +1,15 @@
 
+from services.startup import startup
 import uvicorn
+import asyncio
 import logging
+import math
 import time
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, Request
 from fastapi.exceptions import RequestValidationError
 from fastapi.responses import JSONResponse, Response
+from starlette.routing import Match
 
 from routers.real_time import router as real_time_router
 from routers.historical import router as historical_router
@@ -13,14 +18,52 @@ from config import settings
 from services import metrics as metrics_service
 from prometheus_client import generate_latest, CONTENT_TYPE_LATEST
 from services.rate_limit_service import RateLimiter
+from services.cache_service import cache
+from services.exchange_pool import exchange_pool
+from services.market_replay import market_recorder, market_replay
+from services.markets_service import markets_registry
+from realtime.websocket_handler import price_hub
+
+startup.mark("imports")
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger("mcp_crypto_server")
 
-app = FastAPI(title="MCP Crypto Market Data Server", version="0.1.0")
+async def _finish_boot():
+    """Import ccxt off the event loop, then refresh markets restored from the snapshot."""
+    await startup.preload("ccxt.async_support")
+    markets_registry.revalidate()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Start background tasks on boot and stop them on shutdown."""
+    cache.start_sweeper()
+    lag_monitor = asyncio.ensure_future(metrics_service.monitor_loop_lag(settings.METRICS_LOOP_LAG_INTERVAL))
+    with startup.phase("markets snapshot"):
+        markets_registry.load_snapshot()
+    with startup.phase("exchange warm-up"):
+        await exchange_pool.warm_up()
+    boot = asyncio.ensure_future(_finish_boot())
+    startup.ready()
+    yield
+    boot.cancel()
+    lag_monitor.cancel()
+    await price_hub.close()
+    await cache.stop_sweeper()
+    await cache.stop_refreshes()
+    await cache.close_shared()
+    await exchange_pool.close()
+    market_recorder.close()
+    market_replay.close()
+
+app = FastAPI(title="MCP Crypto Market Data Server", version="0.1.0", lifespan=lifespan)
 
 # Initialize rate limiter
-rate_limiter = RateLimiter(interval=settings.RATE_LIMIT_INTERVAL)
+rate_limiter = RateLimiter(
+    rate=settings.RATE_LIMIT_RATE,
+    burst=settings.RATE_LIMIT_BURST,
+    idle_ttl=settings.RATE_LIMIT_IDLE_TTL,
+)
 
 # include routers
 app.include_router(real_time_router, prefix="/api/v1/real_time")
@@ -29,21 +72,37 @@ app.include_router(utils_router, prefix="/api/v1/utils")
 
 @app.middleware("http")
 async def rate_limit_middleware(request: Request, call_next):
-    rate_limiter.wait()
+    if request.url.path == "/metrics":
+        return await call_next(request)
+    client = request.client.host if request.client else "unknown"
+    retry_after = rate_limiter.acquire((client, request.url.path))
+    if retry_after > 0:
+        return JSONResponse(
+            status_code=429,
+            content={"detail": "Rate limit exceeded"},
+            headers={"Retry-After": str(max(1, math.ceil(retry_after)))},
+        )
     return await call_next(request)
 
+def _route_template(request: Request) -> str:
+    # Matched route's path template; unmatched paths share one label
+    route = request.scope.get("route")
+    if route is None:
+        # Answered before routing (e.g. rate limited): match the route table here
+        route = next((r for r in app.router.routes if r.matches(request.scope)[0] == Match.FULL), None)
+    return getattr(route, "path", None) or metrics_service.UNMATCHED_ROUTE
+
 @app.middleware("http")
 async def log_requests(request: Request, call_next):
-    start = time.time()
+    start = time.perf_counter()
     logger.info(f"Incoming request: {request.method} {request.url.path}")
-    response = await call_next(request)
-    duration = time.time() - start
+    with metrics_service.REQUESTS_IN_FLIGHT.track_inprogress():
+        response = await call_next(request)
+    duration = time.perf_counter() - start
     logger.info(f"{request.method} {request.url.path} - Status: {response.status_code} - Duration: {duration:.3f}s")
-    try:
-        # Use path as endpoint label; keep it simple
-        metrics_service.observe_request(request.method, request.url.path, response.status_code, duration)
-    except Exception:
-        pass
+    metrics_start = time.perf_counter()
+    metrics_service.observe_request(request.method, _route_template(request), response.status_code, duration)
+    metrics_service.METRICS_OVERHEAD.observe(time.perf_counter() - metrics_start)
     return response
 
 @app.exception_handler(RequestValidationError)
@@ -72,3 +131,5 @@ async def metrics():
     """Expose Prometheus metrics for scraping."""
     data = generate_latest()
     return Response(content=data, media_type=CONTENT_TYPE_LATEST)
+
+startup.mark("app setup")
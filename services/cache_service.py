@@ -1,8 +1,104 @@
+import asyncio
+import contextvars
+import logging
+import sys
 import time
+from collections import OrderedDict
+
+from config import settings
+from services.singleflight import singleflight
+from services.shared_cache import create_backend, dumps_entry, loads_entry
+
+logger = logging.getLogger("cache_service")
+
+
+def _estimate_size(value, _depth=0):
+    """Approximate the memory footprint of a cached value in bytes."""
+    size = sys.getsizeof(value)
+    if _depth > 4:
+        return size
+    if isinstance(value, dict):
+        for k, v in value.items():
+            size += _estimate_size(k, _depth + 1) + _estimate_size(v, _depth + 1)
+    elif isinstance(value, (list, tuple)):
+        if value and len(value) > 64:
+            # Extrapolate from a sample so large candle/trade lists stay cheap to size
+            sample = value[:: len(value) // 32]
+            per_item = sum(_estimate_size(v, _depth + 1) for v in sample) / len(sample)
+            size += int(per_item * len(value))
+        else:
+            size += sum(_estimate_size(v, _depth + 1) for v in value)
+    return size
+
+
+_COUNTERS = (
+    'hits', 'misses', 'stale_hits', 'evictions', 'expirations', 'refreshes',
+    'shared_hits', 'shared_misses', 'shared_errors',
+)
+
+
+def _namespace(key):
+    return key.split(':', 1)[0] if isinstance(key, str) else ''
+
+
+# Earliest expiry of the entries read in the current request, once tracking starts
+_served_expiry = contextvars.ContextVar("served_expiry", default=None)
+
 
 class Cache:
-    def __init__(self):
-        self._store = {}
+    """Bounded in-memory LRU cache with per-entry TTL.
+
+    The cache holds at most ``max_entries`` items and roughly ``max_bytes``
+    of data; the least recently used entries are evicted first. Keys are
+    namespaced by their prefix (``ticker:...``, ``ohlcv:...``) which selects
+    the default TTL and the bucket used for hit/miss/eviction counters.
+    Expired entries are removed on read and by a periodic background sweep.
+
+    Entries stored with a ``refresher`` take part in refresh-ahead: once a
+    key has been read ``refresh_min_hits`` times during its lifetime it is
+    considered hot, and a read inside the last ``refresh_window`` fraction of
+    its TTL reloads it in the background. While that reload runs, a hot key
+    keeps serving its previous value for up to ``max_stale`` seconds past
+    expiry. Keys that are not read often enough simply expire.
+
+    With a ``shared`` backend (see ``services.shared_cache``) this cache is
+    the first tier of a two-tier cache: values in ``shared_namespaces`` are
+    written through to a tier shared by every worker process, and ``fill``
+    consults that tier and takes a short lease there before fetching, so
+    one worker fetches a key while the others wait for its result. Values
+    are shared as JSON or raw NumPy arrays; anything else stays local.
+    """
+
+    def __init__(self, max_entries=None, max_bytes=None, namespace_ttls=None, default_ttl=30,
+                 refresh_window=None, refresh_min_hits=None, max_stale=None,
+                 shared=None, shared_namespaces=None, lease_ttl=None, lease_poll=None):
+        self.max_entries = settings.CACHE_MAX_ENTRIES if max_entries is None else max_entries
+        self.max_bytes = settings.CACHE_MAX_BYTES if max_bytes is None else max_bytes
+        self.namespace_ttls = {
+            'ticker': settings.CACHE_TTL,
+            'orderbook': settings.CACHE_TTL,
+            'tradehistory': settings.CACHE_TTL,
+            'ohlcv': settings.CACHE_OHLCV_TTL,
+            'symbols': settings.CACHE_SYMBOLS_TTL,
+        } if namespace_ttls is None else dict(namespace_ttls)
+        self.default_ttl = default_ttl
+        self.refresh_window = settings.CACHE_REFRESH_WINDOW if refresh_window is None else refresh_window
+        self.refresh_min_hits = settings.CACHE_REFRESH_MIN_HITS if refresh_min_hits is None else refresh_min_hits
+        self.max_stale = settings.CACHE_MAX_STALE if max_stale is None else max_stale
+        self.shared = shared
+        self.shared_namespaces = frozenset(
+            ns.strip() for ns in (
+                settings.SHARED_CACHE_NAMESPACES if shared_namespaces is None else shared_namespaces
+            ).split(',') if ns.strip()
+        )
+        self.lease_ttl = settings.SHARED_CACHE_LEASE_TTL if lease_ttl is None else lease_ttl
+        self.lease_poll = settings.SHARED_CACHE_POLL_INTERVAL if lease_poll is None else lease_poll
+        self._store = OrderedDict()
+        self._bytes = 0
+        self._stats = {}
+        self._sweeper = None
+        self._writes = set()
+        self._refreshes = set()
 
     def get(self, key):
         """Retrieve a value from the cache.
@@ -14,27 +110,353 @@ class Cache:
             The cached value if present and not expired, otherwise None.
         """
         entry = self._store.get(key)
-        if entry and (entry['expires_at'] > time.time()):
-            return entry['value']
-        if key in self._store:
-            del self._store[key]
+        if entry is not None:
+            now = time.time()
+            if entry['expires_at'] > now:
+                self._store.move_to_end(key)
+                self._served(entry)
+                entry['hits'] += 1
+                self._count(key, 'hits')
+                if now >= entry['refresh_at'] and self._is_hot(entry):
+                    self._refresh(key, entry)
+                return entry['value']
+            if now < entry['expires_at'] + self.max_stale and self._is_hot(entry):
+                # Serve the previous value while a refresh brings in a new one
+                self._store.move_to_end(key)
+                self._served(entry)
+                self._count(key, 'stale_hits')
+                self._refresh(key, entry)
+                return entry['value']
+            self._remove(key)
+            self._count(key, 'expirations')
+        self._count(key, 'misses')
         return None
 
-    def set(self, key, value, ttl=30):
+    def set(self, key, value, ttl=None, refresher=None):
         """Set a value in the cache with a TTL (seconds).
 
         Args:
             key: Cache key string.
             value: Value to store.
-            ttl: Time-to-live in seconds.
+            ttl: Time-to-live in seconds. Defaults to the TTL configured for
+                the key's namespace.
+            refresher: Optional zero-argument coroutine function that reloads
+                and re-sets this key; enables refresh-ahead for the entry.
         """
+        if ttl is None:
+            ttl = self.ttl_for(key)
+        self._set_local(key, value, ttl, refresher)
+        if self._shares(key):
+            try:
+                task = asyncio.get_running_loop().create_task(self._write_shared(key, value, ttl))
+            except RuntimeError:
+                return
+            self._writes.add(task)
+            task.add_done_callback(self._writes.discard)
+
+    def _set_local(self, key, value, ttl, refresher=None):
+        if key in self._store:
+            self._remove(key)
+        size = _estimate_size(value)
+        now = time.time()
         self._store[key] = {
             'value': value,
-            'expires_at': time.time() + ttl,
+            'expires_at': now + ttl,
+            'refresh_at': now + ttl * (1 - self.refresh_window),
+            'size': size,
+            'hits': 0,
+            'refresher': refresher,
+            'refreshing': False,
+            'encoded': {},
         }
+        self._served(self._store[key])
+        self._bytes += size
+        self._evict()
+
+    def delete(self, key):
+        """Remove a key from the cache if present."""
+        if key in self._store:
+            self._remove(key)
+
+    def peek(self, key):
+        """Return the stored value for ``key`` without touching LRU order, expiry or counters."""
+        entry = self._store.get(key)
+        return None if entry is None else entry['value']
+
+    def encoded(self, key, encode, value, variant=None):
+        """Return ``encode(value)``, kept alongside the cache entry holding ``value``.
+
+        The bytes are built once per entry and ``variant`` (e.g. a response
+        limit) and are dropped with the entry, so a hit never re-runs
+        response models or JSON encoding and a refreshed value is never
+        served with stale bytes. If ``key`` no longer holds ``value`` the
+        result is encoded but not kept.
+
+        Args:
+            key: Cache key whose entry ``value`` was read from.
+            encode: Callable turning ``value`` into response bytes.
+            value: The value returned for ``key``.
+            variant: Distinguishes several encodings of one entry.
+
+        Returns:
+            Encoded response bytes.
+        """
+        entry = self._store.get(key)
+        if entry is None or entry['value'] is not value:
+            return encode(value)
+        self._served(entry)
+        body = entry['encoded'].get(variant)
+        if body is None:
+            body = entry['encoded'][variant] = encode(value)
+            entry['size'] += len(body)
+            self._bytes += len(body)
+            self._evict()
+        return body
+
+    def track_expiry(self):
+        """Start recording when the entries read from here on in this context expire.
+
+        Reads and writes in the current task, and in tasks it starts, lower
+        the recorded expiry to that of the entry they touch; ``served_expiry``
+        reports the result. HTTP caching headers use it so responses are not
+        kept longer than the data they were built from.
+        """
+        _served_expiry.set([None])
+
+    def served_expiry(self):
+        """Return the earliest expiry (epoch seconds) recorded since ``track_expiry``, or None."""
+        served = _served_expiry.get()
+        return None if served is None else served[0]
+
+    def _served(self, entry):
+        served = _served_expiry.get()
+        if served is not None and (served[0] is None or entry['expires_at'] < served[0]):
+            served[0] = entry['expires_at']
+
+    async def get_shared(self, key):
+        """Look ``key`` up in the shared tier only.
+
+        A hit is copied into this process for the rest of its TTL.
+
+        Returns:
+            The shared value, or None on a miss or without a shared tier.
+        """
+        if not self._shares(key):
+            return None
+        return await self._read_shared(key)
+
+    async def fill(self, key, fetch, refresher=None):
+        """Load a missing key and cache it, fetching at most once across workers.
+
+        Without a shared tier this is ``fetch()`` followed by ``set``. With
+        one, a value another worker already stored is used as is; otherwise
+        the worker that wins the key's lease fetches and publishes it while
+        the others poll the shared tier for up to ``lease_ttl`` seconds
+        before falling back to fetching themselves.
+
+        Args:
+            key: Cache key string.
+            fetch: Zero-argument coroutine function producing the value.
+            refresher: Passed to ``set``; enables refresh-ahead.
+
+        Returns:
+            The cached or freshly fetched value.
+        """
+        if not self._shares(key):
+            value = await fetch()
+            self.set(key, value, refresher=refresher)
+            return value
+        # A refresh only accepts shared values newer than the local one
+        current = self._store.get(key)
+        newer_than = current['expires_at'] if current is not None else 0.0
+        value = await self._read_shared(key, newer_than, refresher)
+        if value is not None:
+            return value
+        lease = f"lease:{key}"
+        # False: another worker holds the lease; None: the tier is unreachable
+        leased = await self._call_shared(key, self.shared.add(lease, b'1', self.lease_ttl))
+        if leased is False:
+            deadline = time.monotonic() + self.lease_ttl
+            while time.monotonic() < deadline:
+                await asyncio.sleep(self.lease_poll)
+                value = await self._read_shared(key, newer_than, refresher)
+                if value is not None:
+                    return value
+        try:
+            value = await fetch()
+            ttl = self.ttl_for(key)
+            self._set_local(key, value, ttl, refresher)
+            await self._write_shared(key, value, ttl)
+        finally:
+            if leased:
+                await self._call_shared(key, self.shared.delete(lease))
+        return value
+
+    async def close_shared(self):
+        """Wait for pending shared writes and close the shared tier."""
+        if self._writes:
+            await asyncio.gather(*self._writes, return_exceptions=True)
+        if self.shared is not None:
+            await self.shared.close()
+
+    def _shares(self, key):
+        return self.shared is not None and _namespace(key) in self.shared_namespaces
+
+    async def _call_shared(self, key, call):
+        # The shared tier is an optimization: its failures count as misses
+        try:
+            return await call
+        except Exception as e:
+            self._count(key, 'shared_errors')
+            logger.warning(f"Shared cache call for {key} failed: {e}")
+            return None
+
+    async def _read_shared(self, key, newer_than=0.0, refresher=None):
+        data = await self._call_shared(key, self.shared.get(key))
+        if data is not None:
+            try:
+                expires_at, value = loads_entry(data)
+            except Exception as e:
+                self._count(key, 'shared_errors')
+                logger.warning(f"Unreadable shared cache entry for {key}: {e}")
+                expires_at, value = 0.0, None
+            now = time.time()
+            if expires_at > max(now, newer_than):
+                self._count(key, 'shared_hits')
+                self._set_local(key, value, expires_at - now, refresher)
+                return value
+        self._count(key, 'shared_misses')
+        return None
+
+    async def _write_shared(self, key, value, ttl):
+        try:
+            data = dumps_entry(time.time() + ttl, value)
+        except (TypeError, ValueError) as e:
+            self._count(key, 'shared_errors')
+            logger.warning(f"Cache value for {key} can't be shared: {e}")
+            return
+        await self._call_shared(key, self.shared.set(key, data, ttl))
+
+    def ttl_for(self, key):
+        """Return the default TTL for the namespace of ``key``."""
+        return self.namespace_ttls.get(_namespace(key), self.default_ttl)
 
     def clear(self):
         """Clear all items from the cache."""
         self._store.clear()
+        self._bytes = 0
+
+    def sweep(self):
+        """Remove every expired entry and return how many were dropped.
+
+        Hot entries are kept until their staleness bound has also passed.
+        """
+        now = time.time()
+        expired = [
+            k for k, e in self._store.items()
+            if e['expires_at'] + (self.max_stale if self._is_hot(e) else 0) <= now
+        ]
+        for key in expired:
+            self._remove(key)
+            self._count(key, 'expirations')
+        return len(expired)
+
+    async def run_sweeper(self, interval=None):
+        """Sweep expired entries forever, every ``interval`` seconds."""
+        interval = settings.CACHE_SWEEP_INTERVAL if interval is None else interval
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                self.sweep()
+            except Exception as e:
+                logger.warning(f"Cache sweep failed: {e}")
+
+    def start_sweeper(self, interval=None):
+        """Start the background sweep task on the running event loop."""
+        if self._sweeper is None or self._sweeper.done():
+            self._sweeper = asyncio.ensure_future(self.run_sweeper(interval))
+        return self._sweeper
+
+    async def stop_sweeper(self):
+        """Cancel the background sweep task, if running."""
+        if self._sweeper is not None:
+            self._sweeper.cancel()
+            try:
+                await self._sweeper
+            except asyncio.CancelledError:
+                pass
+            self._sweeper = None
+
+    async def stop_refreshes(self):
+        """Cancel in-flight refresh-ahead tasks and wait for them to finish."""
+        tasks = list(self._refreshes)
+        for task in tasks:
+            task.cancel()
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    def stats(self):
+        """Return size information and per-namespace counters.
+
+        Returns:
+            Dict with ``entries``, ``bytes``, aggregated ``hits``, ``misses``,
+            ``stale_hits``, ``evictions``, ``expirations`` and ``refreshes``,
+            and a ``namespaces`` breakdown.
+        """
+        totals = dict.fromkeys(_COUNTERS, 0)
+        for counters in self._stats.values():
+            for name in totals:
+                totals[name] += counters[name]
+        return {
+            'entries': len(self._store),
+            'bytes': self._bytes,
+            **totals,
+            'namespaces': {ns: dict(c) for ns, c in self._stats.items()},
+        }
+
+    def _is_hot(self, entry):
+        return entry['refresher'] is not None and entry['hits'] >= self.refresh_min_hits
+
+    def _refresh(self, key, entry):
+        if entry['refreshing']:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            # No running event loop; the key will be reloaded on its next miss
+            return
+        task = loop.create_task(singleflight.do(key, entry['refresher']))
+        # The loop only keeps weak references to tasks
+        self._refreshes.add(task)
+        entry['refreshing'] = True
+        self._count(key, 'refreshes')
+
+        def _done(t):
+            self._refreshes.discard(t)
+            entry['refreshing'] = False
+            if not t.cancelled() and t.exception() is not None:
+                logger.warning(f"Refresh-ahead for {key} failed: {t.exception()}")
+
+        task.add_done_callback(_done)
+
+    def _evict(self):
+        while self._store and (
+            len(self._store) > self.max_entries or self._bytes > self.max_bytes
+        ):
+            key = next(iter(self._store))
+            self._remove(key)
+            self._count(key, 'evictions')
+
+    def _remove(self, key):
+        entry = self._store.pop(key)
+        self._bytes -= entry['size']
+
+    def _count(self, key, name):
+        ns = _namespace(key)
+        counters = self._stats.get(ns)
+        if counters is None:
+            counters = self._stats[ns] = dict.fromkeys(_COUNTERS, 0)
+        counters[name] += 1
+
 
-cache = Cache()
\ No newline at end of file
+cache = Cache(shared=create_backend())
@@ -0,0 +1,241 @@
+import asyncio
+import json
+import logging
+import os
+import time
+from collections import deque
+from itertools import islice
+
+import numpy as np
+
+from config import settings
+
+logger = logging.getLogger("candle_store")
+
+CANDLE_DTYPE = np.dtype([
+    ('timestamp', '<i8'),
+    ('open', '<f8'),
+    ('high', '<f8'),
+    ('low', '<f8'),
+    ('close', '<f8'),
+    ('volume', '<f8'),
+])
+
+
+def to_candle_array(rows):
+    """Convert ccxt OHLCV rows ``[ts, o, h, l, c, v]`` into a candle array."""
+    out = np.empty(len(rows), dtype=CANDLE_DTYPE)
+    for i, row in enumerate(rows):
+        out[i] = tuple(float('nan') if v is None else v for v in row[:6])
+    return out
+
+
+def _clip(candles, start, end):
+    ts = candles['timestamp']
+    return candles[(ts >= start) & (ts <= end)]
+
+
+def split_pages(start, end, step, page_size):
+    """Yield (page_start, page_end) pairs of ``page_size`` candles covering [start, end]."""
+    span = page_size * step
+    return ((s, min(s + span - step, end)) for s in range(start, end + 1, span))
+
+
+def _merge_ranges(ranges, step):
+    merged = []
+    for start, end in sorted(ranges):
+        if merged and start <= merged[-1][1] + step:
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+    return merged
+
+
+def missing_ranges(covered, start, end, step):
+    """Return the sub-ranges of [start, end] not contained in ``covered``.
+
+    Args:
+        covered: Sorted, merged list of [start, end] candle timestamps (ms).
+        start: First candle timestamp wanted (ms).
+        end: Last candle timestamp wanted (ms).
+        step: Candle duration in ms.
+
+    Returns:
+        List of [start, end] pairs that still have to be fetched.
+    """
+    gaps = []
+    cursor = start
+    for c_start, c_end in covered:
+        if c_end < cursor:
+            continue
+        if c_start > end:
+            break
+        if c_start > cursor:
+            gaps.append([cursor, min(end, c_start - step)])
+        cursor = max(cursor, c_end + step)
+        if cursor > end:
+            break
+    if cursor <= end:
+        gaps.append([cursor, end])
+    return gaps
+
+
+class _Series:
+    """Candles of one exchange/symbol/interval backed by a memory-mapped file."""
+
+    def __init__(self, path: str, step: int):
+        self.path = path
+        self.ranges_path = path + ".ranges.json"
+        self.step = step
+        self._data = None
+        self.covered = []
+        if os.path.exists(self.ranges_path):
+            with open(self.ranges_path) as f:
+                self.covered = json.load(f)
+
+    @property
+    def data(self):
+        if self._data is None:
+            if os.path.exists(self.path) and os.path.getsize(self.path) >= CANDLE_DTYPE.itemsize:
+                self._data = np.memmap(self.path, dtype=CANDLE_DTYPE, mode='r')
+            else:
+                self._data = np.empty(0, dtype=CANDLE_DTYPE)
+        return self._data
+
+    def read(self, start: int, end: int):
+        data = self.data
+        ts = data['timestamp']
+        lo = np.searchsorted(ts, start, side='left')
+        hi = np.searchsorted(ts, end, side='right')
+        return np.array(data[lo:hi])
+
+    def write(self, candles, start: int, end: int):
+        """Merge fetched candles and mark [start, end] as covered."""
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        current = self.data
+        if len(candles):
+            candles = np.sort(candles, order='timestamp')
+            if not len(current) or candles['timestamp'][0] > current['timestamp'][-1]:
+                # Pure append: extend the file in place
+                with open(self.path, 'ab') as f:
+                    f.write(candles.tobytes())
+            else:
+                merged = np.concatenate([candles, np.array(current)])
+                _, idx = np.unique(merged['timestamp'], return_index=True)
+                tmp = self.path + ".tmp"
+                with open(tmp, 'wb') as f:
+                    f.write(merged[idx].tobytes())
+                os.replace(tmp, self.path)
+            self._data = None
+        self.covered = _merge_ranges(self.covered + [[start, end]], self.step)
+        tmp = self.ranges_path + ".tmp"
+        with open(tmp, 'w') as f:
+            json.dump(self.covered, f)
+        os.replace(tmp, self.ranges_path)
+
+
+class CandleStore:
+    """Persistent local OHLCV store with incremental gap-fill.
+
+    Each exchange/symbol/interval series lives in an append-only binary file
+    of fixed-size candle records, read through ``numpy.memmap``, plus a small
+    JSON sidecar listing the timestamp ranges already fetched. A range query
+    only fetches the sub-ranges missing from that list, merges them in and
+    serves the whole range from disk. A fetched range counts as covered only
+    up to the last candle upstream returned for it. Candles that are still open are fetched
+    live and never stored. Long ranges are paged and fetched concurrently.
+    """
+
+    def __init__(self, root=None):
+        self.root = settings.CANDLE_STORE_DIR if root is None else root
+        self._series = {}
+
+    def _get_series(self, exchange: str, symbol: str, interval: str, step: int):
+        key = (exchange, symbol, interval)
+        series = self._series.get(key)
+        if series is None:
+            safe_symbol = symbol.replace('/', '-').replace(':', '_')
+            path = os.path.join(self.root, exchange, safe_symbol, f"{interval}.bin")
+            series = self._series[key] = _Series(path, step)
+        return series
+
+    async def get_range(self, exchange: str, symbol: str, interval: str, step: int,
+                        start: int, end: int, fetch, persist: bool = True, now=None):
+        """Return candles with timestamps in [start, end], fetching only gaps.
+
+        Args:
+            exchange: Exchange identifier.
+            symbol: Trading pair symbol.
+            interval: Timeframe string (e.g., '1m').
+            step: Timeframe duration in ms.
+            start: First candle timestamp (ms, aligned to ``step``).
+            end: Last candle timestamp (ms).
+            fetch: Coroutine function ``fetch(start_ms, end_ms)`` returning
+                ccxt OHLCV rows covering that range.
+            persist: When False, bypass the store and fetch everything.
+            now: Current market time (ms) deciding which candles are closed;
+                defaults to the wall clock.
+
+        Returns:
+            Candle array (``CANDLE_DTYPE``) sorted by timestamp.
+        """
+        pages = [page async for page in self.iter_range(
+            exchange, symbol, interval, step, start, end, fetch, persist=persist, now=now
+        )]
+        return np.concatenate(pages) if pages else np.empty(0, dtype=CANDLE_DTYPE)
+
+    async def iter_range(self, exchange: str, symbol: str, interval: str, step: int,
+                         start: int, end: int, fetch, persist: bool = True,
+                         page_size=None, concurrency=None, now=None):
+        """Yield candles for [start, end] page by page, in timestamp order.
+
+        The range is split into pages of ``page_size`` candles aligned to the
+        timeframe. Up to ``concurrency`` pages are fetched ahead concurrently,
+        but pages are merged into the store and yielded strictly in order, so
+        memory stays bounded by the look-ahead window and the series file is
+        extended by appends.
+        """
+        page_size = settings.OHLCV_PAGE_LIMIT if page_size is None else page_size
+        concurrency = settings.OHLCV_PAGE_CONCURRENCY if concurrency is None else concurrency
+        now = int(time.time() * 1000) if now is None else now
+        last_closed = (now // step) * step - step
+        series = self._get_series(exchange, symbol, interval, step) if persist else None
+
+        async def load(page_start, page_end):
+            stored_end = min(page_end, last_closed) if persist else page_start - step
+            gaps = missing_ranges(series.covered, page_start, stored_end, step) if page_start <= stored_end else []
+            fetched = [(g_start, g_end, await fetch(g_start, g_end)) for g_start, g_end in gaps]
+            live = None
+            if page_end > stored_end:
+                live_start = max(page_start, stored_end + step)
+                live = _clip(to_candle_array(await fetch(live_start, page_end)), live_start, page_end)
+            return stored_end, fetched, live
+
+        pages = iter(split_pages(start, end, step, page_size))
+        pending = deque()
+        for page in islice(pages, max(1, concurrency)):
+            pending.append((page, asyncio.ensure_future(load(*page))))
+        try:
+            while pending:
+                (page_start, page_end), task = pending.popleft()
+                stored_end, fetched, live = await task
+                for page in islice(pages, 1):
+                    pending.append((page, asyncio.ensure_future(load(*page))))
+                for g_start, g_end, rows in fetched:
+                    candles = _clip(to_candle_array(rows), g_start, g_end)
+                    # A fetch cut short by an empty page leaves its tail uncovered, to retry later
+                    if len(candles):
+                        series.write(candles, g_start, int(candles['timestamp'].max()))
+                if page_start <= stored_end:
+                    result = series.read(page_start, stored_end)
+                    if live is not None:
+                        result = np.concatenate([result, live])
+                else:
+                    result = live
+                yield result
+        finally:
+            for _, task in pending:
+                task.cancel()
+
+
+candle_store = CandleStore()
@@ -1,53 +1,127 @@
-import ccxt.async_support as ccxt
-import ccxt
 import asyncio
 import logging
+import time
 
 from services.cache_service import cache
 from services.validation_service import validate_exchange, validate_symbol
+from services.markets_service import markets_registry
+from services.singleflight import singleflight
+from services.exchange_pool import exchange_pool
+from services.upstream_policy import upstream
+from services.market_replay import market_recorder, market_replay
+from services.candle_store import candle_store, to_candle_array
+from analytics.order_book import order_books, book_metrics, consolidate, to_levels
+from analytics.trade_tape import trade_tapes, to_trade_array, trade_items
+from services.startup import lazy_import
 from config import settings
 
+ccxt = lazy_import("ccxt")
+
 logger = logging.getLogger("exchange_client")
 
+
+def _format_ticker(exchange: str, symbol: str, ticker: dict):
+    return {
+        "exchange": exchange,
+        "symbol": symbol,
+        "price": ticker["last"],
+        "timestamp": ticker["timestamp"] // 1000 if ticker["timestamp"] else 0,
+    }
+
+
+def _ohlcv_key(exchange, symbol, interval, start_timestamp, end_timestamp, limit):
+    return f"ohlcv:{exchange}:{symbol}:{interval}:{start_timestamp}:{end_timestamp}:{limit}"
+
+
+def _candle_items(candles):
+    return [
+        {
+            "timestamp": row[0] // 1000,
+            "open": row[1],
+            "high": row[2],
+            "low": row[3],
+            "close": row[4],
+            "volume": row[5],
+        }
+        for row in candles.tolist()
+    ]
+
+def _book_level(level):
+    exchange, price, amount = level
+    return {"exchange": exchange, "price": price, "amount": amount}
+
 class ExchangeClient:
     """Client wrapper around CCXT exchanges providing cached async data fetches.
 
-    This class lazily initializes ccxt async exchange instances and exposes
-    convenience methods to fetch ticker, order book, trades and OHLCV data
-    with caching and retry logic.
+    Exchange instances come from the shared async exchange pool; this class
+    exposes convenience methods to fetch ticker, order book, trades and OHLCV
+    data with caching; every upstream call goes through the shared
+    ``upstream`` retry/hedging/circuit-breaker policy.
     """
 
-    _EXCHANGE_INSTANCES = {}
-
     @staticmethod
     async def get_exchange_instance(exchange: str):
-        """Return a cached ccxt async exchange instance, creating it if needed.
+        """Return the pooled ccxt async exchange instance, creating it if needed.
 
         Args:
             exchange: Exchange id string (e.g., 'binance').
 
         Returns:
-            An instantiated ccxt async exchange object.
+            An instantiated ccxt async exchange object, or its recording or
+            replay stand-in depending on ``MARKET_DATA_MODE``.
         """
-        if exchange in ExchangeClient._EXCHANGE_INSTANCES:
-            return ExchangeClient._EXCHANGE_INSTANCES[exchange]
-        try:
-            ex_class = getattr(ccxt, exchange)
-            ex_instance = ex_class({'enableRateLimit': True, 'rateLimit': 1200})
-            ExchangeClient._EXCHANGE_INSTANCES[exchange] = ex_instance
-            return ex_instance
-        except AttributeError:
-            raise Exception(f"Exchange '{exchange}' not supported in CCXT.")
+        if settings.MARKET_DATA_MODE == "replay":
+            return market_replay.exchange(exchange)
+        ex = await exchange_pool.get(exchange)
+        if settings.MARKET_DATA_MODE == "record":
+            return market_recorder.wrap(exchange, ex)
+        return ex
 
     @staticmethod
-    async def get_ticker_price(exchange: str, symbol: str):
+    def _market_now():
+        """Current market time in ms: the replay clock when replaying, else the wall clock."""
+        if settings.MARKET_DATA_MODE == "replay":
+            now = market_replay.clock.now()
+            if now is not None:
+                return now
+        return int(time.time() * 1000)
+
+    @staticmethod
+    def _persist_candles():
+        # Replayed candles stop at the replay clock and must never reach the live store
+        return settings.CANDLE_STORE_ENABLED and settings.MARKET_DATA_MODE != "replay"
+
+    @staticmethod
+    async def _cached_fetch(cache_key: str, fetch, refresh_ahead: bool = False):
+        """Load a cache miss through single-flight and store the result.
+
+        Concurrent misses collapse into one call per process; ``cache.fill``
+        also collapses them across workers when a shared cache tier is set.
+
+        Args:
+            cache_key: Cache key to fill.
+            fetch: Zero-argument coroutine function performing the upstream call.
+            refresh_ahead: Register the loader with the cache so hot keys are
+                refreshed in the background before they expire.
+
+        Returns:
+            The freshly fetched result.
+        """
+        async def load():
+            return await cache.fill(cache_key, fetch, refresher=load if refresh_ahead else None)
+        return await singleflight.do(cache_key, load)
+
+    @staticmethod
+    async def get_ticker_price(exchange: str, symbol: str, encode=None):
         """Fetch the latest ticker price for a symbol on an exchange.
 
-        Validates inputs, checks cache and attempts network fetch with retries.
+        Validates inputs, checks cache and fetches upstream under the shared retry policy.
 
         Args:
             exchange: Exchange name (e.g., 'binance').
             symbol: Trading pair symbol in CCXT format (e.g., 'BTC/USDT').
+            encode: Optional response encoder; when given, the encoded bytes
+                are returned and kept with the cache entry.
 
         Returns:
             Dict containing exchange, symbol, price and timestamp.
@@ -55,35 +129,125 @@ class ExchangeClient:
         validate_exchange(exchange)
         await validate_symbol(exchange, symbol)
         cache_key = f"ticker:{exchange}:{symbol}"
-        if result := cache.get(cache_key):
-            return result
+        result = cache.get(cache_key)
+        if not result:
+            result = await ExchangeClient._cached_fetch(
+                cache_key, lambda: ExchangeClient._fetch_ticker_price(exchange, symbol), refresh_ahead=True
+            )
+        return result if encode is None else cache.encoded(cache_key, encode, result)
+
+    @staticmethod
+    async def _fetch_ticker_price(exchange: str, symbol: str):
+        ex = await ExchangeClient.get_exchange_instance(exchange)
+        ticker = await upstream.call(
+            exchange, "fetch_ticker", lambda: ex.fetch_ticker(symbol),
+            f"Could not fetch ticker for {exchange}:{symbol}",
+        )
+        return _format_ticker(exchange, symbol, ticker)
+
+    @staticmethod
+    async def get_tickers(pairs):
+        """Fetch ticker prices for many exchange/symbol pairs at once.
+
+        Pairs are grouped by exchange. Cached tickers are served directly; the
+        rest are loaded with one ``fetch_tickers`` call where the exchange
+        supports it, falling back to concurrent ``fetch_ticker`` calls capped
+        at ``BATCH_TICKER_CONCURRENCY`` per exchange. Every loaded ticker fills
+        the regular ``ticker:`` cache key.
+
+        Args:
+            pairs: Iterable of (exchange, symbol) tuples.
+
+        Returns:
+            Tuple of (tickers, errors): ticker dicts in request order, and a
+            list of dicts with exchange, symbol and detail for failed pairs.
+        """
+        pairs = list(dict.fromkeys(pairs))
+        by_exchange = {}
+        for exchange, symbol in pairs:
+            by_exchange.setdefault(exchange, []).append(symbol)
+        outcomes = {}
+        results = await asyncio.gather(
+            *(ExchangeClient._get_exchange_tickers(ex, symbols) for ex, symbols in by_exchange.items()),
+            return_exceptions=True,
+        )
+        for (exchange, symbols), found in zip(by_exchange.items(), results):
+            if isinstance(found, Exception):
+                found = {symbol: found for symbol in symbols}
+            for symbol, outcome in found.items():
+                outcomes[(exchange, symbol)] = outcome
+        tickers, errors = [], []
+        for exchange, symbol in pairs:
+            outcome = outcomes[(exchange, symbol)]
+            if isinstance(outcome, Exception):
+                errors.append({"exchange": exchange, "symbol": symbol, "detail": str(outcome)})
+            else:
+                tickers.append(outcome)
+        return tickers, errors
+
+    @staticmethod
+    async def _get_exchange_tickers(exchange: str, symbols):
+        outcomes = {}
+        try:
+            validate_exchange(exchange)
+        except Exception as e:
+            return {symbol: e for symbol in symbols}
+        checks = await asyncio.gather(
+            *(validate_symbol(exchange, symbol) for symbol in symbols), return_exceptions=True
+        )
+        missing = []
+        for symbol, check in zip(symbols, checks):
+            if isinstance(check, Exception):
+                outcomes[symbol] = check
+            elif result := cache.get(f"ticker:{exchange}:{symbol}"):
+                outcomes[symbol] = result
+            else:
+                missing.append(symbol)
+        if missing and cache.shared is not None:
+            shared = await asyncio.gather(*(cache.get_shared(f"ticker:{exchange}:{s}") for s in missing))
+            outcomes.update((s, r) for s, r in zip(missing, shared) if r is not None)
+            missing = [symbol for symbol in missing if symbol not in outcomes]
+        if not missing:
+            return outcomes
         ex = await ExchangeClient.get_exchange_instance(exchange)
-        attempts = 0
-        while attempts < 3:
+        if len(missing) > 1 and ex.has.get('fetchTickers'):
             try:
-                ticker = await ex.fetch_ticker(symbol)
-                result = {
-                    "exchange": exchange,
-                    "symbol": symbol,
-                    "price": ticker["last"],
-                    "timestamp": ticker["timestamp"] // 1000 if ticker["timestamp"] else 0,
-                }
-                cache.set(cache_key, result, ttl=settings.CACHE_TTL)
-                return result
+                fetched = await upstream.call(
+                    exchange, "fetch_tickers", lambda: ex.fetch_tickers(missing),
+                    f"Could not fetch tickers for {exchange}",
+                )
+                for symbol in missing:
+                    ticker = fetched.get(symbol)
+                    if ticker is not None:
+                        result = _format_ticker(exchange, symbol, ticker)
+                        cache.set(f"ticker:{exchange}:{symbol}", result)
+                        outcomes[symbol] = result
+                missing = [symbol for symbol in missing if symbol not in outcomes]
             except Exception as e:
-                logger.warning(f"Fetch ticker retry {attempts + 1} error: {e}")
-                attempts += 1
-                await asyncio.sleep(0.75 * attempts)
-        raise Exception(f"Could not fetch ticker for {exchange}:{symbol}")
+                logger.warning(f"Fetch tickers for {exchange} failed, falling back: {e}")
+        semaphore = asyncio.Semaphore(settings.BATCH_TICKER_CONCURRENCY)
+
+        async def fetch_one(symbol):
+            async with semaphore:
+                return await ExchangeClient._cached_fetch(
+                    f"ticker:{exchange}:{symbol}",
+                    lambda: ExchangeClient._fetch_ticker_price(exchange, symbol),
+                    refresh_ahead=True,
+                )
+
+        fallback = await asyncio.gather(*(fetch_one(s) for s in missing), return_exceptions=True)
+        outcomes.update(zip(missing, fallback))
+        return outcomes
 
     @staticmethod
-    async def get_order_book(exchange: str, symbol: str, limit: int = 20):
+    async def get_order_book(exchange: str, symbol: str, limit: int = 20, encode=None):
         """Fetch the order book for a given symbol with configurable depth.
 
         Args:
             exchange: Exchange identifier.
             symbol: Trading pair symbol.
             limit: Depth limit for bids/asks (default 20).
+            encode: Optional response encoder, as for ``get_ticker_price``.
 
         Returns:
             Dict containing exchange, symbol, bids, asks and timestamp.
@@ -91,71 +255,226 @@ class ExchangeClient:
         validate_exchange(exchange)
         await validate_symbol(exchange, symbol)
         cache_key = f"orderbook:{exchange}:{symbol}:{limit}"
-        if result := cache.get(cache_key):
-            return result
+        result = cache.get(cache_key)
+        if not result:
+            result = await ExchangeClient._cached_fetch(
+                cache_key, lambda: ExchangeClient._fetch_order_book(exchange, symbol, limit), refresh_ahead=True
+            )
+        return result if encode is None else cache.encoded(cache_key, encode, result)
+
+    @staticmethod
+    async def _fetch_order_book(exchange: str, symbol: str, limit: int):
         ex = await ExchangeClient.get_exchange_instance(exchange)
-        attempts = 0
-        while attempts < 3:
-            try:
-                orderbook = await ex.fetch_order_book(symbol, limit)
-                result = {
-                    "exchange": exchange,
-                    "symbol": symbol,
-                    "bids": orderbook.get("bids", []),
-                    "asks": orderbook.get("asks", []),
-                    "timestamp": orderbook.get("timestamp", 0) // 1000 if orderbook.get("timestamp") else 0,
-                }
-                cache.set(cache_key, result, ttl=settings.CACHE_TTL)
-                return result
-            except Exception as e:
-                logger.warning(f"Fetch orderbook retry {attempts + 1} error: {e}")
-                attempts += 1
-                await asyncio.sleep(0.75 * attempts)
-        raise Exception(f"Could not fetch order book for {exchange}:{symbol}")
+        orderbook = await upstream.call(
+            exchange, "fetch_order_book", lambda: ex.fetch_order_book(symbol, limit),
+            f"Could not fetch order book for {exchange}:{symbol}",
+        )
+        return {
+            "exchange": exchange,
+            "symbol": symbol,
+            "bids": orderbook.get("bids", []),
+            "asks": orderbook.get("asks", []),
+            "timestamp": orderbook.get("timestamp", 0) // 1000 if orderbook.get("timestamp") else 0,
+        }
+
+    @staticmethod
+    async def get_order_book_metrics(
+        exchange: str, symbol: str, limit: int = 100, size: float = None, tick_size: float = None, depth: int = None
+    ):
+        """Compute microstructure metrics from the local order book.
+
+        The (cached) snapshot is diffed into the local book for the symbol,
+        then mid, spread, imbalance, cumulative depth and optional slippage
+        are computed server-side over the sorted level arrays.
+
+        Args:
+            exchange: Exchange identifier.
+            symbol: Trading pair symbol.
+            limit: Snapshot depth to request from the exchange.
+            size: Optional order size in base units for fill estimates.
+            tick_size: Optional price bucket size.
+            depth: Optional number of (bucketed) levels per side to use.
+
+        Returns:
+            Dict with exchange, symbol, timestamp and the ``book_metrics`` fields.
+        """
+        data = await ExchangeClient.get_order_book(exchange, symbol, limit)
+        book = order_books.apply(exchange, symbol, data["bids"], data["asks"], data["timestamp"])
+        bids, asks = book.levels(tick_size, depth)
+        metrics = book_metrics(bids, asks, size)
+        metrics["bid_depth"] = metrics["bid_depth"].tolist()
+        metrics["ask_depth"] = metrics["ask_depth"].tolist()
+        return {"exchange": exchange, "symbol": symbol, "timestamp": book.timestamp, **metrics}
 
     @staticmethod
-    async def get_trade_history(exchange: str, symbol: str, limit: int = 20):
+    async def get_best_price(symbol: str, exchanges, deadline: float = None, depth: int = None):
+        """Quote one symbol on many exchanges concurrently within a deadline.
+
+        Order books are requested from every exchange at once through the
+        cached, single-flight ``get_order_book`` path. Exchanges that have not
+        answered by the deadline are reported as late; their upstream calls
+        keep running (single-flight waiters are shielded) and still fill the
+        cache for the next request.
+
+        Args:
+            symbol: Trading pair symbol shared by all venues.
+            exchanges: Exchange ids to query.
+            deadline: Seconds to wait; defaults to ``AGGREGATE_DEADLINE``.
+            depth: Levels per venue; defaults to ``AGGREGATE_DEPTH``.
+
+        Returns:
+            Dict with per-venue quotes, best bid/ask across venues, the
+            cross-venue spread, a consolidated top of book, late exchanges
+            and per-exchange errors.
+        """
+        deadline = settings.AGGREGATE_DEADLINE if deadline is None else deadline
+        depth = depth or settings.AGGREGATE_DEPTH
+        exchanges = list(dict.fromkeys(exchanges))
+        tasks = {
+            ex: asyncio.ensure_future(ExchangeClient.get_order_book(ex, symbol, depth)) for ex in exchanges
+        }
+        await asyncio.wait(tasks.values(), timeout=deadline)
+        books, venues, late, errors = {}, [], [], []
+        for ex, task in tasks.items():
+            if not task.done():
+                task.cancel()
+                late.append(ex)
+            elif task.exception() is not None:
+                errors.append({"exchange": ex, "symbol": symbol, "detail": str(task.exception())})
+            else:
+                data = task.result()
+                bids, asks = to_levels(data["bids"]), to_levels(data["asks"])
+                books[ex] = (bids, asks)
+                venues.append({
+                    "exchange": ex,
+                    "bid": float(bids[0, 0]) if len(bids) else None,
+                    "bid_amount": float(bids[0, 1]) if len(bids) else None,
+                    "ask": float(asks[0, 0]) if len(asks) else None,
+                    "ask_amount": float(asks[0, 1]) if len(asks) else None,
+                    "timestamp": data["timestamp"],
+                })
+        top = consolidate(books, depth)
+        best_bid = top["bids"][0] if top["bids"] else None
+        best_ask = top["asks"][0] if top["asks"] else None
+        spread = spread_bps = None
+        if best_bid and best_ask:
+            spread = best_ask[1] - best_bid[1]
+            spread_bps = spread / ((best_ask[1] + best_bid[1]) / 2) * 1e4
+        return {
+            "symbol": symbol,
+            "venues": venues,
+            "best_bid": _book_level(best_bid) if best_bid else None,
+            "best_ask": _book_level(best_ask) if best_ask else None,
+            "spread": spread,
+            "spread_bps": spread_bps,
+            "crossed": spread is not None and spread < 0,
+            "bids": [_book_level(lv) for lv in top["bids"]],
+            "asks": [_book_level(lv) for lv in top["asks"]],
+            "late": late,
+            "errors": errors,
+        }
+
+    @staticmethod
+    async def get_trade_history(exchange: str, symbol: str, limit: int = 20, encode=None):
         """Fetch recent trade history for a symbol.
 
+        Trades are served from the symbol's trade tape, so any ``limit`` up to
+        ``TRADE_TAPE_CAPACITY`` shares one buffer. The tape is topped up with
+        ``since`` the last stored trade once the cached sync marker expires,
+        and backfilled with a plain snapshot when a deeper limit is asked for.
+
         Args:
             exchange: Exchange identifier.
             symbol: Trading pair symbol.
             limit: Maximum number of trades to return.
+            encode: Optional response encoder. Encoded bytes are kept per
+                ``limit`` with the tape's sync marker, which is replaced
+                whenever new trades are merged.
 
         Returns:
-            Dict with exchange, symbol and a list of trade items.
+            Dict with exchange, symbol and a list of trade items, oldest first.
         """
         validate_exchange(exchange)
         await validate_symbol(exchange, symbol)
-        cache_key = f"tradehistory:{exchange}:{symbol}:{limit}"
-        if result := cache.get(cache_key):
-            return result
+        tape = await ExchangeClient._sync_trade_tape(exchange, symbol, min(limit, settings.TRADE_TAPE_CAPACITY))
+
+        def build():
+            return {
+                "exchange": exchange,
+                "symbol": symbol,
+                "trades": trade_items(tape.latest(limit)),
+            }
+
+        if encode is None:
+            return build()
+        cache_key = f"tradehistory:{exchange}:{symbol}"
+        return cache.encoded(cache_key, lambda _: encode(build()), cache.peek(cache_key), variant=limit)
+
+    @staticmethod
+    async def get_trade_stats(exchange: str, symbol: str, windows, large_size: float = None):
+        """Compute rolling trade aggregates over one or more windows.
+
+        Args:
+            exchange: Exchange identifier.
+            symbol: Trading pair symbol.
+            windows: Window lengths in seconds, ending at the latest trade.
+            large_size: Optional amount threshold for large trades.
+
+        Returns:
+            Dict with exchange, symbol and one ``TradeTape.aggregates`` dict per window.
+        """
+        validate_exchange(exchange)
+        await validate_symbol(exchange, symbol)
+        tape = await ExchangeClient._sync_trade_tape(exchange, symbol)
+        return {
+            "exchange": exchange,
+            "symbol": symbol,
+            "windows": [tape.aggregates(window, large_size=large_size) for window in windows],
+        }
+
+    @staticmethod
+    async def _sync_trade_tape(exchange: str, symbol: str, depth: int = 0):
+        tape = trade_tapes.get(exchange, symbol)
+        cache_key = f"tradehistory:{exchange}:{symbol}"
+        if depth > tape.backfilled or not tape.backfilled:
+            depth = max(depth, settings.TRADE_PAGE_LIMIT)
+            await singleflight.do(
+                f"{cache_key}:backfill:{depth}", lambda: ExchangeClient._backfill_trades(exchange, symbol, depth)
+            )
+        elif cache.get(cache_key) is None:
+            await ExchangeClient._cached_fetch(
+                cache_key, lambda: ExchangeClient._fetch_new_trades(exchange, symbol), refresh_ahead=True
+            )
+        return tape
+
+    @staticmethod
+    async def _backfill_trades(exchange: str, symbol: str, depth: int):
+        tape = trade_tapes.get(exchange, symbol)
         ex = await ExchangeClient.get_exchange_instance(exchange)
-        attempts = 0
-        while attempts < 3:
-            try:
-                trades = await ex.fetch_trades(symbol, limit=limit)
-                trade_items = []
-                for t in trades[:limit]:
-                    trade_items.append({
-                        "price": t["price"],
-                        "amount": t["amount"],
-                        "side": t.get("side", ""),
-                        "timestamp": t["timestamp"] // 1000 if t["timestamp"] else 0,
-                        "trade_id": str(t.get("id", "")),
-                    })
-                result = {
-                    "exchange": exchange,
-                    "symbol": symbol,
-                    "trades": trade_items,
-                }
-                cache.set(cache_key, result, ttl=settings.CACHE_TTL)
-                return result
-            except Exception as e:
-                logger.warning(f"Fetch trades retry {attempts + 1} error: {e}")
-                attempts += 1
-                await asyncio.sleep(0.75 * attempts)
-        raise Exception(f"Could not fetch trades for {exchange}:{symbol}")
+        trades = await ExchangeClient._fetch_trades_page(ex, exchange, symbol, None, depth)
+        tape.merge(to_trade_array(trades))
+        tape.backfilled = max(tape.backfilled, depth)
+        cache.set(f"tradehistory:{exchange}:{symbol}", {"trades": len(tape), "last": tape.last_timestamp})
+
+    @staticmethod
+    async def _fetch_new_trades(exchange: str, symbol: str):
+        """Append trades newer than the tape's last trade, page by page."""
+        tape = trade_tapes.get(exchange, symbol)
+        ex = await ExchangeClient.get_exchange_instance(exchange)
+        for _ in range(settings.TRADE_MAX_PAGES):
+            since = tape.last_timestamp
+            page = await ExchangeClient._fetch_trades_page(ex, exchange, symbol, since, settings.TRADE_PAGE_LIMIT)
+            added = tape.merge(to_trade_array(page))
+            if len(page) < settings.TRADE_PAGE_LIMIT or not added:
+                break
+        return {"trades": len(tape), "last": tape.last_timestamp}
+
+    @staticmethod
+    async def _fetch_trades_page(ex, exchange: str, symbol: str, since, limit):
+        return await upstream.call(
+            exchange, "fetch_trades", lambda: ex.fetch_trades(symbol, since=since, limit=limit),
+            f"Could not fetch trades for {exchange}:{symbol}",
+        )
 
     @staticmethod
     async def get_ohlcv(
@@ -165,6 +484,7 @@ class ExchangeClient:
         start_timestamp: int = None,
         end_timestamp: int = None,
         limit: int = 100,
+        encode=None,
     ):
         """Fetch OHLCV (candlestick) data for a symbol.
 
@@ -175,69 +495,182 @@ class ExchangeClient:
             start_timestamp: Optional start time (seconds since epoch).
             end_timestamp: Optional end time (seconds since epoch).
             limit: Maximum number of candles to fetch.
+            encode: Optional response encoder, as for ``get_ticker_price``.
 
         Returns:
             Dict containing exchange, symbol, interval and ohlcv list.
         """
+        candles = await ExchangeClient.get_ohlcv_candles(
+            exchange, symbol, interval, start_timestamp, end_timestamp, limit
+        )
+
+        def build(candles):
+            return {
+                "exchange": exchange,
+                "symbol": symbol,
+                "interval": interval,
+                "ohlcv": _candle_items(candles),
+            }
+
+        if encode is None:
+            return build(candles)
+        cache_key = _ohlcv_key(exchange, symbol, interval, start_timestamp, end_timestamp, limit)
+        return cache.encoded(cache_key, lambda c: encode(build(c)), candles)
+
+    @staticmethod
+    async def get_ohlcv_candles(
+        exchange: str,
+        symbol: str,
+        interval: str,
+        start_timestamp: int = None,
+        end_timestamp: int = None,
+        limit: int = 100,
+    ):
+        """Fetch OHLCV data as a structured NumPy candle array.
+
+        Same arguments as ``get_ohlcv``. Columnar and binary encoders use this
+        to serialize straight from the arrays instead of per-row dicts.
+
+        Returns:
+            Array with ``CANDLE_DTYPE`` fields; timestamps are in milliseconds.
+        """
         validate_exchange(exchange)
         await validate_symbol(exchange, symbol)
         if interval not in ['1m', '5m', '15m', '30m', '1h', '4h', '1d']:
             raise Exception(f"Interval '{interval}' not supported.")
-        cache_key = f"ohlcv:{exchange}:{symbol}:{interval}:{start_timestamp}:{end_timestamp}:{limit}"
-        if result := cache.get(cache_key):
+        cache_key = _ohlcv_key(exchange, symbol, interval, start_timestamp, end_timestamp, limit)
+        result = cache.get(cache_key)
+        if result is not None:
             return result
+        return await ExchangeClient._cached_fetch(
+            cache_key,
+            lambda: ExchangeClient._fetch_ohlcv(
+                exchange, symbol, interval, start_timestamp, end_timestamp, limit
+            ),
+        )
+
+    @staticmethod
+    async def _fetch_ohlcv(
+        exchange: str,
+        symbol: str,
+        interval: str,
+        start_timestamp: int,
+        end_timestamp: int,
+        limit: int,
+    ):
+        if start_timestamp and (limit or end_timestamp):
+            # Fixed ranges are paged and, when enabled, served from the local candle store
+            step, start, end = ExchangeClient._ohlcv_range(interval, start_timestamp, end_timestamp, limit)
+            return await candle_store.get_range(
+                exchange, symbol, interval, step, start, end,
+                lambda s, e: ExchangeClient._fetch_ohlcv_rows(exchange, symbol, interval, step, s, e),
+                persist=ExchangeClient._persist_candles(),
+                now=ExchangeClient._market_now(),
+            )
         ex = await ExchangeClient.get_exchange_instance(exchange)
-        attempts = 0
         since = start_timestamp * 1000 if start_timestamp else None
-        while attempts < 3:
-            try:
-                ohlcv = await ex.fetch_ohlcv(symbol, timeframe=interval, since=since, limit=limit)
-                # If end_timestamp is set, filter after fetch
-                if end_timestamp:
-                    ohlcv = [row for row in ohlcv if row[0] // 1000 <= end_timestamp]
-                items = []
-                for row in ohlcv:
-                    items.append(
-                        {
-                            "timestamp": row[0] // 1000,
-                            "open": row[1],
-                            "high": row[2],
-                            "low": row[3],
-                            "close": row[4],
-                            "volume": row[5],
-                        }
-                    )
-                result = {
-                    "exchange": exchange,
-                    "symbol": symbol,
-                    "interval": interval,
-                    "ohlcv": items,
-                }
-                cache.set(cache_key, result, ttl=settings.CACHE_TTL)
-                return result
-            except Exception as e:
-                logger.warning(f"Fetch OHLCV retry {attempts + 1} error: {e}")
-                attempts += 1
-                await asyncio.sleep(0.75 * attempts)
-        raise Exception(f"Could not fetch OHLCV for {exchange}:{symbol}:{interval}")
+        ohlcv = await ExchangeClient._fetch_ohlcv_page(ex, exchange, symbol, interval, since, limit)
+        # If end_timestamp is set, filter after fetch
+        if end_timestamp:
+            ohlcv = [row for row in ohlcv if row[0] // 1000 <= end_timestamp]
+        return to_candle_array(ohlcv)
+
+    @staticmethod
+    def _ohlcv_range(interval: str, start_timestamp: int, end_timestamp: int = None, limit: int = None):
+        """Translate request timestamps (s) into an aligned candle range (ms).
+
+        Returns:
+            Tuple of (step, start, end) in milliseconds.
+        """
+        step = ccxt.Exchange.parse_timeframe(interval) * 1000
+        start = -(-start_timestamp * 1000 // step) * step
+        if limit:
+            end = start + (limit - 1) * step
+        else:
+            end = end_timestamp * 1000 if end_timestamp else ExchangeClient._market_now()
+        if end_timestamp:
+            end = min(end, end_timestamp * 1000)
+        return step, start, end
+
+    @staticmethod
+    async def stream_ohlcv(
+        exchange: str,
+        symbol: str,
+        interval: str,
+        start_timestamp: int,
+        end_timestamp: int = None,
+    ):
+        """Validate a long OHLCV range and return an iterator over its pages.
+
+        Validation happens before the iterator is returned so errors surface
+        before a streaming response starts.
+
+        Args:
+            exchange: Exchange identifier.
+            symbol: Trading pair symbol.
+            interval: Timeframe string supported by CCXT (e.g., '1m', '1h').
+            start_timestamp: Start time (seconds since epoch).
+            end_timestamp: Optional end time (seconds since epoch), default now.
+
+        Returns:
+            Async iterator yielding lists of OHLCV item dicts in time order.
+        """
+        validate_exchange(exchange)
+        await validate_symbol(exchange, symbol)
+        if interval not in ['1m', '5m', '15m', '30m', '1h', '4h', '1d']:
+            raise Exception(f"Interval '{interval}' not supported.")
+        step, start, end = ExchangeClient._ohlcv_range(interval, start_timestamp, end_timestamp)
+        pages = candle_store.iter_range(
+            exchange, symbol, interval, step, start, end,
+            lambda s, e: ExchangeClient._fetch_ohlcv_rows(exchange, symbol, interval, step, s, e),
+            persist=ExchangeClient._persist_candles(),
+            now=ExchangeClient._market_now(),
+        )
+
+        async def items():
+            async for candles in pages:
+                yield _candle_items(candles)
+
+        return items()
+
+    @staticmethod
+    async def _fetch_ohlcv_rows(exchange: str, symbol: str, interval: str, step: int, start: int, end: int):
+        """Fetch raw OHLCV rows for [start, end] (ms), page by page."""
+        ex = await ExchangeClient.get_exchange_instance(exchange)
+        # Nothing exists past the candle forming now; don't page into the future
+        end = min(end, ExchangeClient._market_now() // step * step)
+        rows = []
+        since = start
+        while since <= end:
+            count = min(settings.OHLCV_PAGE_LIMIT, (end - since) // step + 1)
+            page = await ExchangeClient._fetch_ohlcv_page(ex, exchange, symbol, interval, since, count)
+            page = [row for row in page if since <= row[0] <= end]
+            if not page:
+                break
+            rows.extend(page)
+            since = page[-1][0] + step
+        return rows
+
+    @staticmethod
+    async def _fetch_ohlcv_page(ex, exchange: str, symbol: str, interval: str, since, limit):
+        return await upstream.call(
+            exchange, "fetch_ohlcv", lambda: ex.fetch_ohlcv(symbol, timeframe=interval, since=since, limit=limit),
+            f"Could not fetch OHLCV for {exchange}:{symbol}:{interval}",
+        )
 
     @staticmethod
     async def get_supported_exchanges():
         """Return the list of exchanges supported by CCXT."""
-        return ccxt.exchanges
+        return markets_registry.exchange_ids()
 
     @staticmethod
     async def get_symbols(exchange: str):
         """Return a list of tradable symbols for the given exchange.
 
-        Results are cached for a longer TTL since symbols change infrequently.
+        Symbols come from the shared markets registry, which is also used by
+        symbol validation and refreshes itself in the background.
         """
         validate_exchange(exchange)
-        cache_key = f"symbols:{exchange}"
-        if result := cache.get(cache_key):
-            return result
-        ex = await ExchangeClient.get_exchange_instance(exchange)
-        markets = await ex.load_markets()
-        symbols = list(markets.keys())
-        cache.set(cache_key, symbols, ttl=300)
-        return symbols
\ No newline at end of file
+        return await singleflight.do(
+            f"symbols:{exchange}", lambda: markets_registry.get_symbols(exchange)
+        )
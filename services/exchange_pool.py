@@ -0,0 +1,157 @@
+import asyncio
+import functools
+import logging
+import ssl
+from concurrent.futures import ThreadPoolExecutor
+
+from config import settings
+
+logger = logging.getLogger("exchange_pool")
+
+
+def _split(value: str):
+    return [v.strip() for v in (value or "").split(",") if v.strip()]
+
+
+class ThreadedExchange:
+    """Async facade over a synchronous ccxt exchange.
+
+    Method calls are executed on the pool's thread executor so blocking HTTP
+    requests never run on the event loop. Plain attributes are passed through.
+    """
+
+    def __init__(self, exchange, executor):
+        self._exchange = exchange
+        self._executor = executor
+
+    def __getattr__(self, name):
+        attr = getattr(self._exchange, name)
+        if not callable(attr):
+            return attr
+
+        async def call(*args, **kwargs):
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._executor, functools.partial(attr, *args, **kwargs))
+
+        return call
+
+    async def close(self):
+        return None
+
+
+class ExchangePool:
+    """Process-wide pool of ccxt exchange instances sharing one HTTP session.
+
+    Async ccxt instances are created lazily and all reuse a single aiohttp
+    session whose connector keeps connections alive and caps them in total
+    and per host. Exchanges listed in ``EXCHANGE_SYNC_EXCHANGES``, or missing
+    from ``ccxt.async_support``, fall back to the synchronous client run on a
+    thread pool. The pool is bound to the event loop that created it.
+    """
+
+    def __init__(self):
+        self._instances = {}
+        self._session = None
+        self._loop = None
+        self._executor = None
+        self._lock = None
+
+    async def get(self, exchange: str):
+        """Return the pooled instance for ``exchange``, creating it if needed.
+
+        Args:
+            exchange: Exchange id string (e.g., 'binance').
+
+        Returns:
+            An async ccxt exchange, or a ThreadedExchange for sync-only venues.
+        """
+        self._bind_loop()
+        if exchange in self._instances:
+            return self._instances[exchange]
+        async with self._lock:
+            if exchange not in self._instances:
+                self._instances[exchange] = self._create(exchange)
+            return self._instances[exchange]
+
+    async def warm_up(self, exchanges=None):
+        """Create instances and load markets for the configured exchanges.
+
+        Failures are logged and do not prevent startup.
+        """
+        from services.markets_service import markets_registry
+
+        exchanges = _split(settings.EXCHANGE_WARMUP) if exchanges is None else exchanges
+        results = await asyncio.gather(
+            *(markets_registry.get_symbols(ex) for ex in exchanges), return_exceptions=True
+        )
+        for ex, res in zip(exchanges, results):
+            if isinstance(res, Exception):
+                logger.warning(f"Warm-up for {ex} failed: {res}")
+            else:
+                logger.info(f"Warmed up {ex} with {len(res)} markets")
+
+    async def close(self):
+        """Close every pooled exchange and the shared HTTP session."""
+        instances = list(self._instances.values())
+        self._instances.clear()
+        for ex in instances:
+            try:
+                await ex.close()
+            except Exception as e:
+                logger.warning(f"Closing exchange failed: {e}")
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+        self._loop = None
+
+    def _bind_loop(self):
+        loop = asyncio.get_running_loop()
+        if self._loop is loop:
+            return
+        if self._loop is not None:
+            # The previous loop is gone (e.g. a test client); its sessions can't be reused
+            logger.info("Event loop changed, resetting exchange pool")
+            self._instances.clear()
+            self._session = None
+        self._loop = loop
+        self._lock = asyncio.Lock()
+
+    def _shared_session(self):
+        # aiohttp and ccxt are imported on first use to keep startup fast
+        import aiohttp
+        import certifi
+
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(
+                ssl=ssl.create_default_context(cafile=certifi.where()),
+                limit=settings.EXCHANGE_POOL_LIMIT,
+                limit_per_host=settings.EXCHANGE_POOL_LIMIT_PER_HOST,
+                keepalive_timeout=settings.EXCHANGE_POOL_KEEPALIVE,
+                ttl_dns_cache=300,
+                enable_cleanup_closed=True,
+            )
+            self._session = aiohttp.ClientSession(connector=connector)
+        return self._session
+
+    def _create(self, exchange: str):
+        import ccxt
+        import ccxt.async_support as ccxt_async
+
+        config = {'enableRateLimit': True, 'rateLimit': 1200}
+        async_class = getattr(ccxt_async, exchange, None)
+        if async_class is not None and exchange not in _split(settings.EXCHANGE_SYNC_EXCHANGES):
+            return async_class({**config, 'session': self._shared_session(), 'asyncio_loop': self._loop})
+        sync_class = getattr(ccxt, exchange, None)
+        if sync_class is None:
+            raise Exception(f"Exchange '{exchange}' not supported in CCXT.")
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=settings.EXCHANGE_THREAD_POOL_SIZE, thread_name_prefix="ccxt-sync"
+            )
+        return ThreadedExchange(sync_class(config), self._executor)
+
+
+exchange_pool = ExchangePool()
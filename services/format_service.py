@@ -0,0 +1,147 @@
+import json
+
+import numpy as np
+
+try:
+    import msgpack
+except ImportError:  # optional dependency
+    msgpack = None
+
+try:
+    import orjson
+except ImportError:  # optional dependency; json is used instead
+    orjson = None
+
+from services.startup import lazy_import
+
+# optional dependency; imported on first Arrow response since it is slow to load
+pa = lazy_import("pyarrow")
+
+JSON = "application/json"
+COLUMNAR_JSON = "application/vnd.mcp.columnar+json"
+MSGPACK = "application/msgpack"
+ARROW = "application/vnd.apache.arrow.stream"
+
+# Short names accepted in the ``format`` query parameter
+FORMATS = {
+    "json": JSON,
+    "columnar": COLUMNAR_JSON,
+    "msgpack": MSGPACK,
+    "arrow": ARROW,
+}
+
+_ALIASES = {
+    "application/x-msgpack": MSGPACK,
+    "application/vnd.msgpack": MSGPACK,
+    "application/vnd.apache.arrow.file": ARROW,
+}
+
+
+def available_formats():
+    """Return the media types that can be produced with installed libraries."""
+    media_types = [JSON, COLUMNAR_JSON]
+    if msgpack is not None:
+        media_types.append(MSGPACK)
+    if pa is not None:
+        media_types.append(ARROW)
+    return media_types
+
+
+def negotiate(accept: str = None, fmt: str = None):
+    """Pick the response media type from a ``format`` name or Accept header.
+
+    Args:
+        accept: Raw Accept header value.
+        fmt: Optional explicit format name (json, columnar, msgpack, arrow),
+            which takes precedence over the header.
+
+    Returns:
+        The chosen media type; JSON when nothing more specific matches.
+
+    Raises:
+        ValueError: If an explicitly requested format is unknown or its
+            library is not installed.
+    """
+    available = available_formats()
+    if fmt:
+        media_type = FORMATS.get(fmt.lower())
+        if media_type is None or media_type not in available:
+            raise ValueError(f"Format '{fmt}' not supported. Available: {', '.join(available)}")
+        return media_type
+    candidates = []
+    for i, part in enumerate((accept or "").split(",")):
+        media, _, params = part.strip().partition(";")
+        q = 1.0
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        media = _ALIASES.get(media.strip().lower(), media.strip().lower())
+        if media in available and q > 0:
+            candidates.append((-q, i, media))
+    return min(candidates)[2] if candidates else JSON
+
+
+def _nullable(values: np.ndarray):
+    if values.dtype.kind == 'f' and np.isnan(values).any():
+        return np.where(np.isnan(values), None, values).tolist()
+    return values.tolist()
+
+
+def encode_columns(meta: dict, columns: dict, media_type: str) -> bytes:
+    """Encode equal-length column arrays plus metadata in a non-row format.
+
+    Args:
+        meta: Scalar fields such as exchange, symbol and interval.
+        columns: Mapping of column name to 1-D NumPy array.
+        media_type: One of COLUMNAR_JSON, MSGPACK or ARROW.
+
+    Returns:
+        Encoded response body.
+    """
+    if media_type == ARROW:
+        table = pa.table(
+            {name: pa.array(np.ascontiguousarray(values)) for name, values in columns.items()},
+            metadata={k: str(v) for k, v in meta.items()},
+        )
+        sink = pa.BufferOutputStream()
+        with pa.ipc.new_stream(sink, table.schema) as writer:
+            writer.write_table(table)
+        return sink.getvalue().to_pybytes()
+    payload = {**meta, "columns": {name: _nullable(values) for name, values in columns.items()}}
+    if media_type == MSGPACK:
+        return msgpack.packb(payload, use_bin_type=True)
+    return json.dumps(payload, separators=(",", ":")).encode()
+
+
+def dumps(payload) -> bytes:
+    """Encode plain Python data as compact JSON bytes, with orjson when installed."""
+    if orjson is not None:
+        return orjson.dumps(payload)
+    return json.dumps(payload, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode()
+
+
+def encode_model(model):
+    """Return an encoder validating data through ``model`` and dumping it as JSON.
+
+    The output matches what FastAPI produces for ``response_model=model``,
+    so routes can send pre-serialized bytes without changing the schema.
+    """
+    def encode(data) -> bytes:
+        return dumps(model(**data).model_dump(mode="json"))
+    return encode
+
+
+def ohlcv_columns(candles):
+    """Split a candle array into OHLCV columns with timestamps in seconds."""
+    return {
+        "timestamp": candles['timestamp'] // 1000,
+        "open": candles['open'],
+        "high": candles['high'],
+        "low": candles['low'],
+        "close": candles['close'],
+        "volume": candles['volume'],
+    }
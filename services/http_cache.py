@@ -0,0 +1,87 @@
+import hashlib
+import math
+import time
+
+from fastapi import Request
+from fastapi.exceptions import RequestValidationError
+from fastapi.responses import Response
+from pydantic import ValidationError
+
+from services.cache_service import cache
+from services.format_service import JSON
+
+
+def etag(body: bytes) -> str:
+    """Return a strong ETag for a response body.
+
+    Tags are taken from the bytes rather than a per-process counter, so
+    every worker agrees on them and a refresh that fetched identical data
+    keeps its tag.
+    """
+    return '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+
+
+def matches(if_none_match: str, tag: str) -> bool:
+    """Check an If-None-Match header against ``tag`` (weak comparison, as RFC 9110 asks for GET)."""
+    if not if_none_match:
+        return False
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*" or candidate.removeprefix("W/") == tag:
+            return True
+    return False
+
+
+def query_model(model, **params):
+    """Validate GET query parameters with the request model of the POST route.
+
+    Failures raise ``RequestValidationError``, so they are reported exactly
+    like an invalid POST body.
+    """
+    try:
+        return model(**params)
+    except ValidationError as e:
+        raise RequestValidationError(e.errors())
+
+
+async def track_expiry():
+    """Route dependency recording when the cache entries a GET read serves expire."""
+    cache.track_expiry()
+
+
+def max_age(namespace: str) -> int:
+    """Seconds a response may be reused: what is left of the earliest expiring entry it used.
+
+    Stale entries served during a refresh give 0. Responses that read no
+    cache entry fall back to the TTL of ``namespace``.
+    """
+    expires_at = cache.served_expiry()
+    if expires_at is None:
+        return int(cache.ttl_for(namespace))
+    return max(0, math.ceil(expires_at - time.time()))
+
+
+def conditional_response(request: Request, body: bytes, namespace: str, media_type: str = JSON, vary: str = None):
+    """Build a cacheable response for a GET read, or 304 if the client already has it.
+
+    Routes using this depend on ``track_expiry`` so ``max-age`` covers only
+    the remaining lifetime of the cached data behind ``body``.
+
+    Args:
+        request: Incoming request, read for ``If-None-Match``.
+        body: Encoded response body.
+        namespace: Cache namespace whose TTL is the fallback ``max-age``.
+        media_type: Content type of ``body``.
+        vary: Optional ``Vary`` header, for bodies that depend on request headers.
+
+    Returns:
+        A 200 response with ``ETag`` and ``Cache-Control``, or a bodiless 304
+        carrying the same headers.
+    """
+    tag = etag(body)
+    headers = {"ETag": tag, "Cache-Control": f"public, max-age={max_age(namespace)}"}
+    if vary:
+        headers["Vary"] = vary
+    if matches(request.headers.get("if-none-match"), tag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type=media_type, headers=headers)
@@ -0,0 +1,374 @@
+import json
+import logging
+import os
+import time
+from collections import deque
+
+import numpy as np
+
+from config import settings
+from services.startup import lazy_import
+
+ccxt = lazy_import("ccxt")
+
+logger = logging.getLogger("market_replay")
+
+INDEX_DTYPE = np.dtype([('timestamp', '<i8'), ('offset', '<i8')])
+
+
+def _now_ms():
+    return int(time.time() * 1000)
+
+
+def _strip(record):
+    # Raw exchange payloads double the size of every record and are never served
+    return {k: v for k, v in record.items() if k != 'info'}
+
+
+def stream_path(root: str, exchange: str, symbol: str, kind: str, timeframe: str = None):
+    """Return the data file path of one recorded stream (index is ``.idx`` next to it)."""
+    safe_symbol = symbol.replace('/', '-').replace(':', '_')
+    name = f"{kind}-{timeframe}" if timeframe else kind
+    return os.path.join(root, exchange, safe_symbol, f"{name}.jsonl")
+
+
+class _StreamWriter:
+    """Append-only JSON-lines data file plus a binary (timestamp, offset) index."""
+
+    def __init__(self, path: str):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._data = open(path, 'ab')
+        self._index = open(path[:-len('.jsonl')] + '.idx', 'ab')
+        self._offset = os.path.getsize(path)
+
+    def append(self, timestamp: int, payload):
+        line = json.dumps(payload, separators=(',', ':')).encode() + b'\n'
+        self._data.write(line)
+        self._data.flush()
+        self._index.write(np.array([(timestamp, self._offset)], dtype=INDEX_DTYPE).tobytes())
+        self._index.flush()
+        self._offset += len(line)
+
+    def close(self):
+        self._data.close()
+        self._index.close()
+
+
+class _StreamReader:
+    """Timestamp-sorted view of a recorded stream.
+
+    The index is loaded once and sorted by timestamp, so locating any point
+    in time is a binary search; only the records actually served are read
+    from the data file. For candles, a timestamp recorded several times keeps
+    its last (most complete) version.
+    """
+
+    def __init__(self, path: str, dedupe: bool = False):
+        self._path = path
+        index = np.fromfile(path[:-len('.jsonl')] + '.idx', dtype=INDEX_DTYPE)
+        index = index[np.lexsort((index['offset'], index['timestamp']))]
+        if dedupe and len(index):
+            ts = index['timestamp']
+            index = index[np.r_[ts[1:] != ts[:-1], True]]
+        self.timestamps = np.ascontiguousarray(index['timestamp'])
+        self._offsets = index['offset']
+        self._file = open(path, 'rb')
+
+    def __len__(self):
+        return len(self.timestamps)
+
+    def at_or_before(self, timestamp):
+        """Position of the last record at or before ``timestamp``, or -1."""
+        return int(np.searchsorted(self.timestamps, timestamp, side='right')) - 1
+
+    def read(self, position: int):
+        self._file.seek(int(self._offsets[position]))
+        return json.loads(self._file.readline())
+
+    def read_range(self, start, end, limit=None):
+        """Records with ``start <= timestamp <= end``; the newest ``limit`` if no start."""
+        hi = int(np.searchsorted(self.timestamps, end, side='right'))
+        if start is None:
+            lo = max(0, hi - limit) if limit else 0
+        else:
+            lo = int(np.searchsorted(self.timestamps, start, side='left'))
+            if limit:
+                hi = min(hi, lo + limit)
+        return [self.read(i) for i in range(lo, hi)]
+
+    def close(self):
+        self._file.close()
+
+
+class RecordingExchange:
+    """Proxy around a live exchange instance that records what it returns.
+
+    Market data methods pass straight through to the wrapped instance and
+    append the response to the recorder; every other attribute is the
+    wrapped instance's own.
+    """
+
+    def __init__(self, exchange: str, ex, recorder):
+        self._exchange = exchange
+        self._ex = ex
+        self._recorder = recorder
+
+    def __getattr__(self, name):
+        return getattr(self._ex, name)
+
+    async def load_markets(self, reload=False):
+        markets = await self._ex.load_markets(reload) if reload else await self._ex.load_markets()
+        self._recorder.record_markets(self._exchange, markets)
+        return markets
+
+    async def fetch_ticker(self, symbol, **kwargs):
+        ticker = await self._ex.fetch_ticker(symbol, **kwargs)
+        self._recorder.record_snapshot(self._exchange, symbol, 'ticker', ticker)
+        return ticker
+
+    async def fetch_tickers(self, symbols=None, **kwargs):
+        tickers = await self._ex.fetch_tickers(symbols, **kwargs)
+        for symbol, ticker in tickers.items():
+            self._recorder.record_snapshot(self._exchange, symbol, 'ticker', ticker)
+        return tickers
+
+    async def fetch_order_book(self, symbol, limit=None, **kwargs):
+        orderbook = await self._ex.fetch_order_book(symbol, limit, **kwargs)
+        self._recorder.record_snapshot(self._exchange, symbol, 'orderbook', orderbook)
+        return orderbook
+
+    async def fetch_trades(self, symbol, since=None, limit=None, **kwargs):
+        trades = await self._ex.fetch_trades(symbol, since=since, limit=limit, **kwargs)
+        self._recorder.record_trades(self._exchange, symbol, trades)
+        return trades
+
+    async def fetch_ohlcv(self, symbol, timeframe='1m', since=None, limit=None, **kwargs):
+        rows = await self._ex.fetch_ohlcv(symbol, timeframe=timeframe, since=since, limit=limit, **kwargs)
+        self._recorder.record_candles(self._exchange, symbol, timeframe, rows)
+        return rows
+
+
+class MarketRecorder:
+    """Record upstream market data to append-only files for later replay.
+
+    Layout under ``root``: ``<exchange>/markets.json`` plus, per symbol,
+    ``ticker``, ``orderbook``, ``trades`` and ``ohlcv-<timeframe>`` streams.
+    Each stream is a JSON-lines data file with a binary index of
+    (timestamp, byte offset) pairs. Tickers and order books are stamped
+    with the local receive time; trades and candles with their own
+    timestamps, and trades already recorded are skipped.
+    """
+
+    def __init__(self, root=None, seen_trades=10000):
+        self.root = settings.MARKET_DATA_DIR if root is None else root
+        self._writers = {}
+        self._wrappers = {}
+        self._seen = {}
+        self._seen_trades = seen_trades
+        self.records = 0
+
+    def wrap(self, exchange: str, ex):
+        """Return a recording proxy for a live exchange instance."""
+        wrapper = self._wrappers.get(exchange)
+        if wrapper is None or wrapper._ex is not ex:
+            wrapper = self._wrappers[exchange] = RecordingExchange(exchange, ex, self)
+        return wrapper
+
+    def _writer(self, exchange, symbol, kind, timeframe=None):
+        path = stream_path(self.root, exchange, symbol, kind, timeframe)
+        writer = self._writers.get(path)
+        if writer is None:
+            writer = self._writers[path] = _StreamWriter(path)
+            self._mark_started()
+        return writer
+
+    def _mark_started(self):
+        path = os.path.join(self.root, 'recording.json')
+        if not os.path.exists(path):
+            os.makedirs(self.root, exist_ok=True)
+            with open(path, 'w') as f:
+                json.dump({'started': _now_ms()}, f)
+
+    def record_markets(self, exchange: str, markets):
+        path = os.path.join(self.root, exchange, 'markets.json')
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = path + '.tmp'
+        with open(tmp, 'w') as f:
+            json.dump({symbol: _strip(market) for symbol, market in markets.items()}, f, separators=(',', ':'))
+        os.replace(tmp, path)
+
+    def record_snapshot(self, exchange: str, symbol: str, kind: str, payload):
+        self._writer(exchange, symbol, kind).append(_now_ms(), _strip(payload))
+        self.records += 1
+
+    def record_trades(self, exchange: str, symbol: str, trades):
+        writer = self._writer(exchange, symbol, 'trades')
+        order, seen = self._seen.setdefault(writer, (deque(), set()))
+        for trade in trades:
+            key = trade.get('id') or (trade.get('timestamp'), trade.get('price'), trade.get('amount'))
+            if key in seen:
+                continue
+            seen.add(key)
+            order.append(key)
+            if len(order) > self._seen_trades:
+                seen.discard(order.popleft())
+            writer.append(trade.get('timestamp') or 0, _strip(trade))
+            self.records += 1
+
+    def record_candles(self, exchange: str, symbol: str, timeframe: str, rows):
+        writer = self._writer(exchange, symbol, 'ohlcv', timeframe)
+        for row in rows:
+            writer.append(row[0], list(row[:6]))
+            self.records += 1
+
+    def close(self):
+        if self.records:
+            logger.info(f"Recorded {self.records} market data records to {self.root}")
+        for writer in self._writers.values():
+            writer.close()
+        self._writers.clear()
+        self._seen.clear()
+
+
+class ReplayClock:
+    """Virtual market time in ms, running ``speed`` times faster than the wall clock.
+
+    A speed of 0 or less means "as fast as possible": there is no clock and
+    each read of a ticker or order book stream returns its next record.
+    """
+
+    def __init__(self, speed: float, origin: int = 0):
+        self.speed = speed
+        self.seek(origin)
+
+    def seek(self, timestamp: int):
+        self.origin = timestamp
+        self._wall = time.monotonic()
+
+    def now(self):
+        if self.speed <= 0:
+            return None
+        return self.origin + int((time.monotonic() - self._wall) * 1000 * self.speed)
+
+
+class ReplayExchange:
+    """ccxt-like exchange serving recorded data at the replay clock's time."""
+
+    def __init__(self, exchange: str, replay):
+        self.id = exchange
+        self._replay = replay
+        self.has = {'fetchTickers': True, 'fetchOHLCV': True, 'fetchTrades': True, 'fetchOrderBook': True}
+
+    async def load_markets(self, reload=False):
+        path = os.path.join(self._replay.root, self.id, 'markets.json')
+        if not os.path.exists(path):
+            raise ccxt.ExchangeNotAvailable(f"No recorded markets for {self.id}")
+        with open(path) as f:
+            return json.load(f)
+
+    async def fetch_ticker(self, symbol, params=None):
+        return self._replay.snapshot(self.id, symbol, 'ticker')
+
+    async def fetch_tickers(self, symbols=None, params=None):
+        tickers = {}
+        for symbol in symbols or []:
+            try:
+                tickers[symbol] = self._replay.snapshot(self.id, symbol, 'ticker')
+            except ccxt.BaseError:
+                continue
+        return tickers
+
+    async def fetch_order_book(self, symbol, limit=None, params=None):
+        orderbook = self._replay.snapshot(self.id, symbol, 'orderbook')
+        if limit:
+            orderbook['bids'] = orderbook['bids'][:limit]
+            orderbook['asks'] = orderbook['asks'][:limit]
+        return orderbook
+
+    async def fetch_trades(self, symbol, since=None, limit=None, params=None):
+        return self._replay.rows(self.id, symbol, 'trades', None, since, limit)
+
+    async def fetch_ohlcv(self, symbol, timeframe='1m', since=None, limit=None, params=None):
+        return self._replay.rows(self.id, symbol, 'ohlcv', timeframe, since, limit)
+
+    async def close(self):
+        return None
+
+
+class MarketReplay:
+    """Serve recorded market data as if it came from the exchanges.
+
+    Tickers and order books return the last snapshot at or before the
+    replay clock; trades and candles return recorded rows up to it. The
+    clock starts at ``start`` (default: the recording's start) and runs at
+    ``speed``; ``seek`` jumps anywhere in O(log n) per stream.
+    """
+
+    def __init__(self, root=None, speed=None, start=None):
+        self.root = settings.MARKET_DATA_DIR if root is None else root
+        speed = settings.REPLAY_SPEED if speed is None else speed
+        start = settings.REPLAY_START if start is None else start
+        self.clock = ReplayClock(speed, start or self._recording_start())
+        self._readers = {}
+        self._cursors = {}
+        self._exchanges = {}
+
+    def _recording_start(self):
+        path = os.path.join(self.root, 'recording.json')
+        if not os.path.exists(path):
+            return 0
+        with open(path) as f:
+            return json.load(f)['started']
+
+    def exchange(self, exchange: str):
+        """Return the replay exchange instance for an exchange id."""
+        ex = self._exchanges.get(exchange)
+        if ex is None:
+            ex = self._exchanges[exchange] = ReplayExchange(exchange, self)
+        return ex
+
+    def seek(self, timestamp: int):
+        """Move the replay clock to ``timestamp`` (ms) and restart playback from there."""
+        self.clock.seek(timestamp)
+        self._cursors.clear()
+
+    def _reader(self, exchange, symbol, kind, timeframe=None):
+        path = stream_path(self.root, exchange, symbol, kind, timeframe)
+        reader = self._readers.get(path)
+        if reader is None:
+            if not os.path.exists(path):
+                raise ccxt.BadSymbol(f"No recorded {kind} data for {exchange}:{symbol}")
+            reader = self._readers[path] = _StreamReader(path, dedupe=kind == 'ohlcv')
+        return reader
+
+    def snapshot(self, exchange: str, symbol: str, kind: str):
+        """Return the ticker or order book snapshot current at the replay clock."""
+        reader = self._reader(exchange, symbol, kind)
+        now = self.clock.now()
+        if now is None:
+            position = self._cursors.get(reader)
+            if position is None:
+                position = max(reader.at_or_before(self.clock.origin - 1) + 1, 0)
+            self._cursors[reader] = position + 1
+            position = min(position, len(reader) - 1)
+        else:
+            position = reader.at_or_before(now)
+        if position < 0:
+            raise ccxt.ExchangeError(f"No {kind} data for {exchange}:{symbol} recorded before {now}")
+        return reader.read(position)
+
+    def rows(self, exchange: str, symbol: str, kind: str, timeframe, since, limit):
+        """Return recorded trades or candles from ``since`` up to the replay clock."""
+        reader = self._reader(exchange, symbol, kind, timeframe)
+        now = self.clock.now()
+        return reader.read_range(since, np.iinfo(np.int64).max if now is None else now, limit)
+
+    def close(self):
+        for reader in self._readers.values():
+            reader.close()
+        self._readers.clear()
+        self._cursors.clear()
+
+
+market_recorder = MarketRecorder()
+market_replay = MarketReplay()
@@ -0,0 +1,188 @@
+import asyncio
+from importlib import metadata
+import json
+import logging
+import os
+import time
+
+from config import settings
+from services.startup import lazy_import
+
+ccxt = lazy_import("ccxt")
+
+logger = logging.getLogger("markets_service")
+
+# Bump when the snapshot layout changes; older files are ignored
+SNAPSHOT_VERSION = 1
+
+
+def _ccxt_version():
+    try:
+        return metadata.version("ccxt")
+    except metadata.PackageNotFoundError:
+        return None
+
+
+async def _load_exchange_markets(exchange: str):
+    """Load market metadata through the shared ExchangeClient instance.
+
+    Async ccxt instances are awaited directly; synchronous ones are pushed to
+    a worker thread so the event loop is never blocked by the download.
+    """
+    from services.exchange_client import ExchangeClient
+
+    ex = await ExchangeClient.get_exchange_instance(exchange)
+    if asyncio.iscoroutinefunction(ex.load_markets):
+        return await ex.load_markets()
+    return await asyncio.to_thread(ex.load_markets)
+
+
+class MarketsRegistry:
+    """Process-wide registry of exchange markets shared by validation and lookups.
+
+    Markets are loaded once per exchange and kept in memory. Symbol checks are
+    O(1) set lookups. Entries older than the TTL keep being served while a
+    single background refresh runs, and concurrent loads for the same exchange
+    are collapsed into one in-flight task.
+
+    Every load is also written to an on-disk snapshot tagged with a format
+    version and the installed ccxt version. ``load_snapshot`` restores it at
+    boot so the first request per exchange skips ``load_markets``;
+    ``revalidate`` then reloads those exchanges in the background.
+    """
+
+    def __init__(self, ttl=None, loader=None, snapshot_path=None):
+        self.ttl = settings.MARKETS_TTL if ttl is None else ttl
+        self._loader = loader or _load_exchange_markets
+        self.snapshot_path = settings.MARKETS_SNAPSHOT_PATH if snapshot_path is None else snapshot_path
+        self._entries = {}
+        self._inflight = {}
+        self._exchange_ids = None
+
+    def exchange_ids(self):
+        """Return the ids of the exchanges ccxt supports.
+
+        Taken from the markets snapshot when one was loaded, so validating an
+        exchange does not have to import ccxt.
+        """
+        if self._exchange_ids is None:
+            self._exchange_ids = list(ccxt.exchanges)
+        return self._exchange_ids
+
+    def load_snapshot(self):
+        """Restore exchange ids and markets from the on-disk snapshot.
+
+        Entries keep the time they were originally loaded, so ones older than
+        the TTL are served stale while they refresh. A missing, unreadable or
+        outdated snapshot is ignored.
+
+        Returns:
+            Number of exchanges restored.
+        """
+        if not self.snapshot_path or not os.path.exists(self.snapshot_path):
+            return 0
+        try:
+            with open(self.snapshot_path) as f:
+                snapshot = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable markets snapshot: {e}")
+            return 0
+        if snapshot.get("version") != SNAPSHOT_VERSION or snapshot.get("ccxt") != _ccxt_version():
+            logger.info("Ignoring markets snapshot from another ccxt or snapshot version")
+            return 0
+        self._exchange_ids = snapshot["exchanges"]
+        for exchange, saved in snapshot["markets"].items():
+            if exchange not in self._entries:
+                self._entries[exchange] = self._entry(saved["symbols"], saved["loaded_at"])
+        return len(snapshot["markets"])
+
+    def revalidate(self):
+        """Start a background reload of every exchange currently held."""
+        return [self._start_load(exchange) for exchange in list(self._entries)]
+
+    def _save_snapshot(self):
+        snapshot = {
+            "version": SNAPSHOT_VERSION,
+            "ccxt": _ccxt_version(),
+            "saved_at": time.time(),
+            "exchanges": self.exchange_ids(),
+            "markets": {
+                exchange: {"symbols": entry['symbols'], "loaded_at": entry['loaded_at']}
+                for exchange, entry in self._entries.items()
+            },
+        }
+        directory = os.path.dirname(self.snapshot_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp = self.snapshot_path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(snapshot, f, separators=(",", ":"))
+        os.replace(tmp, self.snapshot_path)
+
+    async def get_symbols(self, exchange: str):
+        """Return the list of symbols listed on an exchange.
+
+        Args:
+            exchange: Exchange id string (e.g., 'binance').
+
+        Returns:
+            List of symbol strings in CCXT format.
+        """
+        entry = await self._get_entry(exchange)
+        return entry['symbols']
+
+    async def has_symbol(self, exchange: str, symbol: str) -> bool:
+        """Return True when the symbol is listed on the exchange."""
+        entry = await self._get_entry(exchange)
+        return symbol in entry['symbol_set']
+
+    def invalidate(self, exchange: str = None):
+        """Drop cached markets for one exchange, or for all exchanges."""
+        if exchange is None:
+            self._entries.clear()
+        else:
+            self._entries.pop(exchange, None)
+
+    async def _get_entry(self, exchange: str):
+        entry = self._entries.get(exchange)
+        if entry is None:
+            return await asyncio.shield(self._start_load(exchange))
+        if time.time() - entry['loaded_at'] > self.ttl:
+            # Serve the stale entry while a single background refresh runs
+            self._start_load(exchange)
+        return entry
+
+    def _start_load(self, exchange: str):
+        task = self._inflight.get(exchange)
+        if task is None:
+            task = asyncio.ensure_future(self._load(exchange))
+            self._inflight[exchange] = task
+            task.add_done_callback(lambda t: self._on_load_done(exchange, t))
+        return task
+
+    def _on_load_done(self, exchange: str, task):
+        self._inflight.pop(exchange, None)
+        if not task.cancelled() and task.exception() is not None:
+            logger.warning(f"Markets load for {exchange} failed: {task.exception()}")
+
+    @staticmethod
+    def _entry(symbols, loaded_at):
+        return {
+            'symbols': symbols,
+            'symbol_set': frozenset(symbols),
+            'loaded_at': loaded_at,
+        }
+
+    async def _load(self, exchange: str):
+        markets = await self._loader(exchange)
+        entry = self._entry(list(markets.keys()), time.time())
+        self._entries[exchange] = entry
+        if self.snapshot_path:
+            try:
+                self._save_snapshot()
+            except OSError as e:
+                logger.warning(f"Saving markets snapshot failed: {e}")
+        return entry
+
+
+markets_registry = MarketsRegistry()
@@ -1,4 +1,12 @@
-from prometheus_client import Counter, Histogram
+import asyncio
+import time
+
+from prometheus_client import Counter, Gauge, Histogram, Summary, REGISTRY
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+
+# Endpoint labels are route templates (e.g. /api/v1/utils/symbols/{exchange}),
+# never raw paths, so label cardinality stays bounded by the route table.
+UNMATCHED_ROUTE = "unmatched"
 
 # Labels: method, endpoint, status_code
 REQUEST_COUNT = Counter(
@@ -30,3 +38,166 @@ def observe_request(method: str, endpoint: str, status_code: int, duration: floa
     except Exception:
         # Metrics should never raise to avoid affecting request handling
         pass
+
+
+# Labels: namespace (ticker, orderbook, tradehistory, ohlcv, symbols)
+COALESCED_COUNT = Counter(
+    "mcp_coalesced_requests_total",
+    "Upstream calls avoided by joining an identical in-flight call",
+    ["namespace"],
+)
+
+
+def observe_coalesced(namespace: str) -> None:
+    """Record one caller that joined an in-flight upstream call.
+
+    Args:
+        namespace: Cache key namespace of the coalesced call.
+    """
+    try:
+        COALESCED_COUNT.labels(namespace=namespace).inc()
+    except Exception:
+        pass
+
+
+REQUESTS_IN_FLIGHT = Gauge(
+    "mcp_requests_in_flight",
+    "HTTP requests currently being handled",
+)
+
+METRICS_OVERHEAD = Summary(
+    "mcp_metrics_overhead_seconds",
+    "Time spent recording request metrics per request",
+)
+
+# Labels: exchange, method (ccxt method name, e.g. fetch_ticker)
+UPSTREAM_LATENCY = Histogram(
+    "mcp_upstream_latency_seconds",
+    "Latency of individual upstream exchange calls",
+    ["exchange", "method"],
+    buckets=(0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0),
+)
+
+# Labels: exchange, method, error (exception class name, e.g. RequestTimeout)
+UPSTREAM_ERRORS = Counter(
+    "mcp_upstream_errors_total",
+    "Failed upstream exchange calls",
+    ["exchange", "method", "error"],
+)
+
+# Labels: exchange, method
+UPSTREAM_RETRIES = Counter(
+    "mcp_upstream_retries_total",
+    "Upstream calls retried after a transient error",
+    ["exchange", "method"],
+)
+
+# Labels: exchange, method
+UPSTREAM_HEDGES = Counter(
+    "mcp_upstream_hedged_total",
+    "Hedged duplicate upstream calls sent after the rolling p95",
+    ["exchange", "method"],
+)
+
+# Labels: exchange
+UPSTREAM_IN_FLIGHT = Gauge(
+    "mcp_upstream_in_flight",
+    "Upstream exchange calls currently running",
+    ["exchange"],
+)
+
+LOOP_LAG = Gauge(
+    "mcp_event_loop_lag_seconds",
+    "How late the event loop woke up for the last lag probe",
+)
+
+
+def observe_upstream(exchange: str, method: str, duration: float, error: Exception = None) -> None:
+    """Record one upstream call attempt.
+
+    Args:
+        exchange: Exchange id.
+        method: ccxt method name.
+        duration: Attempt duration in seconds.
+        error: The exception raised by the attempt, if any.
+    """
+    try:
+        UPSTREAM_LATENCY.labels(exchange=exchange, method=method).observe(duration)
+        if error is not None:
+            UPSTREAM_ERRORS.labels(exchange=exchange, method=method, error=type(error).__name__).inc()
+    except Exception:
+        pass
+
+
+def observe_retry(exchange: str, method: str) -> None:
+    try:
+        UPSTREAM_RETRIES.labels(exchange=exchange, method=method).inc()
+    except Exception:
+        pass
+
+
+def observe_hedge(exchange: str, method: str) -> None:
+    try:
+        UPSTREAM_HEDGES.labels(exchange=exchange, method=method).inc()
+    except Exception:
+        pass
+
+
+async def monitor_loop_lag(interval: float) -> None:
+    """Sleep ``interval`` seconds in a loop and record how late each wake-up was.
+
+    A busy or blocked event loop wakes the probe late; the excess over
+    ``interval`` is exported as ``mcp_event_loop_lag_seconds``.
+    """
+    while True:
+        start = time.perf_counter()
+        await asyncio.sleep(interval)
+        LOOP_LAG.set(max(time.perf_counter() - start - interval, 0.0))
+
+
+class _ComponentCollector:
+    """Export counters that components already keep, read at scrape time.
+
+    Cache and single-flight counters are plain integers on their objects;
+    reading them on scrape keeps Prometheus calls off the cache hot path.
+    """
+
+    def describe(self):
+        # Lets the registry learn metric names without calling ``collect`` at import
+        yield CounterMetricFamily("mcp_cache_events", "Cache events per key namespace", labels=["namespace", "event"])
+        yield GaugeMetricFamily("mcp_cache_entries", "Entries held in the response cache")
+        yield GaugeMetricFamily("mcp_cache_bytes", "Estimated bytes held in the response cache")
+        yield GaugeMetricFamily("mcp_singleflight_in_flight", "Distinct upstream calls currently in flight")
+        yield GaugeMetricFamily(
+            "mcp_upstream_circuit_open", "1 while an exchange's circuit breaker is not closed", labels=["exchange"]
+        )
+
+    def collect(self):
+        # Imported lazily: these modules import this one
+        from services.cache_service import cache
+        from services.singleflight import singleflight
+        from services.upstream_policy import upstream
+
+        stats = cache.stats()
+        events = CounterMetricFamily(
+            "mcp_cache_events", "Cache events per key namespace", labels=["namespace", "event"]
+        )
+        for namespace, counters in stats["namespaces"].items():
+            for event, value in counters.items():
+                events.add_metric([namespace, event], value)
+        yield events
+        yield GaugeMetricFamily("mcp_cache_entries", "Entries held in the response cache", value=stats["entries"])
+        yield GaugeMetricFamily("mcp_cache_bytes", "Estimated bytes held in the response cache", value=stats["bytes"])
+        yield GaugeMetricFamily(
+            "mcp_singleflight_in_flight", "Distinct upstream calls currently in flight",
+            value=singleflight.stats()["inflight"],
+        )
+        circuits = GaugeMetricFamily(
+            "mcp_upstream_circuit_open", "1 while an exchange's circuit breaker is not closed", labels=["exchange"]
+        )
+        for exchange, state in upstream.stats()["breakers"].items():
+            circuits.add_metric([exchange], 0 if state == "closed" else 1)
+        yield circuits
+
+
+REGISTRY.register(_ComponentCollector())
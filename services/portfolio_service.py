@@ -0,0 +1,108 @@
+import asyncio
+from functools import reduce
+
+import numpy as np
+
+from analytics.portfolio import (
+    holdings_matrix, value_portfolios, value_series, volatility, max_drawdown, correlation
+)
+from services.exchange_client import ExchangeClient
+from services.startup import lazy_import
+
+ccxt = lazy_import("ccxt")
+
+_YEAR_SECONDS = 365 * 86400
+
+
+def _symbol(asset: str, quote: str):
+    return f"{asset}/{quote}"
+
+
+def _floats(values):
+    # JSON has no NaN; non-finite numbers go out as null
+    values = np.asarray(values, dtype=float)
+    return np.where(np.isfinite(values), values, None).tolist()
+
+
+async def resolve_prices(exchange: str, assets, quote: str):
+    """Price assets in ``quote`` through the batched, cached ticker path.
+
+    Args:
+        exchange: Exchange to price on.
+        assets: Asset codes such as 'BTC'; the quote asset itself is 1.0.
+        quote: Quote currency, e.g. 'USDT'.
+
+    Returns:
+        Tuple of (prices, errors): a float array aligned with ``assets``
+        (NaN when no price was found) and the ticker errors.
+    """
+    pairs = [(exchange, _symbol(asset, quote)) for asset in assets if asset != quote]
+    tickers, errors = await ExchangeClient.get_tickers(pairs) if pairs else ([], [])
+    by_symbol = {t["symbol"]: t["price"] for t in tickers if t["price"] is not None}
+    prices = np.array(
+        [1.0 if asset == quote else by_symbol.get(_symbol(asset, quote), np.nan) for asset in assets],
+        dtype=float,
+    )
+    return prices, errors
+
+
+async def value_many(portfolios, exchange: str, quote: str = "USDT"):
+    """Value many ``{asset: amount}`` portfolios with one price lookup.
+
+    Returns:
+        Dict with exchange, quote, per-portfolio values, the prices used and
+        the ticker errors for assets that could not be priced.
+    """
+    assets, matrix = holdings_matrix(portfolios)
+    prices, errors = await resolve_prices(exchange, assets, quote)
+    return {
+        "exchange": exchange,
+        "quote": quote,
+        "values": value_portfolios(matrix, prices).tolist(),
+        "prices": {asset: float(p) for asset, p in zip(assets, prices) if np.isfinite(p)},
+        "errors": errors,
+    }
+
+
+async def portfolio_risk(portfolios, exchange: str, quote: str = "USDT", interval: str = "1d", limit: int = 100):
+    """Historical value series and risk metrics for many portfolios.
+
+    Close series are fetched once per asset (through the OHLCV cache) and
+    aligned on common timestamps; every portfolio is then valued over time in
+    one matrix product.
+
+    Returns:
+        Dict with assets, timestamps (seconds), per-portfolio value series,
+        annualized volatility, max drawdown and the asset return correlation
+        matrix.
+    """
+    assets, matrix = holdings_matrix(portfolios)
+    priced = [asset for asset in assets if asset != quote]
+    if not priced:
+        raise Exception("Portfolios need at least one asset other than the quote currency")
+    candles = await asyncio.gather(*(
+        ExchangeClient.get_ohlcv_candles(exchange, _symbol(asset, quote), interval, None, None, limit)
+        for asset in priced
+    ))
+    timestamps = reduce(np.intersect1d, (c['timestamp'] for c in candles))
+    if not len(timestamps):
+        raise Exception(
+            f"No {interval} candles in common for {', '.join(priced)} on {exchange}; "
+            "risk metrics need overlapping price history"
+        )
+    closes = np.ones((len(timestamps), len(assets)))
+    for asset, c in zip(priced, candles):
+        closes[:, assets.index(asset)] = c['close'][np.searchsorted(c['timestamp'], timestamps)]
+    series = value_series(matrix, closes)
+    periods_per_year = _YEAR_SECONDS / ccxt.Exchange.parse_timeframe(interval)
+    return {
+        "exchange": exchange,
+        "quote": quote,
+        "interval": interval,
+        "assets": assets,
+        "timestamps": (timestamps // 1000).tolist(),
+        "values": [_floats(column) for column in series.T],
+        "volatility": _floats(volatility(series, periods_per_year)),
+        "max_drawdown": _floats(max_drawdown(series)),
+        "correlation": [_floats(row) for row in correlation(closes)],
+    }
@@ -1,13 +1,57 @@
 
 import time
+from collections import OrderedDict
 
 class RateLimiter:
-    def __init__(self,interval=1):
-        self.interval=interval
-        self.last=0
-
-    def wait(self):
-        now=time.time()
-        if now-self.last<self.interval:
-            time.sleep(self.interval-(now-self.last))
-        self.last=time.time()
+    """Token-bucket rate limiter keyed by an arbitrary hashable (client, route).
+
+    Each key owns a bucket holding up to ``burst`` tokens that refills at
+    ``rate`` tokens per second. Checks never sleep: a request either takes a
+    token or is told how long to wait. Buckets idle for longer than
+    ``idle_ttl`` seconds are evicted, so memory stays O(1) per active key.
+    """
+
+    def __init__(self, rate=10.0, burst=20, idle_ttl=300.0):
+        self.rate = float(rate)
+        self.burst = float(burst)
+        self.idle_ttl = idle_ttl
+        self._buckets = OrderedDict()
+
+    def acquire(self, key, now=None):
+        """Try to take one token from the bucket for ``key``.
+
+        Args:
+            key: Bucket key, e.g. a (client, route) tuple.
+            now: Optional monotonic timestamp, mainly for tests.
+
+        Returns:
+            0.0 when the request is allowed, otherwise the number of seconds
+            until a token becomes available.
+        """
+        now = time.monotonic() if now is None else now
+        self._evict_idle(now)
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = [self.burst, now]
+            self._buckets[key] = bucket
+        else:
+            self._buckets.move_to_end(key)
+            bucket[0] = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+            bucket[1] = now
+        if bucket[0] >= 1.0:
+            bucket[0] -= 1.0
+            return 0.0
+        if self.rate <= 0:
+            return float('inf')
+        return (1.0 - bucket[0]) / self.rate
+
+    def _evict_idle(self, now):
+        # Buckets are kept in last-access order, so idle ones sit at the front
+        while self._buckets:
+            key, bucket = next(iter(self._buckets.items()))
+            if now - bucket[1] <= self.idle_ttl:
+                break
+            del self._buckets[key]
+
+    def __len__(self):
+        return len(self._buckets)
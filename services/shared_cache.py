@@ -0,0 +1,288 @@
+import asyncio
+import hashlib
+import json
+import logging
+import mmap
+import os
+import struct
+import time
+from urllib.parse import urlparse
+
+import numpy as np
+
+from config import settings
+
+logger = logging.getLogger("shared_cache")
+
+# version (seqlock, odd while a write is in progress), key length, expiry, key hash, data length
+_SLOT_HEADER = struct.Struct('<IIdQI')
+
+
+# Entry framing: a kind byte, then JSON ('J') or a length-prefixed JSON header and raw array bytes ('A')
+_ARRAY_HEADER = struct.Struct('<I')
+
+
+def dumps_entry(expires_at: float, value) -> bytes:
+    """Serialize a cache value for the shared tier.
+
+    Only JSON data and NumPy arrays of plain (non-object) dtypes are
+    supported. Unlike pickle, reading an entry never runs code, so a
+    writable shared tier can't be used to attack the workers.
+    """
+    if isinstance(value, np.ndarray):
+        if value.dtype.hasobject:
+            raise TypeError("Object arrays can't be shared")
+        header = json.dumps({
+            "expires_at": expires_at,
+            "dtype": np.lib.format.dtype_to_descr(value.dtype),
+            "shape": value.shape,
+        }).encode()
+        return b'A' + _ARRAY_HEADER.pack(len(header)) + header + np.ascontiguousarray(value).tobytes()
+    return b'J' + json.dumps({"expires_at": expires_at, "value": value}, separators=(',', ':')).encode()
+
+
+def loads_entry(data: bytes):
+    """Inverse of ``dumps_entry``.
+
+    Returns:
+        Tuple of (expires_at, value).
+    """
+    kind = data[:1]
+    if kind == b'J':
+        entry = json.loads(data[1:])
+        return entry["expires_at"], entry["value"]
+    if kind == b'A':
+        (length,) = _ARRAY_HEADER.unpack_from(data, 1)
+        start = 1 + _ARRAY_HEADER.size
+        header = json.loads(data[start:start + length])
+        dtype = np.lib.format.descr_to_dtype(
+            [tuple(field) for field in header["dtype"]] if isinstance(header["dtype"], list) else header["dtype"]
+        )
+        if dtype.hasobject:
+            raise ValueError("Object arrays can't be shared")
+        array = np.frombuffer(data, dtype=dtype, offset=start + length).reshape(header["shape"]).copy()
+        return header["expires_at"], array
+    raise ValueError(f"Unknown shared entry kind {kind!r}")
+
+
+def _key_hash(key: bytes) -> int:
+    # Python's hash() is salted per process; workers need a stable hash
+    return int.from_bytes(hashlib.blake2b(key, digest_size=8).digest(), 'little')
+
+
+class MmapBackend:
+    """Shared-memory tier for workers on one host.
+
+    A fixed-size file of ``slots`` slots of ``slot_size`` bytes is mapped
+    into every worker. Keys hash to a single slot (a newer key simply
+    replaces an older one) and values larger than a slot are not shared.
+    Writers serialize on ``flock``; readers take no lock and use the slot's
+    version counter to discard a copy torn by a concurrent write.
+    """
+
+    def __init__(self, path=None, slots=None, slot_size=None):
+        import fcntl
+
+        self._fcntl = fcntl
+        self.path = settings.SHARED_CACHE_PATH if path is None else path
+        self.slots = settings.SHARED_CACHE_SLOTS if slots is None else slots
+        self.slot_size = settings.SHARED_CACHE_SLOT_SIZE if slot_size is None else slot_size
+        size = self.slots * self.slot_size
+        if os.path.dirname(self.path):
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+        if os.fstat(self._fd).st_size < size:
+            os.ftruncate(self._fd, size)
+        self._map = mmap.mmap(self._fd, size)
+
+    def _slot(self, key: bytes):
+        h = _key_hash(key)
+        return h, (h % self.slots) * self.slot_size
+
+    def _read(self, key: bytes, h: int, base: int):
+        version, key_len, expires_at, slot_hash, data_len = _SLOT_HEADER.unpack_from(self._map, base)
+        if version % 2 or slot_hash != h or expires_at <= time.time():
+            return None
+        start = base + _SLOT_HEADER.size
+        if self._map[start:start + key_len] != key:
+            return None
+        data = self._map[start + key_len:start + key_len + data_len]
+        if _SLOT_HEADER.unpack_from(self._map, base)[0] != version:
+            return None
+        return data
+
+    def _write(self, key: bytes, h: int, base: int, data: bytes, expires_at: float):
+        version = _SLOT_HEADER.unpack_from(self._map, base)[0] | 1
+        struct.pack_into('<I', self._map, base, version)
+        start = base + _SLOT_HEADER.size
+        self._map[start:start + len(key)] = key
+        self._map[start + len(key):start + len(key) + len(data)] = data
+        _SLOT_HEADER.pack_into(self._map, base, version + 1, len(key), expires_at, h, len(data))
+
+    def _fits(self, key: bytes, data: bytes):
+        return _SLOT_HEADER.size + len(key) + len(data) <= self.slot_size
+
+    async def get(self, key: str):
+        key = key.encode()
+        return self._read(key, *self._slot(key))
+
+    async def set(self, key: str, data: bytes, ttl: float):
+        key = key.encode()
+        if not self._fits(key, data):
+            return False
+        h, base = self._slot(key)
+        self._fcntl.flock(self._fd, self._fcntl.LOCK_EX)
+        try:
+            self._write(key, h, base, data, time.time() + ttl)
+        finally:
+            self._fcntl.flock(self._fd, self._fcntl.LOCK_UN)
+        return True
+
+    async def add(self, key: str, data: bytes, ttl: float):
+        """Set ``key`` only if it holds no live value; return True if set."""
+        key = key.encode()
+        h, base = self._slot(key)
+        self._fcntl.flock(self._fd, self._fcntl.LOCK_EX)
+        try:
+            if self._read(key, h, base) is not None:
+                return False
+            self._write(key, h, base, data, time.time() + ttl)
+        finally:
+            self._fcntl.flock(self._fd, self._fcntl.LOCK_UN)
+        return True
+
+    async def delete(self, key: str):
+        key = key.encode()
+        h, base = self._slot(key)
+        self._fcntl.flock(self._fd, self._fcntl.LOCK_EX)
+        try:
+            if self._read(key, h, base) is not None:
+                self._write(key, h, base, b'', 0.0)
+        finally:
+            self._fcntl.flock(self._fd, self._fcntl.LOCK_UN)
+
+    async def close(self):
+        if not self._map.closed:
+            self._map.close()
+            os.close(self._fd)
+
+
+class RedisError(Exception):
+    """Error reply from a Redis-protocol server."""
+
+
+class RedisBackend:
+    """Shared tier on any server speaking the Redis protocol (RESP).
+
+    Uses a single connection with one command in flight at a time, which
+    is enough for the handful of GET/SET calls made per cache miss. Only
+    GET, SET (PX, NX), DEL, AUTH and SELECT are used, so Redis, Valkey,
+    KeyDB or a local stand-in all work.
+    """
+
+    def __init__(self, url=None, prefix="mcp:", timeout=1.0):
+        parsed = urlparse(settings.SHARED_CACHE_URL if url is None else url)
+        self.host = parsed.hostname or "localhost"
+        self.port = parsed.port or 6379
+        self.db = int(parsed.path.lstrip("/") or 0)
+        self.password = parsed.password
+        self.prefix = prefix
+        self.timeout = timeout
+        self._reader = None
+        self._writer = None
+        self._lock = None
+        self._loop = None
+
+    def _bind_loop(self):
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            # Connections belong to the loop that opened them
+            self._loop = loop
+            self._lock = asyncio.Lock()
+            self._reader = self._writer = None
+
+    async def _roundtrip(self, *args):
+        parts = [f"*{len(args)}\r\n".encode()]
+        for arg in args:
+            arg = arg if isinstance(arg, bytes) else str(arg).encode()
+            parts.append(b"$%d\r\n%s\r\n" % (len(arg), arg))
+        self._writer.write(b"".join(parts))
+        await self._writer.drain()
+        return await self._reply()
+
+    async def _reply(self):
+        line = await self._reader.readline()
+        if not line:
+            raise ConnectionError("Redis connection closed")
+        kind, body = line[:1], line[1:-2]
+        if kind == b"+":
+            return body.decode()
+        if kind == b"-":
+            raise RedisError(body.decode())
+        if kind == b":":
+            return int(body)
+        if kind == b"$":
+            length = int(body)
+            return None if length < 0 else (await self._reader.readexactly(length + 2))[:-2]
+        if kind == b"*":
+            length = int(body)
+            return None if length < 0 else [await self._reply() for _ in range(length)]
+        raise RedisError(f"Unexpected reply: {line!r}")
+
+    async def execute(self, *args):
+        """Send one command and return its decoded reply."""
+        self._bind_loop()
+        async with self._lock:
+            try:
+                if self._writer is None:
+                    self._reader, self._writer = await asyncio.wait_for(
+                        asyncio.open_connection(self.host, self.port), self.timeout
+                    )
+                    if self.password:
+                        await asyncio.wait_for(self._roundtrip("AUTH", self.password), self.timeout)
+                    if self.db:
+                        await asyncio.wait_for(self._roundtrip("SELECT", self.db), self.timeout)
+                return await asyncio.wait_for(self._roundtrip(*args), self.timeout)
+            except BaseException:
+                # Includes cancellation: a reply left unread on the socket would
+                # be taken as the answer to the next command
+                self._drop()
+                raise
+
+    def _drop(self):
+        if self._writer is not None:
+            self._writer.close()
+        self._reader = self._writer = None
+
+    async def get(self, key: str):
+        return await self.execute("GET", self.prefix + key)
+
+    async def set(self, key: str, data: bytes, ttl: float):
+        return await self.execute("SET", self.prefix + key, data, "PX", max(1, int(ttl * 1000))) == "OK"
+
+    async def add(self, key: str, data: bytes, ttl: float):
+        """Set ``key`` only if it holds no live value; return True if set."""
+        reply = await self.execute("SET", self.prefix + key, data, "PX", max(1, int(ttl * 1000)), "NX")
+        return reply == "OK"
+
+    async def delete(self, key: str):
+        await self.execute("DEL", self.prefix + key)
+
+    async def close(self):
+        self._drop()
+
+
+def create_backend(kind=None):
+    """Build the shared cache tier selected by ``SHARED_CACHE_BACKEND``.
+
+    Returns:
+        An ``MmapBackend``, a ``RedisBackend`` or None when disabled.
+    """
+    kind = settings.SHARED_CACHE_BACKEND if kind is None else kind
+    if not kind:
+        return None
+    if kind == "mmap":
+        return MmapBackend()
+    if kind == "redis":
+        return RedisBackend()
+    raise Exception(f"Unknown shared cache backend '{kind}'")
@@ -0,0 +1,56 @@
+import asyncio
+
+from services import metrics as metrics_service
+
+
+class SingleFlight:
+    """Collapse concurrent calls for the same key into one in-flight future.
+
+    The first caller for a key starts the work; callers arriving while it is
+    still running await the same future and share its result or exception.
+    Waiters are shielded, so a cancelled caller never cancels the shared call.
+    """
+
+    def __init__(self):
+        self._inflight = {}
+        self.calls = 0
+        self.collapsed = 0
+
+    async def do(self, key: str, func):
+        """Run ``func()`` once for ``key`` among all concurrent callers.
+
+        Args:
+            key: Cache key identifying the upstream call.
+            func: Zero-argument callable returning an awaitable.
+
+        Returns:
+            The result of the shared call.
+        """
+        fut = self._inflight.get(key)
+        if fut is not None:
+            self.collapsed += 1
+            metrics_service.observe_coalesced(key.split(':', 1)[0])
+            return await asyncio.shield(fut)
+        self.calls += 1
+        fut = asyncio.ensure_future(func())
+        self._inflight[key] = fut
+        fut.add_done_callback(lambda f: self._on_done(key, f))
+        return await asyncio.shield(fut)
+
+    def _on_done(self, key: str, fut):
+        if self._inflight.get(key) is fut:
+            del self._inflight[key]
+        if not fut.cancelled():
+            # Mark the exception as retrieved even if every waiter went away
+            fut.exception()
+
+    def stats(self):
+        """Return counters for started and collapsed calls."""
+        return {
+            "calls": self.calls,
+            "collapsed": self.collapsed,
+            "inflight": len(self._inflight),
+        }
+
+
+singleflight = SingleFlight()
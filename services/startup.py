@@ -0,0 +1,98 @@
+import asyncio
+from contextlib import contextmanager
+import importlib
+import importlib.util
+import logging
+import time
+
+logger = logging.getLogger("startup")
+
+
+class LazyModule:
+    """Module stand-in that imports the real module on first attribute access.
+
+    The import goes through ``importlib.import_module``, so it takes the
+    normal import lock and is safe while a background thread is preloading
+    the same module.
+    """
+
+    def __init__(self, name: str):
+        self._name = name
+        self._module = None
+
+    def __getattr__(self, attr):
+        if self._module is None:
+            self._module = importlib.import_module(self._name)
+        return getattr(self._module, attr)
+
+    def __repr__(self):
+        return f"<lazy module '{self._name}'>"
+
+
+def lazy_import(name: str):
+    """Return a ``LazyModule`` for ``name``, or None if it is not installed.
+
+    Checking availability only locates the module, so optional dependencies
+    keep their ``module is None`` test without paying for the import.
+    """
+    if importlib.util.find_spec(name) is None:
+        return None
+    return LazyModule(name)
+
+
+class StartupReport:
+    """Record where boot time goes.
+
+    ``started`` is taken when this module is first imported, which
+    ``server`` does before anything heavy. Phases are timed individually;
+    ``ready`` stamps the time from ``started`` until the app serves requests.
+    """
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self._last = self.started
+        self.phases = {}
+        self.background = {}
+        self.ready_seconds = None
+
+    def mark(self, name: str):
+        """Record the time since the previous mark (or start) as phase ``name``."""
+        now = time.perf_counter()
+        self.phases[name] = now - self._last
+        self._last = now
+
+    @contextmanager
+    def phase(self, name: str):
+        """Time the enclosed block as phase ``name``."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] = time.perf_counter() - start
+            self._last = time.perf_counter()
+
+    def ready(self):
+        self.ready_seconds = time.perf_counter() - self.started
+        phases = ", ".join(f"{name} {seconds * 1000:.0f} ms" for name, seconds in self.phases.items())
+        logger.info(f"Ready in {self.ready_seconds * 1000:.0f} ms ({phases})")
+
+    async def preload(self, *modules):
+        """Import ``modules`` on a worker thread so the first request doesn't pay for them."""
+        for name in modules:
+            start = time.perf_counter()
+            try:
+                await asyncio.to_thread(importlib.import_module, name)
+            except Exception as e:
+                logger.warning(f"Preloading {name} failed: {e}")
+                continue
+            self.background[f"import {name}"] = time.perf_counter() - start
+
+    def as_dict(self):
+        return {
+            "ready_seconds": self.ready_seconds,
+            "phases": dict(self.phases),
+            "background": dict(self.background),
+        }
+
+
+startup = StartupReport()
@@ -0,0 +1,229 @@
+import asyncio
+from collections import deque
+import logging
+import random
+import time
+
+import numpy as np
+
+from config import settings
+from services import metrics as metrics_service
+from services.startup import lazy_import
+
+ccxt = lazy_import("ccxt")
+aiohttp = lazy_import("aiohttp")
+
+logger = logging.getLogger("upstream_policy")
+
+
+class CircuitOpenError(Exception):
+    """Raised without calling upstream while an exchange's circuit is open."""
+
+
+def is_retryable(exc: Exception) -> bool:
+    """Classify an upstream error using ccxt's exception hierarchy.
+
+    Network-level failures (timeouts, rate limits, maintenance, dropped
+    connections) are transient. Exchange errors such as BadSymbol,
+    BadRequest or AuthenticationError will fail the same way again. Outside
+    ccxt only aiohttp client errors, asyncio timeouts and OS errors count as
+    network failures; anything else is a bug and fails fast.
+    """
+    if isinstance(exc, CircuitOpenError):
+        return False
+    if isinstance(exc, ccxt.NetworkError):
+        return True
+    if isinstance(exc, ccxt.BaseError):
+        return False
+    return isinstance(exc, (OSError, asyncio.TimeoutError, aiohttp.ClientError))
+
+
+class CircuitBreaker:
+    """Closed / open / half-open breaker for one exchange.
+
+    After ``threshold`` consecutive transient failures the circuit opens and
+    calls fail fast. Once ``cooldown`` seconds have passed a single probe is
+    let through (half-open); its success closes the circuit, its failure
+    opens it again.
+    """
+
+    def __init__(self, threshold=None, cooldown=None):
+        self.threshold = settings.UPSTREAM_BREAKER_THRESHOLD if threshold is None else threshold
+        self.cooldown = settings.UPSTREAM_BREAKER_COOLDOWN if cooldown is None else cooldown
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at = 0.0
+        self._probing = False
+
+    def before_call(self, now=None):
+        """Raise ``CircuitOpenError`` unless a call may go upstream now.
+
+        Returns:
+            True if this call is the half-open probe.
+        """
+        if self.state == "closed":
+            return False
+        now = time.monotonic() if now is None else now
+        if self.state == "open" and now - self.opened_at >= self.cooldown:
+            self.state = "half_open"
+        if self.state == "half_open" and not self._probing:
+            self._probing = True
+            return True
+        raise CircuitOpenError("Exchange circuit open; failing fast")
+
+    def on_success(self):
+        self.state = "closed"
+        self.failures = 0
+        self._probing = False
+
+    def on_failure(self, now=None):
+        self.failures += 1
+        if self.state == "half_open" or self.failures >= self.threshold:
+            self.state = "open"
+            self.opened_at = time.monotonic() if now is None else now
+        self._probing = False
+
+    def release(self):
+        # A non-transient error says nothing about venue health
+        self._probing = False
+
+
+class UpstreamPolicy:
+    """Shared retry, hedging and circuit-breaking policy for exchange calls.
+
+    Every ``ExchangeClient`` upstream call goes through ``call``:
+
+    * transient errors (``is_retryable``) are retried with full-jitter
+      exponential backoff, other errors are raised immediately;
+    * once an (exchange, method) pair has enough latency samples, a call
+      still running after the rolling p95 gets a hedged duplicate and the
+      first successful response wins;
+    * each exchange has a ``CircuitBreaker`` so a dead venue fails fast.
+    """
+
+    def __init__(self, max_attempts=None, backoff_base=None, backoff_max=None, hedge=None):
+        self.max_attempts = settings.UPSTREAM_MAX_ATTEMPTS if max_attempts is None else max_attempts
+        self.backoff_base = settings.UPSTREAM_BACKOFF_BASE if backoff_base is None else backoff_base
+        self.backoff_max = settings.UPSTREAM_BACKOFF_MAX if backoff_max is None else backoff_max
+        self.hedge = settings.UPSTREAM_HEDGE_ENABLED if hedge is None else hedge
+        self._breakers = {}
+        self._latencies = {}
+        self.retries = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+        self.rejected = 0
+
+    def breaker(self, exchange: str) -> CircuitBreaker:
+        breaker = self._breakers.get(exchange)
+        if breaker is None:
+            breaker = self._breakers[exchange] = CircuitBreaker()
+        return breaker
+
+    def backoff(self, attempt: int) -> float:
+        """Full-jitter delay before retry number ``attempt + 1``."""
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+
+    def hedge_delay(self, exchange: str, method: str):
+        """Rolling p95 latency for (exchange, method), or None while warming up."""
+        samples = self._latencies.get((exchange, method))
+        if not self.hedge or samples is None or len(samples) < settings.UPSTREAM_HEDGE_MIN_SAMPLES:
+            return None
+        return max(float(np.percentile(samples, 95)), settings.UPSTREAM_HEDGE_MIN_DELAY)
+
+    def _record(self, exchange: str, method: str, seconds: float):
+        samples = self._latencies.get((exchange, method))
+        if samples is None:
+            samples = self._latencies[(exchange, method)] = deque(maxlen=settings.UPSTREAM_LATENCY_WINDOW)
+        samples.append(seconds)
+
+    async def _attempt(self, exchange: str, method: str, func):
+        delay = self.hedge_delay(exchange, method)
+        first = asyncio.ensure_future(func())
+        if delay is None:
+            return await first
+        second = None
+        try:
+            done, _ = await asyncio.wait({first}, timeout=delay)
+            if done:
+                return first.result()
+            self.hedges += 1
+            metrics_service.observe_hedge(exchange, method)
+            second = asyncio.ensure_future(func())
+            pending = {first, second}
+            error = None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is second:
+                            self.hedge_wins += 1
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            for task in (first, second):
+                if task is not None and not task.done():
+                    task.cancel()
+
+    async def call(self, exchange: str, method: str, func, failure: str):
+        """Run an upstream call under the retry, hedging and breaker policy.
+
+        Args:
+            exchange: Exchange id, used for the circuit breaker and latency stats.
+            method: Upstream method name, e.g. 'fetch_ticker'.
+            func: Zero-argument callable returning a fresh awaitable per call.
+            failure: Message of the exception raised once retries are exhausted.
+
+        Returns:
+            The upstream result.
+
+        Raises:
+            CircuitOpenError: If the exchange's circuit is open.
+            Exception: The original error if it is not retryable, otherwise
+                an exception with ``failure`` once attempts are exhausted.
+        """
+        breaker = self.breaker(exchange)
+        for attempt in range(self.max_attempts):
+            try:
+                breaker.before_call()
+            except CircuitOpenError:
+                self.rejected += 1
+                raise CircuitOpenError(f"{failure}: {exchange} circuit open")
+            start = time.monotonic()
+            try:
+                with metrics_service.UPSTREAM_IN_FLIGHT.labels(exchange=exchange).track_inprogress():
+                    result = await self._attempt(exchange, method, func)
+            except asyncio.CancelledError:
+                breaker.release()
+                raise
+            except Exception as e:
+                metrics_service.observe_upstream(exchange, method, time.monotonic() - start, e)
+                if not is_retryable(e):
+                    breaker.release()
+                    raise
+                breaker.on_failure()
+                logger.warning(f"{method} on {exchange} attempt {attempt + 1} failed: {e}")
+                if attempt + 1 < self.max_attempts:
+                    self.retries += 1
+                    metrics_service.observe_retry(exchange, method)
+                    await asyncio.sleep(self.backoff(attempt))
+                continue
+            elapsed = time.monotonic() - start
+            breaker.on_success()
+            self._record(exchange, method, elapsed)
+            metrics_service.observe_upstream(exchange, method, elapsed)
+            return result
+        raise Exception(failure)
+
+    def stats(self):
+        """Return retry/hedge counters and breaker states per exchange."""
+        return {
+            "retries": self.retries,
+            "hedges": self.hedges,
+            "hedge_wins": self.hedge_wins,
+            "rejected": self.rejected,
+            "breakers": {ex: b.state for ex, b in self._breakers.items()},
+        }
+
+
+upstream = UpstreamPolicy()
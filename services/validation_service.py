@@ -1,26 +1,24 @@
-import ccxt
 import asyncio
 
+from services.markets_service import markets_registry
+
 def validate_exchange(exchange: str):
     """Validate that the provided exchange is supported by CCXT.
 
     Raises an Exception when the exchange is not supported.
     """
-    if exchange not in ccxt.exchanges:
+    if exchange not in markets_registry.exchange_ids():
         raise Exception(f"Exchange '{exchange}' not supported.")
 
 async def validate_symbol(exchange: str, symbol: str):
     """Validate that a symbol exists for a given exchange.
 
-    Uses a synchronous CCXT exchange instance to load market metadata and
-    confirm that the symbol is listed. Raises an Exception on failure.
+    Looks the symbol up in the shared markets registry, which loads market
+    metadata once per exchange. Raises an Exception on failure.
     """
-    # Use sync CCXT here because only market meta needed
     try:
-        ex_class = getattr(ccxt, exchange)
-        ex_instance = ex_class()
-        markets = ex_instance.load_markets()
-        if symbol not in markets:
-            raise Exception(f"Symbol '{symbol}' not supported for exchange '{exchange}'")
+        listed = await markets_registry.has_symbol(exchange, symbol)
     except Exception:
-        raise Exception(f"Invalid exchange-symbol pair {exchange}:{symbol}")
\ No newline at end of file
+        raise Exception(f"Invalid exchange-symbol pair {exchange}:{symbol}")
+    if not listed:
+        raise Exception(f"Symbol '{symbol}' not supported for exchange '{exchange}'")
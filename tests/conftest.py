@@ -1,6 +1,13 @@
 
+import asyncio
+from collections import Counter
+import time
 import pytest
 import unittest.mock as mock
+from config import settings
+
+# Tests load fake markets; keep them out of the on-disk markets snapshot
+settings.MARKETS_SNAPSHOT_PATH = ""
 
 class SimpleMocker:
     def __init__(self):
@@ -30,3 +37,94 @@ def mocker():
     m = SimpleMocker()
     yield m
     m.stopall()
+
+
+class FakeExchange:
+    """Scriptable stand-in for a ccxt async exchange.
+
+    Tickers quote ``price``; order books have two levels per side starting
+    at ``bid``/``ask``; trades come from ``trades``; candles run up to the
+    one forming now. Every call waits ``delay`` seconds and raises ``error``
+    if set. Calls are counted per method, with (since, limit) kept for
+    trade and candle fetches.
+    """
+
+    def __init__(self, price=100.0, bid=None, ask=None, trades=(), delay=0.0, batch=True, error=None):
+        self.price = price
+        self.bid = price - 0.5 if bid is None else bid
+        self.ask = price + 0.5 if ask is None else ask
+        self.trades = list(trades)
+        self.delay = delay
+        self.error = error
+        self.has = {"fetchTickers": batch}
+        self.calls = Counter()
+        self.trade_calls = []
+        self.ohlcv_calls = []
+
+    async def _call(self, method):
+        self.calls[method] += 1
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        if self.error is not None:
+            raise self.error
+
+    async def fetch_ticker(self, symbol):
+        await self._call("fetch_ticker")
+        return {"symbol": symbol, "last": self.price, "timestamp": 1600000000000}
+
+    async def fetch_tickers(self, symbols):
+        await self._call("fetch_tickers")
+        return {s: {"symbol": s, "last": self.price, "timestamp": 1600000000000} for s in symbols}
+
+    async def fetch_order_book(self, symbol, limit=None):
+        await self._call("fetch_order_book")
+        return {
+            "bids": [[self.bid, 1.0], [self.bid - 1, 2.0]],
+            "asks": [[self.ask, 1.0], [self.ask + 1, 2.0]],
+            "timestamp": 1600000000000,
+        }
+
+    async def fetch_trades(self, symbol, since=None, limit=None):
+        await self._call("fetch_trades")
+        self.trade_calls.append((since, limit))
+        rows = [t for t in self.trades if since is None or t["timestamp"] >= since]
+        return rows[:limit] if since is not None else rows[-limit:]
+
+    async def fetch_ohlcv(self, symbol, timeframe="1m", since=None, limit=None):
+        await self._call("fetch_ohlcv")
+        self.ohlcv_calls.append((since, limit))
+        step = 60_000
+        now = int(time.time() * 1000) // step * step
+        limit = limit or 100
+        since = now - (limit - 1) * step if since is None else since
+        return [[ts, 1.0, 2.0, 0.5, 1.5, 10.0] for ts in range(since, min(now, since + (limit - 1) * step) + 1, step)]
+
+
+@pytest.fixture
+def fake_exchanges(monkeypatch):
+    """Serve ``ExchangeClient`` from ``FakeExchange`` instances with symbol validation skipped.
+
+    Yields a dict of exchange id to fake; ids not in it get a default
+    ``FakeExchange`` on first use. The cache and trade tapes are cleared
+    before and after.
+    """
+    from services.cache_service import cache
+    from services.exchange_client import ExchangeClient
+    from analytics.trade_tape import trade_tapes
+    import services.exchange_client as exchange_client
+
+    exchanges = {}
+
+    async def get_instance(exchange):
+        return exchanges.setdefault(exchange, FakeExchange())
+
+    async def validate(exchange, symbol):
+        return None
+
+    cache.clear()
+    trade_tapes.clear()
+    monkeypatch.setattr(ExchangeClient, "get_exchange_instance", staticmethod(get_instance))
+    monkeypatch.setattr(exchange_client, "validate_symbol", validate)
+    yield exchanges
+    cache.clear()
+    trade_tapes.clear()
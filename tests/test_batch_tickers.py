@@ -0,0 +1,57 @@
+import asyncio
+import pytest
+from fastapi.testclient import TestClient
+from conftest import FakeExchange
+from server import app
+from services.cache_service import cache
+from services.exchange_client import ExchangeClient
+import services.exchange_client as exchange_client
+
+client = TestClient(app)
+
+
+@pytest.fixture
+def fakes(fake_exchanges, monkeypatch):
+    fake_exchanges.update(binance=FakeExchange(price=10.0), kraken=FakeExchange(price=20.0, batch=False))
+
+    async def validate(exchange, symbol):
+        if symbol == "FOO/BAR":
+            raise Exception(f"Symbol '{symbol}' not supported for exchange '{exchange}'")
+
+    monkeypatch.setattr(exchange_client, "validate_symbol", validate)
+    return fake_exchanges
+
+
+def test_batch_groups_by_exchange(fakes):
+    pairs = [("binance", f"C{i}/USDT") for i in range(50)] + [("kraken", "BTC/USD"), ("kraken", "ETH/USD")]
+    pairs.append(("binance", "FOO/BAR"))
+    tickers, errors = asyncio.run(ExchangeClient.get_tickers(pairs))
+    assert len(tickers) == 52
+    assert [e["symbol"] for e in errors] == ["FOO/BAR"]
+    assert fakes["binance"].calls == {"fetch_tickers": 1}
+    assert fakes["kraken"].calls == {"fetch_ticker": 2}
+    assert cache.get("ticker:binance:C0/USDT")["price"] == 10.0
+
+
+def test_batch_serves_cached_tickers(fakes):
+    cache.set("ticker:binance:BTC/USDT", {"exchange": "binance", "symbol": "BTC/USDT", "price": 1.0, "timestamp": 0})
+    tickers, errors = asyncio.run(ExchangeClient.get_tickers([("binance", "BTC/USDT")]))
+    assert tickers[0]["price"] == 1.0
+    assert not fakes["binance"].calls
+
+
+def test_batch_endpoint(mocker):
+    mocker.patch(
+        "services.exchange_client.ExchangeClient.get_tickers",
+        return_value=(
+            [{"exchange": "binance", "symbol": "BTC/USDT", "price": 10000.0, "timestamp": 1600000000}],
+            [{"exchange": "binance", "symbol": "FOO/BAR", "detail": "not supported"}],
+        ),
+    )
+    response = client.post(
+        "/api/v1/real_time/tickers",
+        json={"pairs": [{"exchange": "binance", "symbol": "BTC/USDT"}, {"exchange": "binance", "symbol": "FOO/BAR"}]},
+    )
+    assert response.status_code == 200
+    assert response.json()["tickers"][0]["price"] == 10000.0
+    assert response.json()["errors"][0]["symbol"] == "FOO/BAR"
@@ -0,0 +1,34 @@
+import asyncio
+from benchmarks.run import run, compare
+from services.exchange_client import ExchangeClient
+
+
+def test_benchmark_smoke_run():
+    original = ExchangeClient.__dict__["get_exchange_instance"]
+    results = asyncio.run(run(
+        scenarios=("hit", "miss", "herd"), endpoints=["ticker", "order_book", "status"],
+        concurrency=(1, 4), requests=8, latency=0.0, symbols=20,
+    ))
+    assert ExchangeClient.__dict__["get_exchange_instance"] is original
+    rows = {(r["scenario"], r["endpoint"], r["concurrency"]): r for r in results["results"]}
+    assert len(rows) == 18
+    assert all(r["errors"] == 0 and r["requests"] == 8 for r in rows.values())
+    assert rows[("hit", "ticker", 4)]["upstream_calls"] == 0
+    assert rows[("miss", "ticker", 1)]["upstream_calls"] >= 8
+    # Four identical concurrent misses collapse into one upstream fetch per round
+    herd = rows[("herd", "ticker", 4)]
+    assert herd["upstream_calls"] == 2 * 2  # load_markets + fetch_ticker, two rounds
+
+
+def test_compare_flags_regressions():
+    def result(p95, throughput, errors=0):
+        return {"results": [{
+            "scenario": "hit", "endpoint": "ticker", "concurrency": 10,
+            "p95_ms": p95, "throughput": throughput, "errors": errors,
+        }]}
+
+    baseline = result(10.0, 1000.0)
+    assert compare(result(12.0, 900.0), baseline) == []
+    assert compare(result(0.5, 1000.0), result(0.2, 1000.0)) == []  # below min_delta_ms
+    failures = compare(result(20.0, 500.0, errors=1), baseline)
+    assert len(failures) == 3 and "p95" in failures[0]
@@ -0,0 +1,49 @@
+import asyncio
+import pytest
+from fastapi.testclient import TestClient
+from conftest import FakeExchange
+from server import app
+from services.cache_service import cache
+from services.exchange_client import ExchangeClient
+
+client = TestClient(app)
+
+
+@pytest.fixture
+def venues(fake_exchanges):
+    fake_exchanges.update(
+        binance=FakeExchange(bid=100.0, ask=101.0),
+        kraken=FakeExchange(bid=100.5, ask=102.0),
+        okx=FakeExchange(bid=99.0, ask=100.8),
+        bitstamp=FakeExchange(bid=105.0, ask=106.0, delay=0.3),
+    )
+    return fake_exchanges
+
+
+def test_best_price_across_venues_with_deadline(venues):
+    async def run():
+        result = await ExchangeClient.get_best_price(
+            "BTC/USDT", ["binance", "kraken", "okx", "bitstamp"], deadline=0.1, depth=2
+        )
+        # The straggler was cancelled for the caller but still fills the cache
+        await asyncio.sleep(0.4)
+        return result, cache.get("orderbook:bitstamp:BTC/USDT:2")
+
+    result, straggler = asyncio.run(run())
+    assert result["late"] == ["bitstamp"]
+    assert result["best_bid"] == {"exchange": "kraken", "price": 100.5, "amount": 1.0}
+    assert result["best_ask"] == {"exchange": "okx", "price": 100.8, "amount": 1.0}
+    assert result["spread"] == pytest.approx(0.3)
+    assert not result["crossed"]
+    assert [lv["exchange"] for lv in result["bids"]] == ["kraken", "binance"]
+    assert straggler is not None and straggler["bids"][0][0] == 105.0
+
+
+def test_best_price_endpoint_reports_errors(venues):
+    response = client.post("/api/v1/real_time/best_price", json={
+        "symbol": "BTC/USDT", "exchanges": ["binance", "notanexchange"], "deadline": 5,
+    })
+    assert response.status_code == 200
+    body = response.json()
+    assert [v["exchange"] for v in body["venues"]] == ["binance"]
+    assert body["errors"][0]["exchange"] == "notanexchange"
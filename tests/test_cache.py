@@ -11,4 +11,89 @@ def test_cache_expiry():
     cache.set("bar", 123, ttl=1)
     import time
     time.sleep(2)
-    assert cache.get("bar") is None
\ No newline at end of file
+    assert cache.get("bar") is None
+
+def test_lru_eviction_by_entry_count():
+    from services.cache_service import Cache
+    c = Cache(max_entries=2, max_bytes=10**9)
+    c.set("ticker:a", 1, ttl=60)
+    c.set("ticker:b", 2, ttl=60)
+    assert c.get("ticker:a") == 1  # a becomes most recently used
+    c.set("ticker:c", 3, ttl=60)
+    assert c.get("ticker:b") is None
+    assert c.get("ticker:a") == 1
+    assert c.stats()["evictions"] == 1
+
+
+def test_byte_cap_evicts_oldest():
+    from services.cache_service import Cache
+    c = Cache(max_entries=100, max_bytes=20000)
+    for i in range(20):
+        c.set(f"ohlcv:{i}", list(range(200)), ttl=60)
+    stats = c.stats()
+    assert stats["bytes"] <= 20000
+    assert stats["entries"] < 20
+    assert c.get("ohlcv:19") is not None
+
+
+def test_namespace_ttl_and_sweep():
+    from services.cache_service import Cache
+    c = Cache(namespace_ttls={"ticker": 0, "symbols": 60})
+    c.set("ticker:x", 1)
+    c.set("symbols:x", ["BTC/USDT"])
+    assert c.sweep() == 1
+    assert c.get("symbols:x") == ["BTC/USDT"]
+    stats = c.stats()
+    assert stats["namespaces"]["symbols"]["hits"] == 1
+    assert stats["namespaces"]["ticker"]["expirations"] == 1
+
+
+def test_refresh_ahead_for_hot_keys():
+    import asyncio
+    from services.cache_service import Cache
+    c = Cache(refresh_window=0.5, refresh_min_hits=2, max_stale=5)
+    loads = []
+
+    async def refresher():
+        loads.append(1)
+        c.set("ticker:hot", len(loads) + 1, ttl=0.2, refresher=refresher)
+        return len(loads) + 1
+
+    async def run():
+        c.set("ticker:hot", 1, ttl=0.2, refresher=refresher)
+        c.set("ticker:cold", 1, ttl=0.2, refresher=refresher)
+        assert c.get("ticker:hot") == 1
+        assert c.get("ticker:hot") == 1
+        await asyncio.sleep(0.25)
+        # Past expiry but hot: previous value is served while refreshing
+        assert c.get("ticker:hot") == 1
+        assert c.get("ticker:cold") is None
+        await asyncio.sleep(0.01)
+        assert c.get("ticker:hot") == 2
+
+    asyncio.run(run())
+    assert loads == [1]
+    assert c.stats()["refreshes"] == 1
+
+def test_refresh_tasks_are_tracked_until_stopped():
+    import asyncio
+    from services.cache_service import Cache
+    c = Cache(refresh_window=0.5, refresh_min_hits=1, max_stale=5)
+    started = []
+
+    async def refresher():
+        started.append(1)
+        await asyncio.sleep(10)
+
+    async def run():
+        c.set("ticker:slow", 1, ttl=0.2, refresher=refresher)
+        c.get("ticker:slow")
+        await asyncio.sleep(0.15)
+        assert c.get("ticker:slow") == 1
+        await asyncio.sleep(0.01)
+        assert len(c._refreshes) == 1 and started == [1]
+        await c.stop_refreshes()
+        assert not c._refreshes
+        assert not c._store["ticker:slow"]["refreshing"]
+
+    asyncio.run(run())
@@ -0,0 +1,123 @@
+import asyncio
+from services.candle_store import CandleStore, missing_ranges, split_pages
+
+STEP = 60_000
+T0 = 1_600_000_020 * 1000 // STEP * STEP
+
+
+def make_fetch(calls):
+    async def fetch(start, end):
+        calls.append((start, end))
+        return [[ts, 1.0, 2.0, 0.5, 1.5, 10.0] for ts in range(start, end + 1, STEP)]
+    return fetch
+
+
+def get_range(store, start, end, fetch):
+    return asyncio.run(store.get_range("binance", "BTC/USDT", "1m", STEP, start, end, fetch))
+
+
+def test_missing_ranges():
+    covered = [[0, 4 * STEP], [10 * STEP, 12 * STEP]]
+    assert missing_ranges(covered, 2 * STEP, 15 * STEP, STEP) == [[5 * STEP, 9 * STEP], [13 * STEP, 15 * STEP]]
+    assert missing_ranges(covered, 0, 3 * STEP, STEP) == []
+    assert missing_ranges([], 0, STEP, STEP) == [[0, STEP]]
+
+
+def test_repeat_queries_need_no_fetch(tmp_path):
+    calls = []
+    store = CandleStore(root=str(tmp_path))
+    first = get_range(store, T0, T0 + 99 * STEP, make_fetch(calls))
+    again = get_range(store, T0 + 10 * STEP, T0 + 50 * STEP, make_fetch(calls))
+    assert len(first) == 100
+    assert len(again) == 41
+    assert calls == [(T0, T0 + 99 * STEP)]
+
+
+def test_only_gaps_are_fetched(tmp_path):
+    calls = []
+    store = CandleStore(root=str(tmp_path))
+    get_range(store, T0 + 50 * STEP, T0 + 99 * STEP, make_fetch(calls))
+    result = get_range(store, T0, T0 + 149 * STEP, make_fetch(calls))
+    assert calls[1:] == [(T0, T0 + 49 * STEP), (T0 + 100 * STEP, T0 + 149 * STEP)]
+    assert len(result) == 150
+    assert list(result["timestamp"]) == list(range(T0, T0 + 150 * STEP, STEP))
+
+
+def test_short_fetch_leaves_the_tail_uncovered(tmp_path):
+    calls = []
+    outage = make_fetch([])
+
+    async def cut_short(start, end):
+        calls.append((start, end))
+        return await outage(start, start + 4 * STEP)
+
+    store = CandleStore(root=str(tmp_path))
+    assert len(get_range(store, T0, T0 + 9 * STEP, cut_short)) == 5
+    assert len(get_range(store, T0, T0 + 9 * STEP, make_fetch(calls))) == 10
+    assert calls == [(T0, T0 + 9 * STEP), (T0 + 5 * STEP, T0 + 9 * STEP)]
+
+    async def nothing(start, end):
+        calls.append((start, end))
+        return []
+
+    get_range(store, T0 + 20 * STEP, T0 + 29 * STEP, nothing)
+    get_range(store, T0 + 20 * STEP, T0 + 29 * STEP, nothing)
+    assert calls[-2:] == [(T0 + 20 * STEP, T0 + 29 * STEP)] * 2
+
+
+def test_store_survives_restart(tmp_path):
+    calls = []
+    get_range(CandleStore(root=str(tmp_path)), T0, T0 + 9 * STEP, make_fetch(calls))
+    result = get_range(CandleStore(root=str(tmp_path)), T0, T0 + 9 * STEP, make_fetch(calls))
+    assert len(calls) == 1
+    assert result["close"][0] == 1.5
+
+
+def test_split_pages_aligned():
+    pages = list(split_pages(T0, T0 + 2499 * STEP, STEP, 1000))
+    assert pages == [
+        (T0, T0 + 999 * STEP),
+        (T0 + 1000 * STEP, T0 + 1999 * STEP),
+        (T0 + 2000 * STEP, T0 + 2499 * STEP),
+    ]
+
+
+def test_iter_range_pages_in_order(tmp_path):
+    calls = []
+    store = CandleStore(root=str(tmp_path))
+
+    async def run():
+        pages = []
+        async for page in store.iter_range(
+            "binance", "BTC/USDT", "1m", STEP, T0, T0 + 2499 * STEP, make_fetch(calls),
+            page_size=1000, concurrency=3,
+        ):
+            pages.append(page)
+        return pages
+
+    pages = asyncio.run(run())
+    assert [len(p) for p in pages] == [1000, 1000, 500]
+    assert pages[1]["timestamp"][0] == T0 + 1000 * STEP
+    assert len(calls) == 3
+
+
+def test_unpersisted_range_always_fetches(tmp_path):
+    calls = []
+    store = CandleStore(root=str(tmp_path))
+    for _ in range(2):
+        asyncio.run(store.get_range("binance", "BTC/USDT", "1m", STEP, T0, T0 + 9 * STEP,
+                                    make_fetch(calls), persist=False))
+    assert len(calls) == 2
+    assert not (tmp_path / "binance").exists()
+
+
+def test_rows_stop_at_the_current_candle(fake_exchanges):
+    import time
+    from services.exchange_client import ExchangeClient
+
+    now = int(time.time() * 1000) // STEP * STEP
+    rows = asyncio.run(ExchangeClient._fetch_ohlcv_rows(
+        "binance", "BTC/USDT", "1m", STEP, now - 9 * STEP, now + 90 * STEP
+    ))
+    assert len(rows) == 10 and rows[-1][0] == now
+    assert [since for since, _ in fake_exchanges["binance"].ohlcv_calls] == [now - 9 * STEP]
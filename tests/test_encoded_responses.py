@@ -0,0 +1,110 @@
+import asyncio
+import json
+import pytest
+from conftest import FakeExchange
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from models.response_models import OHLCVResponse, TickerResponse
+from services.cache_service import Cache, cache
+from services.exchange_client import ExchangeClient
+from services.format_service import encode_model
+import services.format_service as format_service
+
+OHLCV = {
+    "exchange": "binance",
+    "symbol": "BTC/USDT",
+    "interval": "1m",
+    "ohlcv": [
+        {"timestamp": 1600000000, "open": 10000, "high": 10050.5, "low": 9950, "close": 1e-05, "volume": 15.0},
+    ],
+}
+
+
+def counting(encode):
+    calls = []
+
+    def wrapped(data):
+        calls.append(data)
+        return encode(data)
+    return wrapped, calls
+
+
+@pytest.mark.parametrize("model, data", [
+    (TickerResponse, {"exchange": "binance", "symbol": "BTC/USDT", "price": 10000.25, "timestamp": 1600000000}),
+    (OHLCVResponse, OHLCV),
+])
+def test_encoded_bytes_match_response_model(monkeypatch, model, data):
+    expected = jsonable_encoder(model(**data))
+    assert json.loads(encode_model(model)(data)) == expected
+    # Without orjson the bytes are exactly what FastAPI would have sent
+    monkeypatch.setattr(format_service, "orjson", None)
+    assert encode_model(model)(data) == JSONResponse(expected).body
+
+
+def test_cache_keeps_encoding_with_entry():
+    c = Cache(max_bytes=1_000_000)
+    value = {"price": 1.0}
+    c.set("ticker:x", value, ttl=60)
+    encode, calls = counting(lambda data: json.dumps(data).encode())
+    before = c.stats()["bytes"]
+    first = c.encoded("ticker:x", encode, value)
+    assert c.encoded("ticker:x", encode, value) is first
+    assert len(calls) == 1
+    assert c.stats()["bytes"] == before + len(first)
+    # Another encoding of the same entry is kept separately
+    c.encoded("ticker:x", encode, value, variant="other")
+    assert len(calls) == 2
+    # A replaced value is encoded afresh; a value the key no longer holds is not kept
+    c.set("ticker:x", {"price": 2.0}, ttl=60)
+    assert c.encoded("ticker:x", encode, c.get("ticker:x")) == b'{"price": 2.0}'
+    assert c.encoded("ticker:x", encode, value) == first
+    c.encoded("ticker:x", encode, value)
+    assert len(calls) == 5
+
+
+@pytest.fixture
+def fake(fake_exchanges):
+    fake_exchanges["binance"] = FakeExchange(trades=[
+        {"id": str(i), "timestamp": 1600000000000 + i * 1000, "price": 100.0 + i, "amount": 1.0, "side": "buy"}
+        for i in range(10)
+    ])
+    return fake_exchanges["binance"]
+
+
+def test_ticker_hits_skip_encoding(fake):
+    encode, calls = counting(encode_model(TickerResponse))
+
+    async def run():
+        first = await ExchangeClient.get_ticker_price("binance", "BTC/USDT", encode=encode)
+        second = await ExchangeClient.get_ticker_price("binance", "BTC/USDT", encode=encode)
+        fake.price = 101.0
+        cache.delete("ticker:binance:BTC/USDT")
+        third = await ExchangeClient.get_ticker_price("binance", "BTC/USDT", encode=encode)
+        return first, second, third
+
+    first, second, third = asyncio.run(run())
+    assert second is first
+    assert json.loads(first)["price"] == 100.0 and json.loads(third)["price"] == 101.0
+    assert len(calls) == 2
+
+
+def test_trade_history_bytes_follow_tape_marker(fake):
+    encode, calls = counting(lambda data: json.dumps(data).encode())
+
+    async def history(limit):
+        return json.loads(await ExchangeClient.get_trade_history("binance", "BTC/USDT", limit, encode=encode))
+
+    async def run():
+        first = await history(3)
+        assert await history(3) == first
+        await history(5)
+        fake.trades.append(
+            {"id": "10", "timestamp": 1600000010000, "price": 110.0, "amount": 1.0, "side": "sell"}
+        )
+        cache.delete("tradehistory:binance:BTC/USDT")
+        return first, await history(3)
+
+    first, latest = asyncio.run(run())
+    assert [t["trade_id"] for t in first["trades"]] == ["7", "8", "9"]
+    assert [t["trade_id"] for t in latest["trades"]] == ["8", "9", "10"]
+    assert len(calls) == 3
@@ -0,0 +1,54 @@
+import asyncio
+import threading
+import ccxt.async_support as ccxt_async
+from config import settings
+from services.exchange_pool import ExchangePool, ThreadedExchange
+
+
+def test_async_instances_share_one_session():
+    pool = ExchangePool()
+
+    async def run():
+        binance = await pool.get("binance")
+        again = await pool.get("binance")
+        kraken = await pool.get("kraken")
+        assert binance is again
+        assert isinstance(binance, ccxt_async.binance)
+        assert binance.session is kraken.session
+        session = binance.session
+        await pool.close()
+        return session
+
+    session = asyncio.run(run())
+    assert session.closed
+
+
+def test_sync_exchanges_run_on_thread_pool(monkeypatch):
+    monkeypatch.setattr(settings, "EXCHANGE_SYNC_EXCHANGES", "kraken")
+    pool = ExchangePool()
+
+    async def run():
+        ex = await pool.get("kraken")
+        assert isinstance(ex, ThreadedExchange)
+        ms = await ex.milliseconds()
+        await pool.close()
+        return ms
+
+    assert asyncio.run(run()) > 0
+
+
+def test_threaded_calls_leave_the_event_loop():
+    from concurrent.futures import ThreadPoolExecutor
+
+    class SyncOnly:
+        id = "synconly"
+
+        def whoami(self):
+            return threading.current_thread().name
+
+    async def run():
+        ex = ThreadedExchange(SyncOnly(), ThreadPoolExecutor(thread_name_prefix="ccxt-sync"))
+        assert ex.id == "synconly"
+        return await ex.whoami()
+
+    assert asyncio.run(run()).startswith("ccxt-sync")
@@ -1,3 +1,4 @@
+import json
 import pytest
 from fastapi.testclient import TestClient
 from server import app
@@ -17,7 +18,8 @@ async def test_get_ohlcv(mocker):
     }
     mocker.patch(
         "services.exchange_client.ExchangeClient.get_ohlcv",
-        return_value=fake_ohlcv
+        # Routes pass a response encoder and send back its bytes
+        side_effect=lambda *args, encode, **kwargs: encode(fake_ohlcv),
     )
     response = client.post(
         "/api/v1/historical/ohlcv",
@@ -32,4 +34,113 @@ async def test_get_ohlcv(mocker):
     )
     assert response.status_code == 200
     assert len(response.json()["ohlcv"]) == 2
-    assert response.json()["ohlcv"][0]["open"] == 10000
\ No newline at end of file
+    assert response.json()["ohlcv"][0]["open"] == 10000
+
+def _pages():
+    async def gen():
+        yield [{"timestamp": 1600000000, "open": 1, "high": 2, "low": 0.5, "close": 1.5, "volume": 3.0}]
+        yield [{"timestamp": 1600000060, "open": 1.5, "high": 2, "low": 1, "close": 1.8, "volume": 4.0}]
+    return gen()
+
+
+def test_stream_ohlcv_ndjson(mocker):
+    mocker.patch("services.exchange_client.ExchangeClient.stream_ohlcv", return_value=_pages())
+    response = client.post(
+        "/api/v1/historical/ohlcv/stream",
+        json={"exchange": "binance", "symbol": "BTC/USDT", "interval": "1m", "start_timestamp": 1600000000},
+    )
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert [line["timestamp"] for line in lines] == [1600000000, 1600000060]
+
+
+def test_stream_ohlcv_json(mocker):
+    mocker.patch("services.exchange_client.ExchangeClient.stream_ohlcv", return_value=_pages())
+    response = client.post(
+        "/api/v1/historical/ohlcv/stream",
+        json={"exchange": "binance", "symbol": "BTC/USDT", "interval": "1m",
+              "start_timestamp": 1600000000, "format": "json"},
+    )
+    body = response.json()
+    assert body["symbol"] == "BTC/USDT"
+    assert len(body["ohlcv"]) == 2
+
+
+def test_stream_ohlcv_sends_missing_prices_as_null(mocker):
+    async def pages():
+        yield [{"timestamp": 1600000000, "open": 1, "high": 2, "low": 0.5, "close": float("nan"), "volume": 3.0}]
+
+    def strict(token):
+        raise ValueError(f"invalid JSON constant {token}")
+
+    for fmt in ("ndjson", "json"):
+        mocker.patch("services.exchange_client.ExchangeClient.stream_ohlcv", return_value=pages())
+        response = client.post(
+            "/api/v1/historical/ohlcv/stream",
+            json={"exchange": "binance", "symbol": "BTC/USDT", "interval": "1m",
+                  "start_timestamp": 1600000000, "format": fmt},
+        )
+        body = json.loads(response.text.splitlines()[0], parse_constant=strict)
+        candle = body["ohlcv"][0] if fmt == "json" else body
+        assert candle["close"] is None and candle["open"] == 1
+
+
+def _candles():
+    from services.candle_store import to_candle_array
+    return to_candle_array([
+        [1600000000000, 10000, 10050, 9950, 10020, 15.0],
+        [1600000060000, 10020, 10060, 9990, 10030, 20.0],
+    ])
+
+
+OHLCV_BODY = {"exchange": "binance", "symbol": "BTC/USDT", "interval": "1m",
+              "start_timestamp": None, "end_timestamp": None, "limit": 2}
+
+
+def test_ohlcv_columnar_json(mocker):
+    mocker.patch("services.exchange_client.ExchangeClient.get_ohlcv_candles", return_value=_candles())
+    response = client.post("/api/v1/historical/ohlcv?format=columnar", json=OHLCV_BODY)
+    assert response.status_code == 200
+    columns = response.json()["columns"]
+    assert columns["timestamp"] == [1600000000, 1600000060]
+    assert columns["close"] == [10020, 10030]
+
+
+def test_ohlcv_binary_formats_via_accept(mocker):
+    msgpack = pytest.importorskip("msgpack")
+    pa = pytest.importorskip("pyarrow")
+    mocker.patch("services.exchange_client.ExchangeClient.get_ohlcv_candles", return_value=_candles())
+    response = client.post("/api/v1/historical/ohlcv", json=OHLCV_BODY, headers={"Accept": "application/msgpack"})
+    assert response.headers["content-type"] == "application/msgpack"
+    assert msgpack.unpackb(response.content)["columns"]["volume"] == [15.0, 20.0]
+    response = client.post(
+        "/api/v1/historical/ohlcv", json=OHLCV_BODY, headers={"Accept": "application/vnd.apache.arrow.stream"}
+    )
+    table = pa.ipc.open_stream(response.content).read_all()
+    assert table.column("open").to_pylist() == [10000, 10020]
+
+
+def test_ohlcv_unknown_format():
+    response = client.post("/api/v1/historical/ohlcv?format=xml", json=OHLCV_BODY)
+    assert response.status_code == 406
+
+
+def test_ohlcv_binary_formats_without_their_libraries(mocker, monkeypatch):
+    import services.format_service as format_service
+    monkeypatch.setattr(format_service, "msgpack", None)
+    monkeypatch.setattr(format_service, "pa", None)
+    mocker.patch("services.exchange_client.ExchangeClient.get_ohlcv_candles", return_value=_candles())
+    for fmt in ("msgpack", "arrow"):
+        response = client.post(f"/api/v1/historical/ohlcv?format={fmt}", json=OHLCV_BODY)
+        assert response.status_code == 406
+        assert "Available: application/json" in response.json()["detail"]
+    response = client.post("/api/v1/historical/ohlcv", json=OHLCV_BODY,
+                           headers={"Accept": "application/msgpack;q=1, application/vnd.mcp.columnar+json;q=0.5"})
+    assert response.headers["content-type"] == "application/vnd.mcp.columnar+json"
+
+
+def test_negotiate_prefers_highest_quality():
+    from services.format_service import negotiate, COLUMNAR_JSON, JSON
+    assert negotiate("application/json;q=0.5, application/vnd.mcp.columnar+json") == COLUMNAR_JSON
+    assert negotiate("text/html, */*") == JSON
@@ -0,0 +1,152 @@
+import time
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+from conftest import FakeExchange
+from config import settings
+from server import app
+from services.cache_service import cache
+from services.candle_store import CANDLE_DTYPE
+from services.http_cache import matches
+
+client = TestClient(app)
+
+TICKER = {"exchange": "binance", "symbol": "BTC/USDT", "price": 10000.0, "timestamp": 1600000000}
+
+
+def test_if_none_match_parsing():
+    assert matches('"a", W/"b"', '"b"')
+    assert matches("*", '"a"')
+    assert not matches('"a"', '"b"')
+    assert not matches(None, '"a"')
+
+
+def test_get_ticker_revalidates_with_etag(mocker):
+    ticker = dict(TICKER)
+    mocker.patch(
+        "services.exchange_client.ExchangeClient.get_ticker_price",
+        side_effect=lambda *args, encode, **kwargs: encode(ticker),
+    )
+    params = {"exchange": "binance", "symbol": "BTC/USDT"}
+    first = client.get("/api/v1/real_time/ticker", params=params)
+    assert first.status_code == 200
+    assert first.json() == TICKER
+    assert first.headers["cache-control"] == f"public, max-age={settings.CACHE_TTL}"
+    tag = first.headers["etag"]
+
+    unchanged = client.get("/api/v1/real_time/ticker", params=params, headers={"If-None-Match": tag})
+    assert unchanged.status_code == 304
+    assert unchanged.content == b""
+    assert unchanged.headers["etag"] == tag
+
+    ticker["price"] = 10001.0
+    changed = client.get("/api/v1/real_time/ticker", params=params, headers={"If-None-Match": tag})
+    assert changed.status_code == 200
+    assert changed.json()["price"] == 10001.0
+    assert changed.headers["etag"] != tag
+
+
+def test_get_order_book_and_trades(mocker):
+    book = {"exchange": "binance", "symbol": "BTC/USDT", "bids": [[1.0, 2.0]], "asks": [[1.1, 3.0]], "timestamp": 1}
+    order_book = mocker.patch(
+        "services.exchange_client.ExchangeClient.get_order_book",
+        side_effect=lambda *args, encode, **kwargs: encode(book),
+    )
+    mocker.patch(
+        "services.exchange_client.ExchangeClient.get_trade_history",
+        side_effect=lambda *args, encode, **kwargs: encode({"exchange": "binance", "symbol": "BTC/USDT", "trades": []}),
+    )
+    response = client.get("/api/v1/real_time/order_book", params={"exchange": "binance", "symbol": "BTC/USDT", "limit": 5})
+    assert response.status_code == 200 and response.json()["bids"] == [[1.0, 2.0]]
+    assert order_book.call_args.args[:3] == ("binance", "BTC/USDT", 5)
+    response = client.get("/api/v1/real_time/trades", params={"exchange": "binance", "symbol": "BTC/USDT"})
+    assert response.status_code == 200 and response.json()["trades"] == []
+    assert "etag" in response.headers
+
+
+def test_get_ohlcv_varies_by_format(mocker):
+    candles = np.array([(1600000000000, 1.0, 2.0, 0.5, 1.5, 3.0)], dtype=CANDLE_DTYPE)
+    mocker.patch(
+        "services.exchange_client.ExchangeClient.get_ohlcv",
+        side_effect=lambda *args, encode, **kwargs: encode({
+            "exchange": "binance", "symbol": "BTC/USDT", "interval": "1m",
+            "ohlcv": [{"timestamp": 1600000000, "open": 1.0, "high": 2.0, "low": 0.5, "close": 1.5, "volume": 3.0}],
+        }),
+    )
+    mocker.patch("services.exchange_client.ExchangeClient.get_ohlcv_candles", return_value=candles)
+    params = {"exchange": "binance", "symbol": "BTC/USDT", "interval": "1m"}
+    rows = client.get("/api/v1/historical/ohlcv", params=params)
+    columns = client.get("/api/v1/historical/ohlcv", params={**params, "format": "columnar"})
+    assert rows.status_code == columns.status_code == 200
+    assert rows.json()["ohlcv"][0]["close"] == 1.5
+    assert columns.json()["columns"]["close"] == [1.5]
+    assert rows.headers["vary"] == "Accept"
+    assert rows.headers["cache-control"] == f"public, max-age={settings.CACHE_OHLCV_TTL}"
+    assert rows.headers["etag"] != columns.headers["etag"]
+    again = client.get("/api/v1/historical/ohlcv", params=params, headers={"If-None-Match": rows.headers["etag"]})
+    assert again.status_code == 304
+
+
+def test_get_errors_are_not_cacheable(mocker):
+    mocker.patch(
+        "services.exchange_client.ExchangeClient.get_ticker_price",
+        side_effect=Exception("Symbol 'XXX/YYY' not found"),
+    )
+    response = client.get("/api/v1/real_time/ticker", params={"exchange": "binance", "symbol": "XXX/YYY"})
+    assert response.status_code == 400
+    assert "etag" not in response.headers
+
+
+@pytest.mark.parametrize("path, params, ttl, check", [
+    ("/api/v1/real_time/tickers", {"pairs": ["binance:BTC/USDT", "kraken:ETH/USD"]}, settings.CACHE_TTL,
+     lambda body: [t["exchange"] for t in body["tickers"]] == ["binance", "kraken"]),
+    ("/api/v1/real_time/order_book/metrics", {"exchange": "binance", "symbol": "BTC/USDT", "size": 1.5},
+     settings.CACHE_TTL, lambda body: body["buy"] is not None),
+    ("/api/v1/real_time/best_price", {"symbol": "BTC/USDT", "exchanges": ["binance", "kraken"]},
+     settings.CACHE_TTL, lambda body: len(body["venues"]) == 2),
+    ("/api/v1/real_time/trades/stats", {"exchange": "binance", "symbol": "BTC/USDT", "windows": [60, 600]},
+     settings.CACHE_TTL, lambda body: [w["window"] for w in body["windows"]] == [60, 600]),
+    ("/api/v1/historical/sma", {"exchange": "binance", "symbol": "BTC/USDT", "interval": "1m", "period": 5},
+     settings.CACHE_OHLCV_TTL, lambda body: body["period"] == 5 and len(body["values"]) == 96),
+    ("/api/v1/historical/ema", {"exchange": "binance", "symbol": "BTC/USDT", "interval": "1m"},
+     settings.CACHE_OHLCV_TTL, lambda body: len(body["values"]) == 100),
+    ("/api/v1/historical/rsi", {"exchange": "binance", "symbol": "BTC/USDT", "interval": "1m", "limit": 50},
+     settings.CACHE_OHLCV_TTL, lambda body: len(body["values"]) == 36),
+    ("/api/v1/historical/indicators",
+     {"exchange": "binance", "symbol": "BTC/USDT", "interval": "1m", "indicators": ["sma:period=5", "macd:fast=3,slow=6"]},
+     settings.CACHE_OHLCV_TTL, lambda body: set(body["indicators"]) == {"sma_5", "macd_3_6_9"}),
+])
+def test_read_endpoints_answer_304_when_unchanged(fake_exchanges, path, params, ttl, check):
+    fake_exchanges["binance"] = FakeExchange(trades=[
+        {"id": str(i), "timestamp": 1600000000000 + i * 1000, "price": 100.0 + i, "amount": 1.0, "side": "buy"}
+        for i in range(20)
+    ])
+    first = client.get(path, params=params)
+    assert first.status_code == 200, first.text
+    assert check(first.json())
+    assert first.headers["cache-control"] == f"public, max-age={ttl}"
+    again = client.get(path, params=params, headers={"If-None-Match": first.headers["etag"]})
+    assert again.status_code == 304 and again.content == b""
+
+
+def test_invalid_query_is_rejected_like_a_body():
+    response = client.get("/api/v1/real_time/order_book/metrics",
+                          params={"exchange": "binance", "symbol": "BTC/USDT", "size": -1})
+    assert response.status_code == 400
+    assert response.json()["detail"][0]["loc"] == ["size"]
+
+
+def test_max_age_is_what_is_left_of_the_cached_entry(fake_exchanges, monkeypatch):
+    params = {"exchange": "binance", "symbol": "BTC/USDT"}
+    assert client.get("/api/v1/real_time/ticker", params=params).headers["cache-control"] == \
+        f"public, max-age={settings.CACHE_TTL}"
+    entry = cache._store["ticker:binance:BTC/USDT"]
+    entry["expires_at"] = time.time() + 4.5
+    assert client.get("/api/v1/real_time/ticker", params=params).headers["cache-control"] == "public, max-age=5"
+    # A stale value served while refresh-ahead reloads it must not be reused downstream
+    monkeypatch.setattr(cache, "max_stale", 60)
+    entry["hits"] = cache.refresh_min_hits
+    entry["expires_at"] = time.time() - 1
+    response = client.get("/api/v1/real_time/ticker", params=params)
+    assert response.status_code == 200
+    assert response.headers["cache-control"] == "public, max-age=0"
@@ -0,0 +1,73 @@
+import numpy as np
+import pytest
+from analytics.incremental import IndicatorStateCache
+from analytics.indicators import sma, ema, rsi
+
+KEY = ("binance", "BTC/USDT", "1m")
+TS = np.arange(0, 300 * 60, 60, dtype=np.int64)
+CLOSE = 100 + np.cumsum(np.sin(np.arange(300) / 7.0))
+
+
+def test_first_call_matches_batch():
+    states = IndicatorStateCache()
+    window = slice(0, 100)
+    assert np.allclose(states.values(KEY, "sma", 14, TS[window], CLOSE[window]), sma(CLOSE[window], 14), equal_nan=True)
+    assert np.allclose(states.values(KEY, "ema", 14, TS[window], CLOSE[window]), ema(CLOSE[window], 14))
+    assert np.allclose(states.values(KEY, "rsi", 14, TS[window], CLOSE[window]), rsi(CLOSE[window], 14), equal_nan=True)
+
+
+@pytest.mark.parametrize("name, batch", [("sma", sma), ("ema", ema), ("rsi", rsi)])
+def test_sliding_window_updates_incrementally(name, batch):
+    states = IndicatorStateCache()
+    for end in range(100, 300):
+        window = slice(end - 100, end)
+        out = states.values(KEY, name, 14, TS[window], CLOSE[window])
+        assert np.allclose(out, batch(CLOSE[window], 14), equal_nan=True)
+    stats = states.stats()
+    assert stats["rebuilds"] == 1
+    assert stats["incremental_updates"] == 199
+
+
+def test_flat_window_after_moves_matches_batch_exactly():
+    closes = np.concatenate([CLOSE[:60], np.full(40, CLOSE[59])])
+    states = IndicatorStateCache()
+    states.values(KEY, "rsi", 5, TS[:70], closes[:70])
+    out = states.values(KEY, "rsi", 5, TS[60:100], closes[60:100])
+    # Neither gains nor losses in the window: exactly 100, as a batch recompute gives
+    assert np.array_equal(out, rsi(closes[60:100], 5), equal_nan=True)
+    assert states.stats()["rebuilds"] == 1
+
+
+def test_recursive_indicators_depend_only_on_the_window():
+    warm, cold = IndicatorStateCache(), IndicatorStateCache()
+    window = slice(50, 150)
+    for name, batch in (("ema", ema), ("rsi", rsi)):
+        warm.values(KEY, name, 10, TS[:100], CLOSE[:100])
+        out = warm.values(KEY, name, 10, TS[window], CLOSE[window])
+        assert np.allclose(out, cold.values(KEY, name, 10, TS[window], CLOSE[window]), equal_nan=True)
+        assert np.allclose(out, batch(CLOSE[window], 10), equal_nan=True)
+
+
+def test_fixed_start_window_updates_incrementally():
+    states = IndicatorStateCache()
+    for end in range(100, 150):
+        out = states.values(KEY, "ema", 10, TS[:end], CLOSE[:end])
+        assert np.allclose(out, ema(CLOSE[:end], 10))
+    assert states.stats()["rebuilds"] == 1
+
+
+def test_revised_history_triggers_rebuild():
+    states = IndicatorStateCache()
+    states.values(KEY, "sma", 5, TS[:50], CLOSE[:50])
+    revised = CLOSE[:51].copy()
+    revised[48] += 1.0
+    out = states.values(KEY, "sma", 5, TS[:51], revised)
+    assert np.allclose(out, sma(revised, 5), equal_nan=True)
+    assert states.stats()["rebuilds"] == 2
+
+
+def test_series_count_is_bounded():
+    states = IndicatorStateCache(max_series=2)
+    for period in (5, 6, 7):
+        states.values(KEY, "sma", period, TS[:20], CLOSE[:20])
+    assert states.stats()["series"] == 2
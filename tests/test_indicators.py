@@ -0,0 +1,69 @@
+import numpy as np
+from fastapi.testclient import TestClient
+from server import app
+from services.candle_store import to_candle_array
+from analytics.indicators import sma, ema, rsi, macd, bollinger_bands, atr, vwap, compute_indicators
+
+client = TestClient(app)
+
+CLOSE = np.array([10.0, 11.0, 12.0, 11.5, 13.0, 12.5, 14.0, 15.0, 14.5, 16.0])
+
+
+def test_sma_matches_reference():
+    out = sma(CLOSE, 3)
+    assert np.isnan(out[:2]).all()
+    expected = [sum(CLOSE[i - 2:i + 1]) / 3 for i in range(2, len(CLOSE))]
+    assert np.allclose(out[2:], expected)
+
+
+def test_ema_matches_recursive_definition():
+    out = ema(CLOSE, 4)
+    alpha, value = 2 / 5, CLOSE[0]
+    for i, x in enumerate(CLOSE):
+        value = alpha * x + (1 - alpha) * value
+        assert abs(out[i] - value) < 1e-12
+
+
+def test_rsi_bounds():
+    rising = np.arange(1.0, 30.0)
+    assert rsi(rising, 14)[-1] == 100.0
+    out = rsi(CLOSE, 3)
+    assert np.isnan(out[:3]).all()
+    assert ((out[3:] >= 0) & (out[3:] <= 100)).all()
+
+
+def test_macd_bbands_atr_vwap_shapes():
+    lines = macd(CLOSE, 3, 6, 2)
+    assert np.allclose(lines["hist"], lines["macd"] - lines["signal"])
+    bands = bollinger_bands(np.full(10, 5.0), 4, 2.0)
+    assert np.allclose(bands["upper"][3:], 5.0) and np.allclose(bands["lower"][3:], 5.0)
+    high, low = CLOSE + 1, CLOSE - 1
+    assert atr(high, low, CLOSE, 3)[2] == 2.0
+    price = np.full(10, 7.0)
+    assert np.allclose(vwap(price, price, price, np.arange(1.0, 11.0)), 7.0)
+    assert np.isnan(vwap(price, price, price, np.ones(10), 5)[3])
+
+
+def test_compute_indicators_keys():
+    arrays = {"close": CLOSE, "high": CLOSE + 1, "low": CLOSE - 1, "volume": np.ones(10)}
+    results = compute_indicators(arrays, [
+        {"name": "sma", "period": 3}, {"name": "sma", "period": 3}, {"name": "macd"}, {"name": "vwap"},
+    ])
+    assert set(results) == {"sma_3", "macd_12_26_9", "vwap"}
+
+
+def test_indicators_endpoint_single_fetch(mocker):
+    candles = to_candle_array([
+        [(1600000000 + 60 * i) * 1000, c, c + 1, c - 1, c, 1.0] for i, c in enumerate(CLOSE.tolist())
+    ])
+    fetch = mocker.patch("services.exchange_client.ExchangeClient.get_ohlcv_candles", return_value=candles)
+    response = client.post("/api/v1/historical/indicators", json={
+        "exchange": "binance", "symbol": "BTC/USDT", "interval": "1m",
+        "indicators": [{"name": "sma", "period": 3}, {"name": "rsi", "period": 3}, {"name": "bbands", "period": 4}],
+    })
+    assert response.status_code == 200
+    body = response.json()
+    assert fetch.await_count == 1
+    assert body["indicators"]["sma_3"]["sma"][0] is None
+    assert set(body["indicators"]["bbands_4_2"]) == {"middle", "upper", "lower"}
+    assert len(body["timestamps"]) == 10
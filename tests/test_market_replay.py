@@ -0,0 +1,152 @@
+import asyncio
+import os
+import time
+import numpy as np
+import pytest
+from config import settings
+from services.cache_service import cache
+from services.candle_store import CandleStore
+from services.exchange_client import ExchangeClient
+from services.market_replay import MarketRecorder, MarketReplay, stream_path, _StreamReader, _StreamWriter
+from services.markets_service import markets_registry
+from services.upstream_policy import UpstreamPolicy
+import services.exchange_client as exchange_client
+
+
+class LiveExchange:
+    has = {"fetchTickers": True}
+
+    def __init__(self):
+        self.price = 100.0
+
+    async def load_markets(self):
+        return {"BTC/USDT": {"symbol": "BTC/USDT", "info": {"raw": "x" * 100}}}
+
+    async def fetch_ticker(self, symbol):
+        self.price += 1
+        return {"symbol": symbol, "last": self.price, "timestamp": int(time.time() * 1000), "info": {}}
+
+    async def fetch_order_book(self, symbol, limit=None):
+        return {"bids": [[self.price - 1, 1.0], [self.price - 2, 2.0]], "asks": [[self.price + 1, 1.0]],
+                "timestamp": int(time.time() * 1000)}
+
+    async def fetch_trades(self, symbol, since=None, limit=None):
+        return [{"id": str(i), "timestamp": 1000 * i, "price": 100.0 + i, "amount": 1.0, "side": "buy"}
+                for i in range(1, 4)]
+
+    async def fetch_ohlcv(self, symbol, timeframe="1m", since=None, limit=None):
+        return [[60000 * i, 1.0, 2.0, 0.5, 1.5, 10.0] for i in range(1, 6)]
+
+
+@pytest.fixture
+def modes(monkeypatch, tmp_path):
+    live = LiveExchange()
+
+    async def get(exchange):
+        return live
+
+    def use(mode, **replay_options):
+        cache.clear()
+        markets_registry.invalidate()
+        monkeypatch.setattr(settings, "MARKET_DATA_MODE", mode)
+        monkeypatch.setattr(exchange_client, "market_replay", MarketReplay(str(tmp_path), **replay_options))
+        return exchange_client.market_replay
+
+    monkeypatch.setattr(exchange_client.exchange_pool, "get", get)
+    monkeypatch.setattr(exchange_client, "market_recorder", MarketRecorder(str(tmp_path)))
+    monkeypatch.setattr(exchange_client, "upstream", UpstreamPolicy(backoff_base=0.0))
+    yield use
+    exchange_client.market_recorder.close()
+    cache.clear()
+    markets_registry.invalidate()
+
+
+def test_record_then_replay_through_exchange_client(modes):
+    async def record():
+        prices = []
+        for _ in range(3):
+            cache.clear()
+            prices.append((await ExchangeClient.get_ticker_price("binance", "BTC/USDT"))["price"])
+        await ExchangeClient._fetch_order_book("binance", "BTC/USDT", 20)
+        ex = await ExchangeClient.get_exchange_instance("binance")
+        await ex.fetch_trades("BTC/USDT")
+        await ex.fetch_trades("BTC/USDT", since=2000)
+        await ex.fetch_ohlcv("BTC/USDT", "1m")
+        return prices
+
+    modes("record")
+    prices = asyncio.run(record())
+
+    async def replay():
+        seen = []
+        for _ in range(4):
+            cache.clear()
+            seen.append((await ExchangeClient.get_ticker_price("binance", "BTC/USDT"))["price"])
+        ex = await ExchangeClient.get_exchange_instance("binance")
+        book = await ex.fetch_order_book("BTC/USDT", 1)
+        trades = await ex.fetch_trades("BTC/USDT", since=2000)
+        candles = await ex.fetch_ohlcv("BTC/USDT", "1m", limit=2)
+        with pytest.raises(Exception, match="No recorded"):
+            await ex.fetch_ticker("ETH/USDT")
+        return seen, book, trades, candles
+
+    modes("replay", speed=0)
+    seen, book, trades, candles = asyncio.run(replay())
+    # As fast as possible: one recorded snapshot per call, holding on the last
+    assert seen == prices + [prices[-1]]
+    assert book["bids"] == [[prices[-1] - 1, 1.0]]
+    # Overlapping trade pages were recorded once
+    assert [t["id"] for t in trades] == ["2", "3"]
+    assert [row[0] for row in candles] == [240000, 300000]
+
+
+def test_replay_clock_and_seek(tmp_path):
+    recorder = MarketRecorder(str(tmp_path))
+    writer = recorder._writer("binance", "BTC/USDT", "ticker")
+    for ts in (1000, 2000, 3000):
+        writer.append(ts, {"last": ts / 10, "timestamp": ts})
+    recorder.close()
+
+    replay = MarketReplay(str(tmp_path), speed=1000.0, start=1500)
+    assert replay.snapshot("binance", "BTC/USDT", "ticker")["last"] == 100.0
+    replay.seek(2500)
+    assert replay.snapshot("binance", "BTC/USDT", "ticker")["last"] == 200.0
+    time.sleep(0.6)  # 600 ms at 1000x = 600 s of market time
+    assert replay.snapshot("binance", "BTC/USDT", "ticker")["last"] == 300.0
+    replay.seek(500)
+    with pytest.raises(Exception, match="No ticker data"):
+        replay.snapshot("binance", "BTC/USDT", "ticker")
+    replay.close()
+
+
+def test_stream_reader_sorts_and_dedupes_rows(tmp_path):
+    path = stream_path(str(tmp_path), "binance", "BTC/USDT", "ohlcv", "1m")
+    writer = _StreamWriter(path)
+    for ts, close in [(180, 3.0), (60, 1.0), (120, 2.0), (180, 3.5)]:
+        writer.append(ts, [ts, close])
+    writer.close()
+    reader = _StreamReader(path, dedupe=True)
+    assert np.array_equal(reader.timestamps, [60, 120, 180])
+    assert reader.read_range(100, 1000) == [[120, 2.0], [180, 3.5]]
+    assert reader.read_range(None, 150, limit=1) == [[120, 2.0]]
+    assert reader.at_or_before(59) == -1
+    reader.close()
+
+
+def test_replayed_candles_stop_at_the_clock_and_skip_the_store(modes, monkeypatch, tmp_path):
+    recorder = MarketRecorder(str(tmp_path))
+    recorder.record_markets("binance", {"BTC/USDT": {"symbol": "BTC/USDT"}})
+    recorder.record_candles("binance", "BTC/USDT", "1m", [[60000 * i, 1.0, 2.0, 0.5, 1.5, 10.0] for i in range(100)])
+    recorder.close()
+    store = CandleStore(str(tmp_path / "candles"))
+    monkeypatch.setattr(exchange_client, "candle_store", store)
+    replay = modes("replay", speed=1.0, start=60000 * 5)
+
+    async def candles():
+        cache.clear()
+        return await ExchangeClient.get_ohlcv_candles("binance", "BTC/USDT", "1m", start_timestamp=60, limit=50)
+
+    assert list(asyncio.run(candles())["timestamp"] // 60000) == [1, 2, 3, 4, 5]
+    replay.seek(60000 * 8)
+    assert list(asyncio.run(candles())["timestamp"] // 60000) == list(range(1, 9))
+    assert not os.path.exists(store.root)
@@ -0,0 +1,89 @@
+import asyncio
+import pytest
+from services.markets_service import MarketsRegistry
+
+
+def make_loader(calls, delay=0.01):
+    async def loader(exchange):
+        calls.append(exchange)
+        await asyncio.sleep(delay)
+        return {"BTC/USDT": {}, "ETH/USDT": {}}
+    return loader
+
+
+def test_concurrent_loads_are_collapsed():
+    calls = []
+    registry = MarketsRegistry(ttl=60, loader=make_loader(calls))
+
+    async def run():
+        return await asyncio.gather(*[registry.has_symbol("binance", "BTC/USDT") for _ in range(20)])
+
+    results = asyncio.run(run())
+    assert all(results)
+    assert calls == ["binance"]
+
+
+def test_unknown_symbol_and_shared_symbols():
+    calls = []
+    registry = MarketsRegistry(ttl=60, loader=make_loader(calls))
+
+    async def run():
+        listed = await registry.has_symbol("binance", "FOO/BAR")
+        symbols = await registry.get_symbols("binance")
+        return listed, symbols
+
+    listed, symbols = asyncio.run(run())
+    assert listed is False
+    assert symbols == ["BTC/USDT", "ETH/USDT"]
+    assert len(calls) == 1
+
+
+def test_stale_entry_served_while_refreshing():
+    calls = []
+    registry = MarketsRegistry(ttl=0, loader=make_loader(calls))
+
+    async def run():
+        await registry.get_symbols("binance")
+        # Entry is immediately stale; it is still served and a refresh starts
+        symbols = await registry.get_symbols("binance")
+        await asyncio.sleep(0.05)
+        return symbols
+
+    assert asyncio.run(run()) == ["BTC/USDT", "ETH/USDT"]
+    assert len(calls) == 2
+
+
+def test_load_failure_propagates():
+    async def loader(exchange):
+        raise RuntimeError("boom")
+
+    registry = MarketsRegistry(loader=loader)
+    with pytest.raises(RuntimeError):
+        asyncio.run(registry.has_symbol("binance", "BTC/USDT"))
+
+
+def test_snapshot_restores_markets_without_loading(tmp_path):
+    path = str(tmp_path / "markets.json")
+    calls = []
+    first = MarketsRegistry(ttl=60, loader=make_loader(calls), snapshot_path=path)
+    asyncio.run(first.get_symbols("binance"))
+
+    restored = MarketsRegistry(ttl=60, loader=make_loader(calls), snapshot_path=path)
+    assert restored.load_snapshot() == 1
+    assert "kraken" in restored.exchange_ids()
+
+    async def run():
+        listed = await restored.has_symbol("binance", "ETH/USDT")
+        await asyncio.gather(*restored.revalidate())
+        return listed
+
+    assert asyncio.run(run())
+    # One load for the first registry, one background revalidation for the restored one
+    assert calls == ["binance", "binance"]
+
+
+def test_outdated_snapshot_is_ignored(tmp_path):
+    path = tmp_path / "markets.json"
+    path.write_text('{"version": 0, "ccxt": "0.0.1", "exchanges": [], "markets": {"binance": {}}}')
+    registry = MarketsRegistry(loader=make_loader([]), snapshot_path=str(path))
+    assert registry.load_snapshot() == 0
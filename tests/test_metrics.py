@@ -9,3 +9,35 @@ def test_metrics_endpoint():
     assert response.status_code == 200
     # content type should be the Prometheus exposition format
     assert "text/plain" in response.headers.get("content-type", "")
+
+
+def test_request_metrics_use_route_templates():
+    client.get("/api/v1/utils/symbols/notanexchange")
+    body = client.get("/metrics").text
+    assert 'endpoint="/api/v1/utils/symbols/{exchange}"' in body
+    assert "notanexchange" not in body
+    assert "mcp_requests_in_flight" in body
+    assert "mcp_metrics_overhead_seconds_count" in body
+
+
+def test_upstream_and_cache_metrics_exposed():
+    import asyncio
+    import ccxt
+    from services.cache_service import cache
+    from services.upstream_policy import UpstreamPolicy
+
+    attempts = []
+
+    async def flaky():
+        attempts.append(1)
+        if len(attempts) == 1:
+            raise ccxt.RequestTimeout("slow")
+        return "ok"
+
+    asyncio.run(UpstreamPolicy(backoff_base=0.0).call("metricsex", "fetch_ticker", flaky, "failed"))
+    cache.get("ticker:metricsex:BTC/USDT")
+    body = client.get("/metrics").text
+    assert 'mcp_upstream_latency_seconds_count{exchange="metricsex",method="fetch_ticker"} 2.0' in body
+    assert 'mcp_upstream_errors_total{error="RequestTimeout",exchange="metricsex",method="fetch_ticker"} 1.0' in body
+    assert 'mcp_upstream_retries_total{exchange="metricsex",method="fetch_ticker"} 1.0' in body
+    assert 'mcp_cache_events_total{event="misses",namespace="ticker"}' in body
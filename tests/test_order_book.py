@@ -0,0 +1,64 @@
+import numpy as np
+from fastapi.testclient import TestClient
+from server import app
+from analytics.order_book import LocalOrderBook, OrderBookRegistry, bucket_levels, book_metrics, to_levels
+
+client = TestClient(app)
+
+BIDS = [[100.0, 1.0], [99.5, 2.0], [99.0, 3.0]]
+ASKS = [[101.0, 1.5], [101.5, 1.0], [102.0, 4.0]]
+
+
+def test_snapshot_diff_applies_only_changes():
+    book = LocalOrderBook()
+    assert book.apply_snapshot(BIDS, ASKS) == 6
+    assert book.apply_snapshot(BIDS, ASKS) == 0
+    # One bid amount changes, one ask level disappears and a new one appears
+    changed = book.apply_snapshot([[100.0, 1.0], [99.5, 5.0], [99.0, 3.0]], [[101.0, 1.5], [101.2, 0.5], [102.0, 4.0]])
+    assert changed == 3
+    assert book.bids.tolist() == [[100.0, 1.0], [99.5, 5.0], [99.0, 3.0]]
+    assert book.asks.tolist() == [[101.0, 1.5], [101.2, 0.5], [102.0, 4.0]]
+    assert book.version == 2
+
+
+def test_bucket_levels_rounds_away_from_mid():
+    bids = to_levels([[100.4, 1.0], [100.1, 2.0], [99.9, 3.0]])
+    asks = to_levels([[100.6, 1.0], [100.9, 2.0], [101.0, 3.0], [101.1, 1.0]])
+    assert bucket_levels(bids, 1.0, descending=True).tolist() == [[100.0, 3.0], [99.0, 3.0]]
+    assert bucket_levels(asks, 1.0, descending=False).tolist() == [[101.0, 6.0], [102.0, 1.0]]
+
+
+def test_book_metrics_and_slippage():
+    m = book_metrics(to_levels(BIDS), to_levels(ASKS), size=2.0)
+    assert m["mid"] == 100.5 and m["spread"] == 1.0
+    assert np.isclose(m["imbalance"], (6.0 - 6.5) / 12.5)
+    assert m["ask_depth"][:, 1].tolist() == [1.5, 2.5, 6.5]
+    assert np.isclose(m["buy"]["vwap"], (1.5 * 101.0 + 0.5 * 101.5) / 2.0)
+    assert m["buy"]["worst_price"] == 101.5
+    assert m["sell"]["filled"] == 2.0 and m["sell"]["slippage_bps"] > 0
+    partial = book_metrics(to_levels(BIDS), to_levels(ASKS), size=100.0)
+    assert partial["buy"]["filled"] == 6.5
+
+
+def test_registry_is_bounded():
+    registry = OrderBookRegistry(max_books=2)
+    for symbol in ("A/B", "C/D", "E/F"):
+        registry.apply("binance", symbol, BIDS, ASKS)
+    assert registry.get("binance", "A/B") is None
+    assert registry.stats()["books"] == 2
+
+
+def test_order_book_metrics_endpoint(mocker):
+    mocker.patch(
+        "services.exchange_client.ExchangeClient.get_order_book",
+        return_value={"exchange": "binance", "symbol": "BTC/USDT", "bids": BIDS, "asks": ASKS, "timestamp": 1600000000},
+    )
+    response = client.post(
+        "/api/v1/real_time/order_book/metrics",
+        json={"exchange": "binance", "symbol": "BTC/USDT", "size": 1.0, "tick_size": 1.0, "depth": 2},
+    )
+    assert response.status_code == 200
+    body = response.json()
+    assert body["best_bid"] == 100.0 and body["best_ask"] == 101.0
+    assert body["bid_depth"] == [[100.0, 1.0], [99.0, 6.0]]
+    assert body["buy"]["vwap"] == 101.0
@@ -1,7 +1,92 @@
+import pytest
+import numpy as np
+from fastapi.testclient import TestClient
+from server import app
+from services.candle_store import to_candle_array
+from analytics.portfolio import (
+    calculate_portfolio_value, holdings_matrix, value_portfolios, value_series, max_drawdown, correlation
+)
 
-from analytics.portfolio import calculate_portfolio_value
+client = TestClient(app)
 
 def test_value():
     prices={'BTC':100}
     holdings={'BTC':2}
     assert calculate_portfolio_value(prices, holdings)==200
+
+
+def test_value_many_portfolios_in_one_call():
+    assets, matrix = holdings_matrix([{"BTC": 1, "ETH": 2}, {"ETH": 1}, {"SOL": 3}])
+    assert assets == ["BTC", "ETH", "SOL"]
+    values = value_portfolios(matrix, np.array([100.0, 10.0, np.nan]))
+    assert values.tolist() == [120.0, 10.0, 0.0]
+
+
+def test_series_drawdown_and_correlation():
+    closes = np.array([[10.0, 1.0], [12.0, 1.2], [9.0, 0.9], [11.0, 1.1]])
+    series = value_series(np.array([[1.0, 0.0], [0.0, 10.0]]), closes)
+    assert series[:, 0].tolist() == [10.0, 12.0, 9.0, 11.0]
+    assert np.allclose(max_drawdown(series), [0.25, 0.25])
+    assert np.allclose(correlation(closes), 1.0)
+
+
+def test_portfolio_value_endpoint_resolves_prices(mocker):
+    get_tickers = mocker.patch(
+        "services.exchange_client.ExchangeClient.get_tickers",
+        return_value=([
+            {"exchange": "binance", "symbol": "BTC/USDT", "price": 100.0, "timestamp": 1},
+            {"exchange": "binance", "symbol": "ETH/USDT", "price": 10.0, "timestamp": 1},
+        ], [{"exchange": "binance", "symbol": "XYZ/USDT", "detail": "not supported"}]),
+    )
+    response = client.post("/api/v1/utils/portfolio/value", json={
+        "exchange": "binance",
+        "portfolios": [{"BTC": 1, "USDT": 5}, {"ETH": 3, "XYZ": 1}],
+    })
+    assert response.status_code == 200
+    body = response.json()
+    assert body["values"] == [105.0, 30.0]
+    assert body["errors"][0]["symbol"] == "XYZ/USDT"
+    assert get_tickers.await_count == 1
+    single = client.post("/api/v1/utils/portfolio_value", json={"holdings": {"BTC": 2}, "exchange": "binance"})
+    assert single.json()["value"] == 200.0
+
+
+def test_portfolio_risk_endpoint(mocker):
+    def candles(closes, offset=0):
+        return to_candle_array([
+            [(1600000000 + 86400 * (i + offset)) * 1000, c, c, c, c, 1.0] for i, c in enumerate(closes)
+        ])
+
+    by_symbol = {"BTC/USDT": candles([10.0, 12.0, 9.0, 11.0]), "ETH/USDT": candles([2.0, 2.0, 2.0], offset=1)}
+
+    async def fake_candles(exchange, symbol, interval, start, end, limit):
+        return by_symbol[symbol]
+
+    mocker.patch("services.exchange_client.ExchangeClient.get_ohlcv_candles", side_effect=fake_candles)
+    response = client.post("/api/v1/utils/portfolio/risk", json={
+        "exchange": "binance", "portfolios": [{"BTC": 1, "ETH": 1}], "interval": "1d",
+    })
+    assert response.status_code == 200
+    body = response.json()
+    assert len(body["timestamps"]) == 3
+    assert body["values"][0] == [14.0, 11.0, 13.0]
+    assert body["max_drawdown"][0] == pytest.approx(3.0 / 14.0)
+    assert body["correlation"][1][1] is None
+
+
+def test_portfolio_risk_without_overlap_explains_error(mocker):
+    by_symbol = {
+        "BTC/USDT": to_candle_array([[1600000000000, 1.0, 1.0, 1.0, 1.0, 1.0]]),
+        "ETH/USDT": to_candle_array([[1600086400000, 2.0, 2.0, 2.0, 2.0, 1.0]]),
+    }
+
+    async def fake_candles(exchange, symbol, interval, start, end, limit):
+        return by_symbol[symbol]
+
+    mocker.patch("services.exchange_client.ExchangeClient.get_ohlcv_candles", side_effect=fake_candles)
+    response = client.post("/api/v1/utils/portfolio/risk", json={
+        "exchange": "binance", "portfolios": [{"BTC": 1, "ETH": 1}], "interval": "1d",
+    })
+    assert response.status_code == 400
+    assert "in common" in response.json()["detail"]
+    assert max_drawdown(np.empty((0, 2))).shape == (2,)
@@ -0,0 +1,38 @@
+from fastapi.testclient import TestClient
+import server
+from server import app
+from services.rate_limit_service import RateLimiter
+
+client = TestClient(app)
+
+
+def test_burst_then_retry_after():
+    limiter = RateLimiter(rate=2.0, burst=3)
+    assert [limiter.acquire("a", now=0.0) for _ in range(3)] == [0.0, 0.0, 0.0]
+    assert limiter.acquire("a", now=0.0) == 0.5
+    # Half a second refills one token
+    assert limiter.acquire("a", now=0.5) == 0.0
+
+
+def test_keys_are_independent():
+    limiter = RateLimiter(rate=1.0, burst=1)
+    assert limiter.acquire(("1.1.1.1", "/x"), now=0.0) == 0.0
+    assert limiter.acquire(("1.1.1.1", "/x"), now=0.0) > 0
+    assert limiter.acquire(("2.2.2.2", "/x"), now=0.0) == 0.0
+    assert limiter.acquire(("1.1.1.1", "/y"), now=0.0) == 0.0
+
+
+def test_idle_buckets_are_evicted():
+    limiter = RateLimiter(rate=1.0, burst=1, idle_ttl=10)
+    limiter.acquire("a", now=0.0)
+    limiter.acquire("b", now=5.0)
+    limiter.acquire("c", now=12.0)
+    assert len(limiter) == 2
+
+
+def test_middleware_returns_429(monkeypatch):
+    monkeypatch.setattr(server, "rate_limiter", RateLimiter(rate=0.01, burst=1))
+    assert client.get("/api/v1/utils/status").status_code == 200
+    response = client.get("/api/v1/utils/status")
+    assert response.status_code == 429
+    assert int(response.headers["retry-after"]) >= 1
@@ -14,7 +14,8 @@ async def test_get_ticker_price(mocker):
     }
     mocker.patch(
         "services.exchange_client.ExchangeClient.get_ticker_price",
-        return_value=fake_ticker
+        # Routes pass a response encoder and send back its bytes
+        side_effect=lambda *args, encode, **kwargs: encode(fake_ticker),
     )
     response = client.post(
         "/api/v1/real_time/ticker",
@@ -34,7 +35,7 @@ async def test_get_order_book(mocker):
     }
     mocker.patch(
         "services.exchange_client.ExchangeClient.get_order_book",
-        return_value=fake_order_book
+        side_effect=lambda *args, encode, **kwargs: encode(fake_order_book),
     )
     response = client.post(
         "/api/v1/real_time/order_book",
@@ -57,7 +58,7 @@ async def test_get_trade_history(mocker):
     }
     mocker.patch(
         "services.exchange_client.ExchangeClient.get_trade_history",
-        return_value=fake_trade_history
+        side_effect=lambda *args, encode, **kwargs: encode(fake_trade_history),
     )
     response = client.post(
         "/api/v1/real_time/trades",
@@ -0,0 +1,195 @@
+import asyncio
+import time
+import numpy as np
+import pytest
+from services.cache_service import Cache
+from services.shared_cache import MmapBackend, RedisBackend, dumps_entry, loads_entry
+
+
+async def start_resp_server():
+    """Minimal Redis stand-in: GET, SET [PX ms] [NX], DEL, PING."""
+    data = {}
+
+    def live(key):
+        item = data.get(key)
+        if item is not None and item[1] is not None and item[1] <= time.monotonic():
+            del data[key]
+            item = None
+        return item
+
+    async def handle(reader, writer):
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                args = []
+                for _ in range(int(line[1:])):
+                    length = int((await reader.readline())[1:])
+                    args.append((await reader.readexactly(length + 2))[:-2])
+                cmd = args[0].upper()
+                if cmd == b"GET":
+                    item = live(args[1])
+                    reply = b"$-1\r\n" if item is None else b"$%d\r\n%s\r\n" % (len(item[0]), item[0])
+                elif cmd == b"SET":
+                    opts = [a.upper() for a in args[3:]]
+                    expires = time.monotonic() + int(args[4]) / 1000 if b"PX" in opts else None
+                    if b"NX" in opts and live(args[1]) is not None:
+                        reply = b"$-1\r\n"
+                    else:
+                        data[args[1]] = (args[2], expires)
+                        reply = b"+OK\r\n"
+                elif cmd == b"DEL":
+                    reply = b":%d\r\n" % (data.pop(args[1], None) is not None)
+                elif cmd == b"PING":
+                    reply = b"+PONG\r\n"
+                else:
+                    reply = b"-ERR unknown command\r\n"
+                writer.write(reply)
+                await writer.drain()
+        finally:
+            writer.close()
+
+    server = await asyncio.start_server(handle, "127.0.0.1", 0)
+    return server, server.sockets[0].getsockname()[1]
+
+
+def two_workers(make_backend):
+    return [Cache(shared=make_backend(), shared_namespaces="ticker,ohlcv", lease_poll=0.005) for _ in range(2)]
+
+
+def collapse_across_workers(workers):
+    calls = []
+
+    async def fetch():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return {"price": 100.0}
+
+    async def run():
+        results = await asyncio.gather(*(w.fill("ticker:binance:BTC/USDT", fetch) for w in workers))
+        assert await workers[1].get_shared("ticker:binance:BTC/USDT") == {"price": 100.0}
+        for w in workers:
+            await w.close_shared()
+        return results
+
+    results = asyncio.run(run())
+    assert results == [{"price": 100.0}] * 2
+    assert len(calls) == 1
+    assert workers[1].get("ticker:binance:BTC/USDT") == {"price": 100.0}
+    assert sum(w.stats()["shared_hits"] for w in workers) >= 1
+
+
+def test_mmap_tier_is_shared_between_mappings(tmp_path):
+    path = str(tmp_path / "shared.bin")
+    a, b = MmapBackend(path, slots=16, slot_size=1024), MmapBackend(path, slots=16, slot_size=1024)
+
+    async def run():
+        assert await a.set("ticker:x", b"payload", 10)
+        assert await b.get("ticker:x") == b"payload"
+        assert not await b.add("ticker:x", b"other", 10)
+        await b.delete("ticker:x")
+        assert await a.get("ticker:x") is None
+        assert await a.add("ticker:x", b"again", 0.05)
+        await asyncio.sleep(0.06)
+        assert await b.get("ticker:x") is None
+        assert not await a.set("ticker:big", b"x" * 2000, 10)
+        await a.close()
+        await b.close()
+
+    asyncio.run(run())
+
+
+def test_mmap_workers_fetch_once(tmp_path):
+    path = str(tmp_path / "shared.bin")
+    collapse_across_workers(two_workers(lambda: MmapBackend(path, slots=64, slot_size=4096)))
+
+
+def test_redis_workers_fetch_once_and_share_arrays():
+    async def run():
+        server, port = await start_resp_server()
+        workers = two_workers(lambda: RedisBackend(f"redis://127.0.0.1:{port}/0"))
+        candles = np.arange(6, dtype=float)
+        workers[0].set("ohlcv:binance:BTC/USDT:1m", candles)
+        await asyncio.sleep(0.05)
+        shared = await workers[1].get_shared("ohlcv:binance:BTC/USDT:1m")
+        # Namespaces outside the shared list stay local
+        workers[0].set("tradehistory:binance:BTC/USDT", {"trades": 1})
+        await asyncio.sleep(0.05)
+        local_only = await workers[1].get_shared("tradehistory:binance:BTC/USDT")
+        for w in workers:
+            await w.close_shared()
+        server.close()
+        return port, shared, local_only
+
+    port, shared, local_only = asyncio.run(run())
+    assert np.array_equal(shared, np.arange(6, dtype=float))
+    assert local_only is None
+
+    async def serve_and_collapse():
+        server, port = await start_resp_server()
+        workers = two_workers(lambda: RedisBackend(f"redis://127.0.0.1:{port}/0"))
+        calls = []
+
+        async def fetch():
+            calls.append(1)
+            await asyncio.sleep(0.05)
+            return {"price": 1.0}
+
+        results = await asyncio.gather(*(w.fill("ticker:kraken:ETH/USDT", fetch) for w in workers))
+        server.close()
+        return results, calls
+
+    results, calls = asyncio.run(serve_and_collapse())
+    assert results == [{"price": 1.0}] * 2 and len(calls) == 1
+
+
+def test_unreachable_shared_tier_falls_back_to_fetch():
+    c = Cache(shared=RedisBackend("redis://127.0.0.1:1/0", timeout=0.2), shared_namespaces="ticker")
+
+    async def fetch():
+        return {"price": 3.0}
+
+    assert asyncio.run(c.fill("ticker:binance:BTC/USDT", fetch)) == {"price": 3.0}
+    assert c.get("ticker:binance:BTC/USDT") == {"price": 3.0}
+    assert c.stats()["shared_errors"] >= 1
+
+
+def test_entries_round_trip_without_pickle():
+    candles = np.zeros(3, dtype=[("timestamp", "<i8"), ("close", "<f8")])
+    candles["close"] = [1.0, 2.0, 3.0]
+    expires_at, value = loads_entry(dumps_entry(10.0, candles))
+    assert expires_at == 10.0 and value.dtype == candles.dtype and np.array_equal(value, candles)
+    assert loads_entry(dumps_entry(5.0, {"bids": [[1.0, 2.0]]})) == (5.0, {"bids": [[1.0, 2.0]]})
+    with pytest.raises(TypeError):
+        dumps_entry(1.0, np.array([object()]))
+    with pytest.raises(ValueError):
+        loads_entry(b"\x80\x04K\x01.")  # a pickle is never unpickled
+
+
+def test_cancelled_redis_command_drops_connection():
+    async def handle(reader, writer):
+        # Echo each command's key back after a delay
+        while line := await reader.readline():
+            args = []
+            for _ in range(int(line[1:])):
+                length = int((await reader.readline())[1:])
+                args.append((await reader.readexactly(length + 2))[:-2])
+            await asyncio.sleep(0.1)
+            writer.write(b"$%d\r\n%s\r\n" % (len(args[1]), args[1]))
+            await writer.drain()
+        writer.close()
+
+    async def run():
+        server = await asyncio.start_server(handle, "127.0.0.1", 0)
+        backend = RedisBackend(f"redis://127.0.0.1:{server.sockets[0].getsockname()[1]}/0", prefix="")
+        first = asyncio.ensure_future(backend.get("first"))
+        await asyncio.sleep(0.05)
+        first.cancel()
+        await asyncio.gather(first, return_exceptions=True)
+        second = await backend.get("second")
+        await backend.close()
+        server.close()
+        return second
+
+    assert asyncio.run(run()) == b"second"
@@ -0,0 +1,51 @@
+import asyncio
+import pytest
+from conftest import FakeExchange
+from services.exchange_client import ExchangeClient
+from services.singleflight import SingleFlight
+
+
+def test_concurrent_calls_share_one_future():
+    sf = SingleFlight()
+    calls = []
+
+    async def work():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return "value"
+
+    async def run():
+        return await asyncio.gather(*[sf.do("ticker:x:y", work) for _ in range(10)])
+
+    assert asyncio.run(run()) == ["value"] * 10
+    assert len(calls) == 1
+    assert sf.stats()["collapsed"] == 9
+    assert sf.stats()["inflight"] == 0
+
+
+def test_errors_are_shared():
+    sf = SingleFlight()
+
+    async def work():
+        await asyncio.sleep(0.01)
+        raise RuntimeError("upstream down")
+
+    async def run():
+        return await asyncio.gather(*[sf.do("k", work) for _ in range(3)], return_exceptions=True)
+
+    results = asyncio.run(run())
+    assert all(isinstance(r, RuntimeError) for r in results)
+    assert sf.stats()["calls"] == 1
+
+
+def test_ticker_cache_miss_is_coalesced(fake_exchanges):
+    fake = fake_exchanges["binance"] = FakeExchange(delay=0.02)
+
+    async def run():
+        return await asyncio.gather(
+            *[ExchangeClient.get_ticker_price("binance", "BTC/USDT") for _ in range(25)]
+        )
+
+    results = asyncio.run(run())
+    assert fake.calls["fetch_ticker"] == 1
+    assert all(r["price"] == 100.0 for r in results)
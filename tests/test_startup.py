@@ -0,0 +1,28 @@
+import subprocess
+import sys
+from fastapi.testclient import TestClient
+from server import app
+from services.startup import lazy_import, startup
+
+
+def test_server_import_defers_heavy_modules():
+    code = (
+        "import sys, server; "
+        "print(sorted(m for m in ('ccxt', 'aiohttp', 'pyarrow') if m in sys.modules))"
+    )
+    out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+    assert out.stdout.strip() == "[]"
+
+
+def test_lazy_import():
+    assert lazy_import("not_a_real_module_xyz") is None
+    json = lazy_import("json")
+    assert json.dumps([1]) == "[1]"
+
+
+def test_startup_report_after_boot():
+    with TestClient(app) as client:
+        body = client.get("/api/v1/utils/startup").json()
+    assert body["ready_seconds"] > 0
+    assert {"imports", "markets snapshot", "exchange warm-up"} <= set(body["phases"])
+    assert startup.ready_seconds == body["ready_seconds"]
@@ -0,0 +1,97 @@
+import asyncio
+from fastapi.testclient import TestClient
+import routers.real_time as real_time
+from server import app
+from realtime.websocket_handler import PriceHub, Subscriber
+
+client = TestClient(app)
+
+
+def test_one_poller_per_pair_fans_out():
+    calls = []
+
+    async def fetch(exchange, symbol):
+        calls.append((exchange, symbol))
+        return float(len(calls))
+
+    async def run():
+        hub = PriceHub(fetch=fetch, interval=0.01)
+        subs = [Subscriber() for _ in range(50)]
+        for sub in subs:
+            hub.subscribe(sub, [("binance", "BTC/USDT")])
+        assert hub.stats() == {"pairs": 1, "subscriptions": 50}
+        batches = await asyncio.gather(*(sub.next_batch() for sub in subs))
+        for sub in subs:
+            hub.unsubscribe(sub)
+        assert hub.stats() == {"pairs": 0, "subscriptions": 0}
+        await hub.close()
+        return batches
+
+    batches = asyncio.run(run())
+    assert all("binance:BTC/USDT" in b for b in batches)
+    assert set(calls) == {("binance", "BTC/USDT")}
+
+
+def test_late_subscriber_gets_last_price():
+    async def fetch(exchange, symbol):
+        return 42.0
+
+    async def run():
+        hub = PriceHub(fetch=fetch, interval=0.01)
+        first, second = Subscriber(), Subscriber()
+        hub.subscribe(first, [("binance", "BTC/USDT")])
+        assert await first.next_batch() == {"binance:BTC/USDT": 42.0}
+        # The price never changes, so only the stored last price reaches the newcomer
+        hub.subscribe(second, [("binance", "BTC/USDT")])
+        batch = await asyncio.wait_for(second.next_batch(), 1)
+        await hub.close()
+        return batch
+
+    assert asyncio.run(run()) == {"binance:BTC/USDT": 42.0}
+
+
+def test_poller_bypasses_ticker_cache(monkeypatch):
+    from services.cache_service import cache
+    from services.exchange_client import ExchangeClient
+    from realtime.websocket_handler import _fetch_price
+    prices = iter([1.0, 2.0])
+
+    async def fetch_ticker(exchange, symbol):
+        return {"exchange": exchange, "symbol": symbol, "price": next(prices), "timestamp": 0}
+
+    monkeypatch.setattr(ExchangeClient, "_fetch_ticker_price", staticmethod(fetch_ticker))
+    cache.set("ticker:binance:BTC/USDT", {"price": 0.5}, ttl=60)
+
+    async def run():
+        return [await _fetch_price("binance", "BTC/USDT") for _ in range(2)]
+
+    assert asyncio.run(run()) == [1.0, 2.0]
+    cache.clear()
+
+
+def test_slow_subscriber_drops_oldest():
+    async def run():
+        sub = Subscriber(maxsize=2)
+        for i in range(5):
+            sub.push(("binance:BTC/USDT", float(i)))
+        return sub.dropped, await sub.next_batch()
+
+    dropped, batch = asyncio.run(run())
+    assert dropped == 3
+    assert batch == {"binance:BTC/USDT": 4.0}
+
+
+def test_websocket_subscribe(monkeypatch):
+    async def fetch(exchange, symbol):
+        return 42.0
+
+    async def validate(exchange, symbol):
+        return None
+
+    monkeypatch.setattr(real_time, "price_hub", PriceHub(fetch=fetch, interval=0.01))
+    monkeypatch.setattr(real_time, "validate_symbol", validate)
+    with client.websocket_connect("/api/v1/real_time/stream_prices") as ws:
+        ws.send_json({"action": "subscribe", "pairs": [{"exchange": "binance", "symbol": "BTC/USDT"}]})
+        assert ws.receive_json() == {"prices": {"binance:BTC/USDT": 42.0}}
+        ws.send_json({"action": "bogus", "pairs": []})
+        assert "error" in ws.receive_json()
@@ -0,0 +1,68 @@
+import asyncio
+import pytest
+from conftest import FakeExchange
+from services.cache_service import cache
+from services.exchange_client import ExchangeClient
+from analytics.trade_tape import TradeTape, to_trade_array
+
+
+def make_trades(start, count, amount=1.0):
+    return [
+        {"id": str(i), "timestamp": 1600000000000 + i * 1000, "price": 100.0 + i, "amount": amount,
+         "side": "buy" if i % 2 else "sell"}
+        for i in range(start, start + count)
+    ]
+
+
+def test_ring_buffer_wraps_and_keeps_latest():
+    tape = TradeTape(capacity=5)
+    tape.merge(to_trade_array(make_trades(0, 3)))
+    tape.merge(to_trade_array(make_trades(3, 4)))
+    assert len(tape) == 5
+    assert tape.latest()["id"].tolist() == ["2", "3", "4", "5", "6"]
+    assert tape.latest(2)["id"].tolist() == ["5", "6"]
+
+
+def test_merge_dedupes_overlap_and_backfills_older_trades():
+    tape = TradeTape(capacity=100)
+    assert tape.merge(to_trade_array(make_trades(5, 5))) == 5
+    # A ``since`` fetch returns the last trade again plus new ones
+    assert tape.merge(to_trade_array(make_trades(9, 3))) == 2
+    assert tape.merge(to_trade_array(make_trades(0, 8))) == 5
+    assert tape.latest()["id"].tolist() == [str(i) for i in range(12)]
+
+
+def test_aggregates_over_window():
+    tape = TradeTape(capacity=100)
+    trades = make_trades(0, 10)
+    trades[4]["amount"] = 50.0
+    tape.merge(to_trade_array(trades))
+    stats = tape.aggregates(window=4)
+    assert stats["count"] == 5
+    assert stats["buy_volume"] == 3.0 and stats["sell_volume"] == 2.0
+    full = tape.aggregates(window=60)
+    assert [t["trade_id"] for t in full["large_trades"]] == ["4"]
+    assert full["vwap"] == pytest.approx(sum(t["price"] * t["amount"] for t in trades) / 59.0)
+
+
+@pytest.fixture
+def fake(fake_exchanges):
+    fake_exchanges["binance"] = FakeExchange(trades=make_trades(0, 30))
+    return fake_exchanges["binance"]
+
+
+def test_any_limit_served_from_tape(fake):
+    small = asyncio.run(ExchangeClient.get_trade_history("binance", "BTC/USDT", 5))
+    large = asyncio.run(ExchangeClient.get_trade_history("binance", "BTC/USDT", 20))
+    assert [t["trade_id"] for t in small["trades"]] == ["25", "26", "27", "28", "29"]
+    assert len(large["trades"]) == 20
+    assert len(fake.trade_calls) == 1
+
+
+def test_expired_marker_fetches_since_last_trade(fake):
+    asyncio.run(ExchangeClient.get_trade_history("binance", "BTC/USDT", 5))
+    fake.trades += make_trades(30, 3)
+    cache.delete("tradehistory:binance:BTC/USDT")
+    result = asyncio.run(ExchangeClient.get_trade_history("binance", "BTC/USDT", 5))
+    assert fake.trade_calls[-1][0] == 1600000000000 + 29 * 1000
+    assert [t["trade_id"] for t in result["trades"]] == ["28", "29", "30", "31", "32"]
@@ -0,0 +1,116 @@
+import asyncio
+import aiohttp
+import time
+import ccxt
+import pytest
+from conftest import FakeExchange
+from services.upstream_policy import UpstreamPolicy, CircuitBreaker, CircuitOpenError, is_retryable
+from services.exchange_client import ExchangeClient
+import services.exchange_client as exchange_client
+
+
+def counting(*outcomes):
+    calls = []
+
+    async def func():
+        calls.append(1)
+        outcome = outcomes[min(len(calls), len(outcomes)) - 1]
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+    return func, calls
+
+
+def test_error_classification():
+    assert is_retryable(ccxt.RequestTimeout("slow"))
+    assert is_retryable(ccxt.RateLimitExceeded("429"))
+    assert is_retryable(OSError("reset"))
+    assert not is_retryable(ccxt.BadSymbol("no such market"))
+    assert not is_retryable(ccxt.AuthenticationError("key"))
+    assert is_retryable(asyncio.TimeoutError())
+    assert is_retryable(aiohttp.ServerDisconnectedError())
+    assert not is_retryable(KeyError("last"))
+    assert not is_retryable(TypeError("unsupported operand"))
+
+
+def test_programming_errors_fail_fast_without_tripping_the_breaker():
+    policy = UpstreamPolicy(max_attempts=3, backoff_base=0.0)
+    func, calls = counting(KeyError("last"))
+    for _ in range(policy.breaker("binance").threshold + 1):
+        with pytest.raises(KeyError):
+            asyncio.run(policy.call("binance", "fetch_ticker", func, "failed"))
+    assert len(calls) == policy.breaker("binance").threshold + 1
+    assert policy.retries == 0 and policy.breaker("binance").state == "closed"
+
+
+def test_transient_errors_retried_and_bad_symbol_not():
+    policy = UpstreamPolicy(max_attempts=3, backoff_base=0.0)
+    func, calls = counting(ccxt.NetworkError("down"), ccxt.NetworkError("down"), "ok")
+    assert asyncio.run(policy.call("binance", "fetch_ticker", func, "failed")) == "ok"
+    assert len(calls) == 3 and policy.retries == 2
+
+    func, calls = counting(ccxt.BadSymbol("BTC/XYZ not found"))
+    with pytest.raises(ccxt.BadSymbol):
+        asyncio.run(policy.call("binance", "fetch_ticker", func, "failed"))
+    assert len(calls) == 1
+
+    func, calls = counting(ccxt.NetworkError("down"))
+    with pytest.raises(Exception, match="failed"):
+        asyncio.run(policy.call("kraken", "fetch_ticker", func, "failed"))
+    assert len(calls) == 3
+
+
+def test_circuit_breaker_fails_fast_then_probes():
+    breaker = CircuitBreaker(threshold=2, cooldown=10.0)
+    breaker.on_failure(now=0.0)
+    breaker.on_failure(now=0.0)
+    assert breaker.state == "open"
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call(now=5.0)
+    assert breaker.before_call(now=11.0) is True
+    # Only one probe at a time while half-open
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call(now=11.0)
+    breaker.on_failure(now=11.0)
+    assert breaker.state == "open" and breaker.opened_at == 11.0
+    breaker.before_call(now=22.0)
+    breaker.on_success()
+    assert breaker.state == "closed" and breaker.before_call() is False
+
+
+def test_open_circuit_skips_upstream():
+    policy = UpstreamPolicy(max_attempts=6, backoff_base=0.0)
+    func, calls = counting(ccxt.ExchangeNotAvailable("maintenance"))
+    with pytest.raises(CircuitOpenError):
+        asyncio.run(policy.call("binance", "fetch_ticker", func, "failed"))
+    assert len(calls) == policy.breaker("binance").threshold
+    with pytest.raises(CircuitOpenError):
+        asyncio.run(policy.call("binance", "fetch_ticker", func, "failed"))
+    assert len(calls) == policy.breaker("binance").threshold
+    assert policy.stats()["breakers"]["binance"] == "open"
+
+
+def test_slow_call_is_hedged():
+    policy = UpstreamPolicy(hedge=True)
+    for _ in range(50):
+        policy._record("binance", "fetch_ticker", 0.01)
+    calls = []
+
+    async def func():
+        calls.append(1)
+        await asyncio.sleep(1.0 if len(calls) == 1 else 0.0)
+        return len(calls)
+
+    start = time.monotonic()
+    assert asyncio.run(policy.call("binance", "fetch_ticker", func, "failed")) == 2
+    assert time.monotonic() - start < 0.5
+    assert policy.hedges == 1 and policy.hedge_wins == 1
+
+
+def test_client_does_not_retry_invalid_symbol(fake_exchanges, monkeypatch):
+    fake = fake_exchanges["binance"] = FakeExchange(error=ccxt.BadSymbol("FOO/BAR not found"))
+    monkeypatch.setattr(exchange_client, "upstream", UpstreamPolicy(backoff_base=0.0))
+    with pytest.raises(ccxt.BadSymbol):
+        asyncio.run(ExchangeClient._fetch_ticker_price("binance", "FOO/BAR"))
+    assert fake.calls["fetch_ticker"] == 1